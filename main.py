@@ -1,13 +1,52 @@
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QIcon
+import os
+import subprocess
 import sys
-from src.ui.main_window import MainWindow
+import time
+
+from src.core.block_channel import service_status
+
+SERVICE_START_TIMEOUT = 3.0  # seconds to wait for a newly started blocker service to answer
+
+def start_blocker_service(db_path: str = 'app_blocker.db') -> bool:
+    """Start the headless blocker service unless one is running, so protection does not depend on the GUI"""
+    if service_status() is not None:
+        return True
+    try:
+        if sys.platform == 'win32':
+            options = {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            options = {'start_new_session': True}
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'src.core.blocker_service', '--db', db_path],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdin=subprocess.DEVNULL,
+            **options
+        )
+    except OSError as e:
+        print(f"Could not start blocker service: {e}")
+        return False
+
+    deadline = time.monotonic() + SERVICE_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False  # No verified user yet; the GUI monitors in-process instead
+        if service_status() is not None:
+            return True
+        time.sleep(0.1)
+    return False
 
 def main():
+    # Protection starts before the GUI modules are even imported
+    start_blocker_service(os.path.abspath('app_blocker.db'))
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QIcon
+    from src.ui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     # app.setWindowIcon(QIcon("icons/app_icon.png"))  # Set application icon
     window = MainWindow(show_on_start=False)  # Don't show immediately
-    
+
     # Initialize user before showing main window
     window.initialize_user()  # This will handle showing the window after verification
     sys.exit(app.exec_())
@@ -1,53 +1,56 @@
 import sqlite3
-from src.utils.database import Database
+from src.utils.database import Database, notify_change
+from src.utils.db_connection import get_connection
+from src.utils.migrations import SCHEMA_VERSION, migrate
 
 def set_default_settings(db, user_email):
-    """Set default settings for a user"""
+    """Set default settings for a user, keeping any the user already has"""
     default_settings = {
         # Block screen settings
         'countdown_duration': ('60', 'number'),
-        'block_message': '(اتقي الله في نفسك)',
+        'block_message': ('(اتقي الله في نفسك)', 'text'),
         'redirect_url': ('https://www.google.com', 'text'),
-        
+
         # Protection settings
         'checkBox_6': ('true', 'boolean'),  # Uninstall protection
         'adult_content_blocking': ('true', 'boolean'),
         'auto_block_adult': ('true', 'boolean')
     }
-    
-    for setting_name, (value, setting_type) in default_settings.items():
-        db.update_setting(user_email, setting_name, value, setting_type)
+
+    with get_connection(db.db_path) as conn:
+        conn.executemany('''
+            INSERT OR IGNORE INTO user_settings (user_email, setting_name, setting_value, setting_type)
+            VALUES (?, ?, ?, ?)
+        ''', [(user_email, name, value, setting_type)
+              for name, (value, setting_type) in default_settings.items()])
+    notify_change(db.db_path, user_email, 'user_settings')
     print(f"Default settings set for user: {user_email}")
 
 def migrate_database():
     """
-    Migrate the database to the new schema that includes setting_type column
+    Upgrade the database to the current schema without losing any data,
+    then fill in default settings users do not have yet
     """
     print("Starting database migration...")
     db = Database()
-    
-    # Backup existing settings if needed
+
+    version = migrate(db.db_path)
+    if version < SCHEMA_VERSION:
+        print(f"Migration stopped at version {version} of {SCHEMA_VERSION}")
+        return
+
     try:
-        with sqlite3.connect(db.db_path) as conn:
+        with get_connection(db.db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT user_email FROM user_settings")
+            cursor.execute("SELECT email FROM users UNION SELECT DISTINCT user_email FROM user_settings")
             users = [row[0] for row in cursor.fetchall()]
-    except:
+    except sqlite3.Error as e:
+        print(f"Error listing users: {e}")
         users = []
-    
-    # Drop all existing tables
-    print("Dropping existing tables...")
-    db.drop_tables()
-    
-    # Create tables with new schema
-    print("Creating tables with new schema...")
-    db.create_tables()
-    
-    # Restore settings with proper types for each user
+
     for user_email in users:
-        print(f"Restoring settings for user: {user_email}")
         set_default_settings(db, user_email)
-    
+
     print("Migration completed successfully!")
 
 if __name__ == "__main__":
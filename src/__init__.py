@@ -1,8 +1,10 @@
-from PyQt5.QtWidgets import QDialog, QMainWindow, QApplication
 import sys
-from src.ui.main_window import MainWindow
 
 def main():
+    # Imported here so the headless blocker service can import the package without PyQt5
+    from PyQt5.QtWidgets import QApplication
+    from src.ui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     main_window = MainWindow()
     main_window.show()
@@ -3,22 +3,36 @@ import os
 import re
 import time
 import threading
-from typing import List, Dict, Optional
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse
-import requests
-from bs4 import BeautifulSoup
 from PyQt5.QtWidgets import QApplication, QMainWindow, QDialog
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread, QObject
 from PyQt5.QtGui import QFont
-import psutil
-import win32gui
-import win32process
 import win32api
 
 # Import the proper block screen implementation
 from ..ui.blkScrn import BlockScreen
+from ..ui.block_dispatcher import get_block_dispatcher
 
+from .block_channel import get_block_listener, service_status
+from .block_log import get_block_log
 from .content_filters import ADULT_DOMAINS, ADULT_KEYWORDS, SUSPICIOUS_URL_PATTERNS
+from .detection_pipeline import DetectionPipeline, Verdict
+from .domain_index import get_adult_domain_index
+from .html_scanner import (
+    HEADINGS, IMG_ALT, LINK_HREF, LINK_TEXT, META_DESCRIPTION, META_KEYWORDS, TITLE, HtmlScanner
+)
+from .fetch_engine import get_fetch_engine
+from .page_fetcher import DEFAULT_MAX_BYTES
+from .keyword_matcher import build_keyword_matcher
+from .policy import get_policy
+from .monitor_scheduler import WindowSnapshot, get_monitor_scheduler
+from .throttle import block_event_key, get_throttle
+from .url_patterns import URL_BLOCK_SCORE, get_suspicious_url_patterns, score_url, url_block_reason
+from ..utils.data_version import get_data_version_watcher
+from ..utils.database import add_change_listener, remove_change_listener
+from ..utils.keyword_manager import KeywordManager
 
 class ContentAnalyzer(QObject):
     """Analyzes web content for adult material"""
@@ -26,7 +40,13 @@ class ContentAnalyzer(QObject):
     # Signal for content detection
     content_detected = pyqtSignal(str, str)  # url, reason
     
-    def __init__(self):
+    # Page sections scored by analyze_html_content
+    HTML_SECTIONS = frozenset((TITLE, META_DESCRIPTION, META_KEYWORDS, IMG_ALT, LINK_HREF, LINK_TEXT) + HEADINGS[:2])
+    HTML_KEYWORD_SCORE = 15
+    HTML_BLOCK_SCORE = 30
+    URL_BLOCK_SCORE = URL_BLOCK_SCORE
+    
+    def __init__(self, user_keywords: Optional[List[str]] = None):
         super().__init__()
         print("Initializing ContentAnalyzer")
         
@@ -34,6 +54,13 @@ class ContentAnalyzer(QObject):
         self.adult_domains = ADULT_DOMAINS
         self.adult_keywords = ADULT_KEYWORDS
         self.suspicious_patterns = SUSPICIOUS_URL_PATTERNS
+        self.keyword_matcher = build_keyword_matcher(user_keywords)
+        self.domain_index = get_adult_domain_index()
+        self.url_patterns = get_suspicious_url_patterns()
+    
+    def set_user_keywords(self, user_keywords: List[str]):
+        """Recompile the keyword matcher with the user's blocked keywords"""
+        self.keyword_matcher = build_keyword_matcher(user_keywords)
     
     def analyze_url(self, url: str) -> Dict[str, any]:
         """Analyze URL for adult content"""
@@ -51,47 +78,22 @@ class ContentAnalyzer(QObject):
             # Debug print
             print(f"Analyzing URL: {url}")
             
-            # Check domain
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.lower() if parsed_url.netloc else ''
-            
-            # Debug print
-            print(f"Checking domain: {domain}")
-            
-            for adult_domain in self.adult_domains:
-                if adult_domain in domain:
-                    print(f"Adult domain detected: {adult_domain}")
-                    result['is_blocked'] = True
-                    result['reason'] = f'Blocked domain: {adult_domain}'
-                    result['score'] = 100
-                    self._notify_block_detected(url, result['reason'])
-                    return result
+            adult_domain = self.match_domain(url)
+            if adult_domain:
+                print(f"Adult domain detected: {adult_domain}")
+                result['is_blocked'] = True
+                result['reason'] = f'Blocked domain: {adult_domain}'
+                result['score'] = 100
+                self._notify_block_detected(url, result['reason'])
+                return result
             
             # Analyze URL path and query
-            full_url = url.lower()
-            detected = []
-            
-            # Debug print
-            print("Checking for suspicious patterns in URL...")
-            
-            # Check keyword matches
-            for keyword in self.adult_keywords:
-                if keyword in full_url:
-                    print(f"Found keyword in URL: {keyword}")
-                    detected.append(keyword)
-                    result['score'] += 10
-            
-            # Check regex patterns
-            for pattern in self.suspicious_patterns:
-                matches = re.findall(pattern, full_url)
-                if matches:
-                    print(f"Found suspicious pattern in URL: {pattern}")
-                    detected.append(matches[0])  # Add the first match
-                    result['score'] += 15  # Higher score for regex pattern matches
+            score, detected = self.score_url(url)
+            result['score'] = score
             
             if detected:
                 result['detected_keywords'] = detected
-                if result['score'] >= 30:  # Threshold for blocking
+                if result['score'] >= self.URL_BLOCK_SCORE:  # Threshold for blocking
                     print(f"Score {result['score']} exceeds threshold")
                     result['is_blocked'] = True
                     result['reason'] = f'Adult keywords detected: {", ".join(detected[:3])}'
@@ -105,91 +107,102 @@ class ContentAnalyzer(QObject):
         
         return result
     
+    def match_domain(self, url: str) -> Optional[str]:
+        """The adult domain a URL's host belongs to, if any"""
+        parsed_url = urlparse(url)
+        domain = parsed_url.netloc.lower() if parsed_url.netloc else ''
+        return self.domain_index.match(domain)
+    
+    def score_url(self, url: str) -> Tuple[int, List[str]]:
+        """Score a URL by the adult keywords and suspicious patterns it contains"""
+        return score_url(url, self.keyword_matcher, self.url_patterns)
+    
+    def url_block_reason(self, url: str) -> Optional[Tuple[str, str]]:
+        """Reason and detected keywords if a URL scores high enough to be blocked"""
+        return url_block_reason(url, self.keyword_matcher, self.url_patterns)
+    
     def analyze_html_content(self, html_content: str, url: str = "") -> Dict[str, any]:
         """Analyze HTML content for adult material"""
+        scanner, finish = self._html_scan(url)
+        try:
+            scanner.feed(html_content)
+        except Exception as e:
+            print(f"Error analyzing HTML content: {e}")
+        return finish()
+    
+    def analyze_page(self, url: str, max_bytes: int = DEFAULT_MAX_BYTES) -> Dict[str, any]:
+        """Download and analyze a page, reading at most max_bytes of it"""
+        return self.analyze_page_async(url, max_bytes).result()
+    
+    def analyze_page_async(self, url: str, max_bytes: int = DEFAULT_MAX_BYTES) -> Future:
+        """Queue a page on the shared fetch engine; the future resolves to the analysis result"""
+        scanner, finish = self._html_scan(url)
+        
+        def on_fetched(stats: Dict) -> Dict[str, any]:
+            print(f"Read {stats['bytes_read']} bytes of {url} (status {stats['status_code']}, "
+                  f"stopped early: {stats['stopped_early']}, truncated: {stats['truncated']})")
+            return finish()
+        
+        return get_fetch_engine().submit(url, scanner, max_bytes=max_bytes, headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }, then=on_fetched)
+    
+    def page_scan(self, url: str):
+        """Scanner for a page and a function returning its (reason, detected) match, if any"""
+        scanner, finish = self._html_scan(url)
+        
+        def match() -> Optional[Tuple[str, str]]:
+            result = finish()
+            if result['is_blocked']:
+                return result['reason'], ', '.join(result['detected_keywords'])
+            return None
+        
+        return scanner, match
+    
+    def _html_scan(self, url: str):
+        """Create a scanner that scores page sections and a function returning the final result"""
         result = {
             'is_blocked': False,
             'reason': '',
             'score': 0,
             'detected_keywords': []
         }
+        detected_keywords = result['detected_keywords']
         
-        try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Analyze different parts of the webpage
-            elements_to_check = {
-                'title': soup.find('title'),
-                'meta_description': soup.find('meta', attrs={'name': 'description'}),
-                'meta_keywords': soup.find('meta', attrs={'name': 'keywords'}),
-                'h1_tags': soup.find_all('h1'),
-                'h2_tags': soup.find_all('h2'),
-                'img_alt': soup.find_all('img', alt=True),
-                'links': soup.find_all('a', href=True)
-            }
-            
-            detected_keywords = []
-            
-            for element_type, elements in elements_to_check.items():
-                if not elements:
-                    continue
-                    
-                if isinstance(elements, list):
-                    for element in elements:
-                        text = self._extract_text(element, element_type)
-                        keywords = self._find_adult_keywords(text)
-                        detected_keywords.extend(keywords)
-                else:
-                    text = self._extract_text(elements, element_type)
-                    keywords = self._find_adult_keywords(text)
-                    detected_keywords.extend(keywords)
-            
-            # Remove duplicates and calculate score
-            unique_keywords = list(set(detected_keywords))
-            result['detected_keywords'] = unique_keywords
-            result['score'] = len(unique_keywords) * 15
-            
-            # Determine if content should be blocked
-            if result['score'] >= 30:
-                result['is_blocked'] = True
-                result['reason'] = f'Adult content detected: {", ".join(unique_keywords[:3])}'
-                print(f"Adult content detected: content pattern matched")
-                self._notify_block_detected(url, result['reason'])
+        def on_text(section: str, text: str) -> bool:
+            for keyword in self._find_adult_keywords(text):
+                if keyword not in detected_keywords:
+                    detected_keywords.append(keyword)
+            # The score only grows, so stop reading once the page is blocked
+            return len(detected_keywords) * self.HTML_KEYWORD_SCORE >= self.HTML_BLOCK_SCORE
+        
+        scanner = HtmlScanner(on_text, self.HTML_SECTIONS)
+        
+        def finish() -> Dict[str, any]:
+            try:
+                scanner.close()
+                result['score'] = len(detected_keywords) * self.HTML_KEYWORD_SCORE
+                
+                # Determine if content should be blocked
+                if result['score'] >= self.HTML_BLOCK_SCORE:
+                    result['is_blocked'] = True
+                    result['reason'] = f'Adult content detected: {", ".join(detected_keywords[:3])}'
+                    print(f"Adult content detected: content pattern matched")
+                    self._notify_block_detected(url, result['reason'])
+                
+            except Exception as e:
+                print(f"Error analyzing HTML content: {e}")
             
-        except Exception as e:
-            print(f"Error analyzing HTML content: {e}")
+            return result
         
-        return result
-    
-    def _extract_text(self, element, element_type: str) -> str:
-        """Extract text from HTML elements"""
-        try:
-            if element_type == 'meta_description':
-                return element.get('content', '') if element else ''
-            elif element_type == 'meta_keywords':
-                return element.get('content', '') if element else ''
-            elif element_type == 'img_alt':
-                return element.get('alt', '') if element else ''
-            elif element_type == 'links':
-                return element.get('href', '') + ' ' + element.get_text() if element else ''
-            else:
-                return element.get_text() if element else ''
-        except:
-            return ''
+        return scanner, finish
     
     def _find_adult_keywords(self, text: str) -> List[str]:
         """Find adult keywords in text"""
         if not text:
             return []
-            
-        text_lower = text.lower()
-        found_keywords = []
         
-        for keyword in self.adult_keywords:
-            if keyword in text_lower:
-                found_keywords.append(keyword)
-        
-        return found_keywords
+        return self.keyword_matcher.find_keywords(text)
     
     def analyze_text(self, text: str) -> Dict[str, any]:
         """Analyze text content for adult material"""
@@ -202,14 +215,14 @@ class ContentAnalyzer(QObject):
         
         try:
             # First check for known adult domains
-            for domain in self.adult_domains:
-                if domain.lower() in text.lower():
-                    result['is_blocked'] = True
-                    result['reason'] = f'Adult domain detected: {domain}'
-                    result['score'] = 100
-                    result['detected_keywords'] = [domain]
-                    self._notify_block_detected(text, result['reason'])
-                    return result
+            domain = self.domain_index.find_in_text(text)
+            if domain:
+                result['is_blocked'] = True
+                result['reason'] = f'Adult domain detected: {domain}'
+                result['score'] = 100
+                result['detected_keywords'] = [domain]
+                self._notify_block_detected(text, result['reason'])
+                return result
             
             # Then analyze the text for keywords
             detected = self._find_adult_keywords(text)
@@ -244,10 +257,23 @@ class BrowserMonitor(QThread):
         super().__init__()
         print("Initializing BrowserMonitor...")
         self.settings_manager = SettingsManager(database, user_email)
+        self.database_path = database.db_path
+        self.user_email = user_email
+        self.keyword_manager = KeywordManager(database.db_path)
         self.content_analyzer = ContentAnalyzer()
         self.is_monitoring = False
-        self.last_urls = {}  # Track last URLs for each browser
-        self.check_interval = 2  # Check every 2 seconds instead of every second
+        self.pipeline = DetectionPipeline(
+            'browser',
+            title_rule=self.classify_title,
+            domain_rule=self._match_domain,
+            url_rule=lambda url: self.content_analyzer.url_block_reason(url),
+            page_scan=lambda url: self.content_analyzer.page_scan(url),
+            page_headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+        )
+        self.reload_keywords()
+        self.detector_name = f"adult_browser_monitor:{id(self)}"
+        self.throttle = get_throttle('browser_monitor_blocks')
+        self._stopped = threading.Event()
         
         # Connect content analyzer signals
         self.content_analyzer.content_detected.connect(
@@ -256,67 +282,68 @@ class BrowserMonitor(QThread):
         print("BrowserMonitor initialized")
         
     def run(self):
-        """Main monitoring loop"""
+        """Register with the shared monitor scheduler and wait until stopped"""
         print("Starting browser monitor thread...")
         self.is_monitoring = True
+        self._stopped.clear()
+        # Keywords may have changed while stopped; later changes arrive through the listener
+        self.reload_keywords()
+        add_change_listener(self._on_database_change)
         
-        while self.is_monitoring:
-            try:
-                # Check if adult content blocking is enabled
-                if not self.settings_manager.is_adult_content_blocking_enabled():
-                    print("Adult content blocking is disabled")
-                    time.sleep(2)
-                    continue
-                
-                print("Checking browser windows...")
-                # Get active browser windows
-                browser_windows = self.get_browser_windows()
-                
-                if browser_windows:
-                    print(f"Found {len(browser_windows)} browser windows")
-                    for window_info in browser_windows:
-                        print(f"Checking window: {window_info['title']}")
-                        self.check_browser_content(window_info)
-                
-                time.sleep(self.check_interval)  # Check less frequently
-                
-            except Exception as e:
-                print(f"Error in browser monitoring: {e}")
-                import traceback
-                print(traceback.format_exc())
-                time.sleep(2)
+        scheduler = get_monitor_scheduler()
+        scheduler.register(self.detector_name, self.check_snapshot)
+        self._stopped.wait()
+        scheduler.unregister(self.detector_name)
+        remove_change_listener(self._on_database_change)
+        print("Browser monitor stopped")
+    
+    def reload_keywords(self):
+        """Recompile the keyword matcher from the user's blocked keywords"""
+        keywords = self.keyword_manager.get_keywords(self.user_email)
+        self.content_analyzer.set_user_keywords(keywords)
+        # Monitors analyzing the same page with the same keywords share one analysis
+        self.pipeline.flight_tag = frozenset(keywords)
+    
+    def _on_database_change(self, db_path: str, user_email: Optional[str], table: Optional[str]):
+        """Reload the keywords when they may have changed"""
+        if table not in (None, 'blocked_keywords') or user_email not in (None, self.user_email):
+            return
+        if os.path.abspath(db_path) == os.path.abspath(self.database_path):
+            self.reload_keywords()
+    
+    def check_snapshot(self, snapshot: WindowSnapshot):
+        """Check the browser windows of one scheduler snapshot"""
+        # Check if adult content blocking is enabled
+        if not self.settings_manager.is_adult_content_blocking_enabled():
+            print("Adult content blocking is disabled")
+            return
+        
+        print("Checking browser windows...")
+        browser_windows = self.get_browser_windows(snapshot)
+        
+        if browser_windows:
+            print(f"Found {len(browser_windows)} browser windows")
+            for window_info in browser_windows:
+                print(f"Checking window: {window_info['title']}")
+                self.check_browser_content(window_info)
     
     def stop_monitoring(self):
         """Stop the monitoring thread"""
         self.is_monitoring = False
+        self._stopped.set()
     
-    def get_browser_windows(self) -> List[Dict]:
+    def get_browser_windows(self, snapshot: WindowSnapshot) -> List[Dict]:
         """Get information about active browser windows"""
         browser_processes = ['chrome.exe', 'firefox.exe', 'msedge.exe', 'opera.exe']
-        browser_windows = []
-        
-        def enum_windows_callback(hwnd, windows):
-            if win32gui.IsWindowVisible(hwnd):
-                window_title = win32gui.GetWindowText(hwnd)
-                if window_title:
-                    try:
-                        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                        process = psutil.Process(pid)
-                        process_name = process.name().lower()
-                        
-                        if any(browser in process_name for browser in browser_processes):
-                            windows.append({
-                                'hwnd': hwnd,
-                                'title': window_title,
-                                'process_name': process_name,
-                                'pid': pid
-                            })
-                    except:
-                        pass
-        
-        windows = []
-        win32gui.EnumWindows(enum_windows_callback, windows)
-        return windows
+        return [
+            {
+                'hwnd': window.hwnd,
+                'title': window.title,
+                'process_name': window.process_name.lower(),
+                'pid': window.pid
+            }
+            for window in snapshot.windows_of(browser_processes)
+        ]
     
     def check_browser_content(self, window_info: Dict):
         """Check browser content for adult material"""
@@ -324,79 +351,65 @@ class BrowserMonitor(QThread):
             title = window_info['title']
             print(f"\nChecking content for window: {title}")
             
-            # First directly check title against keywords
-            title_lower = title.lower()
-            from .content_filters import ADULT_KEYWORDS, ADULT_DOMAINS
-            
-            # Check for keywords first
-            for keyword in ADULT_KEYWORDS:
-                if keyword.lower() in title_lower:
-                    reason = f"Blocked keyword found in title: {keyword}"
-                    print(f"Adult content detected in title: {reason}")
-                    if not hasattr(self, 'current_block_screen') or not self.current_block_screen:
-                        self.content_blocked.emit(title, reason, keyword)
-                    return
-            
-            # Then check for domain names
-            for domain in ADULT_DOMAINS:
-                domain_name = domain.split('.')[0]  # Get just the domain name without TLD
-                if domain_name.lower() in title_lower:
-                    reason = f"Blocked domain found in title: {domain}"
-                    print(f"Adult content detected in title: {reason}")
-                    if not hasattr(self, 'current_block_screen') or not self.current_block_screen:
-                        self.content_blocked.emit(title, reason, domain)
-                    return
-            
-            # If no adult content in title, try to get URL
             url = self.extract_url_from_title(title)
-            if not url:
-                print("No URL found in title")
-                return
+            if url:
+                print(f"Found URL: {url}")
             
-            print(f"Found URL: {url}")
-            
-            # Skip if we already checked this URL recently
-            process_id = window_info['pid']
-            if process_id in self.last_urls and self.last_urls[process_id] == url:
-                print("URL was recently checked, skipping")
-                return
-            
-            self.last_urls[process_id] = url
-            print("Analyzing URL content...")
-            
-            # Analyze URL
-            url_analysis = self.content_analyzer.analyze_url(url)
-            print(f"URL analysis result: {url_analysis}")
-            
-            if url_analysis['is_blocked']:
-                print("URL is blocked, emitting signal")
-                self.content_blocked.emit(url, url_analysis['reason'], 
-                                        ', '.join(url_analysis['detected_keywords']))
+            # A window blocked moments ago costs one lookup, not another pipeline run
+            key = block_event_key(url, window=title)
+            if self.throttle.suppressed(key):
                 return
             
-            # Try to get page content
-            try:
+            # Title, domain and URL checks run inline; the page itself is only
+            # fetched, in the background, if none of them decides
+            verdict = self.pipeline.run(title, url)
+            if verdict.pending is not None:
                 print("Fetching page content...")
-                response = requests.get(url, timeout=5, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                
-                if response.status_code == 200:
-                    print("Analyzing page content...")
-                    content_analysis = self.content_analyzer.analyze_html_content(response.text, url)
-                    print(f"Content analysis result: {content_analysis}")
-                    
-                    if content_analysis['is_blocked']:
-                        print("Content is blocked, emitting signal")
-                        self.content_blocked.emit(url, content_analysis['reason'],
-                                                ', '.join(content_analysis['detected_keywords']))
-                        
-            except requests.RequestException as e:
-                print(f"Error fetching content: {e}")  # Log the error for debugging
+                verdict.pending.add_done_callback(lambda future: self._on_page_analyzed(url, key, future))
+            elif verdict.blocked:
+                self._emit_verdict(title if verdict.stage == 'title' else url, url, key, verdict)
                 
         except Exception as e:
             print(f"Error checking browser content: {e}")
     
+    def _emit_verdict(self, target: str, url: Optional[str], key: Tuple, verdict: Verdict):
+        """Report a blocked title or URL, at most once per cooldown for a window"""
+        print(f"Adult content detected by {verdict.stage} check: {verdict.reason}")
+        if not self.throttle.allow(key):
+            return
+        settings = self.settings_manager
+        get_block_log(settings.database.db_path).record(settings.user_email, url, verdict.reason,
+                                                        verdict.stage, 'browser_monitor')
+        self.content_blocked.emit(target, verdict.reason, verdict.detected)
+    
+    def classify_title(self, title: str) -> Optional[tuple]:
+        """Check a window title, returning (reason, detected) if it should be blocked"""
+        title_lower = title.lower()
+        
+        # Check for keywords first
+        keyword = self.content_analyzer.keyword_matcher.search(title_lower)
+        if keyword:
+            return f"Blocked keyword found in title: {keyword}", keyword
+        
+        # Then check for domain names
+        for domain in ADULT_DOMAINS:
+            domain_name = domain.split('.')[0]  # Get just the domain name without TLD
+            if domain_name.lower() in title_lower:
+                return f"Blocked domain found in title: {domain}", domain
+        return None
+    
+    def _match_domain(self, url: str) -> Optional[tuple]:
+        """Return (reason, domain) if the URL is on an adult domain"""
+        domain = self.content_analyzer.match_domain(url)
+        return (f'Blocked domain: {domain}', domain) if domain else None
+    
+    def _on_page_analyzed(self, url: str, key: Tuple, future: Future):
+        """Block the page if the background analysis found adult content"""
+        verdict = future.result()
+        print(f"Page verdict for {url}: {verdict.decision}")
+        if verdict.blocked:
+            self._emit_verdict(url, url, key, verdict)
+    
     def extract_url_from_title(self, title: str) -> Optional[str]:
         """Extract URL or domain from browser window title"""
         # First try to find a full URL
@@ -424,14 +437,18 @@ class SettingsManager:
         self.database = database
         self.user_email = user_email
     
+    @property
+    def policy(self):
+        """Current in-memory policy snapshot for the user"""
+        return get_policy(self.database.db_path, self.user_email)
+    
     def is_adult_content_blocking_enabled(self) -> bool:
         """Check if adult content blocking is enabled"""
-        setting = self.database.get_setting(self.user_email, 'checkBox')
-        return setting if setting is not None else True  # Default to enabled
+        return self.policy.get_setting('checkBox', True)  # Default to enabled
     
     def get_block_message(self) -> str:
         """Get custom block message from database"""
-        message = self.database.get_setting(self.user_email, 'block_screen_message')
+        message = self.policy.get_setting('block_screen_message')
         if not message:
             # Return default message if none saved
             return """<div style='text-align: center; font-size: 18px; color: #2c3e50;'>
@@ -443,7 +460,7 @@ class SettingsManager:
     
     def get_countdown_seconds(self) -> int:
         """Get countdown duration from database"""
-        duration = self.database.get_setting(self.user_email, 'block_screen_timer')
+        duration = self.policy.get_setting('block_screen_timer')
         try:
             if duration:
                 return int(duration)
@@ -459,6 +476,10 @@ class SettingsManager:
 class AdultContentBlocker(QObject):
     """Main adult content blocking system"""
     
+    # Block published by the blocker service, delivered on the GUI thread
+    service_blocked = pyqtSignal(str, str, str)  # url, reason, title
+    STALE_EVENT_AGE = 30  # seconds after which a block event queued while the GUI was away is ignored
+    
     def __init__(self, database, user_email):
         super().__init__()
         print("Initializing AdultContentBlocker...")
@@ -483,6 +504,10 @@ class AdultContentBlocker(QObject):
         """Start the content blocking system"""
         print("Starting content blocking system...")
         
+        if self.uses_service:
+            self._listen_to_service()
+            return
+        
         # If we don't have a browser monitor, create one
         if not self.browser_monitor:
             self.browser_monitor = BrowserMonitor(self.database, self.user_email)
@@ -527,84 +552,59 @@ class AdultContentBlocker(QObject):
         self.user_email = user_email
         self.current_block_screen = None
         self.content_analyzer = ContentAnalyzer()
+        self.listening = False
+        
+        # With a blocker service enforcing this user, the GUI only shows the blocks it publishes
+        status = service_status()
+        self.uses_service = status is not None and status.get('user_email') == user_email
         
         # Create browser monitor
         self.settings_manager = SettingsManager(database, user_email)
-        self.browser_monitor = BrowserMonitor(database, user_email)
+        self.browser_monitor = None if self.uses_service else BrowserMonitor(database, user_email)
         
         # Connect signals
-        self.browser_monitor.content_blocked.connect(self.handle_detected_content)
+        if self.browser_monitor:
+            self.browser_monitor.content_blocked.connect(self.handle_detected_content)
         self.content_analyzer.content_detected.connect(self.handle_detected_content)
+        self.service_blocked.connect(self.handle_detected_content)
+        
+        # Writes by the service or another process reach this process's caches within a tick
+        get_data_version_watcher(database.db_path).start()
+        
+        # Build the block screen once the event loop runs, so a block only has to show it
+        QTimer.singleShot(0, lambda: get_block_dispatcher().prewarm(user_email))
         
         # Start monitoring automatically
         print("Starting monitoring automatically...")
         self.start_blocking()
 
+    def _listen_to_service(self):
+        """Show the blocks the blocker service publishes; it notices the GUI's writes itself"""
+        if not self.listening:
+            # Shared with the main window's integration, which may already be listening
+            self.listening = get_block_listener().subscribe(self._on_service_event)
+            if not self.listening:
+                return
+        print("Adult content blocking is enforced by the blocker service")
+    
+    def _on_service_event(self, event: Dict):
+        """Pass a block event from the channel's thread to the GUI thread"""
+        if event.get('type') != 'block':
+            return
+        if time.time() - event.get('timestamp', 0) > self.STALE_EVENT_AGE:
+            return
+        self.service_blocked.emit(event.get('url', ''), event.get('reason', ''), event.get('title', ''))
+    
     def handle_detected_content(self, url: str, reason: str, detected_content: str = ""):
         """Handle detected adult content"""
         print(f"Content detected - URL: {url}, Reason: {reason}, Content: {detected_content}")
-        
-        # If a block screen is already showing, don't create a new one
-        if self.current_block_screen is not None:
-            try:
-                if not self.current_block_screen.isHidden():
-                    print("Block screen already active")
-                    return
-            except RuntimeError:
-                self.current_block_screen = None
-                
-        try:
-            # Create new block screen
-            print("Creating block screen...")
-            self.current_block_screen = BlockScreen(user_email=self.user_email)
-            
-            # If block screen indicates it's not ready (in cooldown), return
-            if not getattr(self.current_block_screen, 'initialized', False):
-                print("Block screen not ready (in cooldown)")
-                self.current_block_screen = None
-                return
-                
-            # Set the reason text
-            if hasattr(self.current_block_screen, 'blkRsn_lbl'):
-                self.current_block_screen.blkRsn_lbl.setText(f"Blocked: {url}\nReason: {reason}")
-                
-            # Define cleanup handler
-            def on_block_screen_finished():
-                print("Block screen finished, cleaning up")
-                if self.current_block_screen:
-                    self.current_block_screen = None
-                    
-            # Connect cleanup handler
-            self.current_block_screen.finished.connect(on_block_screen_finished)
-            
-            # Show the block screen modally
-            print("Showing block screen...")
-            self.current_block_screen.exec_()
-            
-        except Exception as e:
-            print(f"Error showing block screen: {e}")
-            import traceback
-            print(traceback.format_exc())
-            if self.current_block_screen:
-                try:
-                    self.current_block_screen.close()
-                except:
-                    pass
-                self.current_block_screen = None
+        # The dispatcher shows one screen per burst and returns without waiting for the countdown
+        get_block_dispatcher().dispatch(url, reason, self.user_email, detected_content)
     
     def _cleanup_block_screen(self):
         """Clean up the block screen safely"""
-        if self.current_block_screen is not None:
-            try:
-                print("Cleaning up block screen...")
-                if hasattr(self.current_block_screen, 'close'):
-                    self.current_block_screen.close()
-                self.current_block_screen.deleteLater()
-            except Exception as e:
-                print(f"Error during cleanup: {e}")
-            finally:
-                self.current_block_screen = None
-                print("Block screen cleanup complete")
+        print("Cleaning up block screen...")
+        get_block_dispatcher().close_screen()
     
     def stop_blocking(self):
         """Stop the content blocking system"""
@@ -615,15 +615,14 @@ class AdultContentBlocker(QObject):
                 self.browser_monitor.quit()
                 self.browser_monitor.wait()
             self.browser_monitor.is_monitoring = False
+        
+        # The service keeps enforcing; it reads the setting that turned blocking off
+        if self.listening:
+            get_block_listener().unsubscribe(self._on_service_event)
+            self.listening = False
             
         # Clear any existing block screen
-        if self.current_block_screen:
-            try:
-                self.current_block_screen.close()
-                self.current_block_screen.deleteLater()
-            except:
-                pass
-            self.current_block_screen = None
+        get_block_dispatcher().close_screen()
             
         print("Adult content blocking stopped")
     
@@ -0,0 +1,501 @@
+"""
+Local channels that carry block events from the monitors to the GUI.
+
+Monitors publish an event whenever they decide to block something; the
+application listens on a named pipe (Windows) or a Unix domain socket and
+receives each event as soon as it is sent. Events are JSON objects sent as
+``multiprocessing.connection`` messages, so every event arrives whole and
+in order, and nothing is ever unpickled from the socket.
+
+The listener acknowledges every event. A publisher keeps an event until it
+is acknowledged, and while the listener is unreachable keeps its most
+recent events and sends them once it is back, so events published while
+the GUI is starting or restarting are not lost. Each publisher numbers its
+events, so the receiver can drop an event that was resent after its
+acknowledgement was lost (``is_new_event``). Events are sent from the
+publisher's own thread, and every connect and handshake has a deadline, so
+a listener that has stopped answering never holds up a monitor or the GUI.
+
+The same framing serves other channels, named by ``default_address``: the
+blocker service takes control requests on its own channel, and the
+listener's callback can return a reply that is sent back in place of the
+plain acknowledgement (``send_request``).
+
+Every connection first passes the ``multiprocessing`` authkey handshake with
+a secret only the user can read (``channel_authkey``), so other local users
+can neither publish events nor send control requests. The listener runs the
+handshake on the connection's own thread, so a client that stalls in it
+cannot hold up the others.
+"""
+
+import json
+import os
+import secrets
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener, answer_challenge, deliver_challenge
+from typing import Any, Callable, Dict, List, Optional
+
+MAX_EVENT_BYTES = 64 * 1024
+BACKLOG_SIZE = 256
+ACK_TIMEOUT = 0.5  # seconds to wait for the listener to acknowledge an event
+SERVICE_CHANNEL = 'service'  # Control requests to the blocker service
+
+
+def default_address(channel: str = 'blocks') -> str:
+    """Pipe or socket path of a channel for the current user"""
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\blockerhero-{channel}-' + os.environ.get('USERNAME', 'user')
+    return os.path.join(tempfile.gettempdir(), f'blockerhero-{channel}-{os.getuid()}.sock')
+
+
+def authkey_path() -> str:
+    """File holding the current user's channel secret, in the user's own settings directory"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    return os.path.join(base, 'blockerhero', 'channel.key')
+
+
+_authkey: Optional[bytes] = None
+_authkey_lock = threading.Lock()
+
+
+def channel_authkey() -> bytes:
+    """Secret shared by the current user's processes, created on first use"""
+    global _authkey
+    with _authkey_lock:
+        if _authkey is None:
+            _authkey = _read_or_create_authkey(authkey_path())
+        return _authkey
+
+
+def _read_or_create_authkey(path: str) -> bytes:
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    try:
+        # Readable by the user only; O_EXCL makes one process the creator
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # Another process may be writing it right now
+        for _ in range(50):
+            with open(path, 'rb') as f:
+                key = f.read().strip()
+            if key:
+                return key
+            time.sleep(0.01)
+        raise OSError(f"Channel key {path} is empty")
+    key = secrets.token_hex(32).encode('ascii')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+def _encode(event: Dict[str, Any]) -> bytes:
+    return json.dumps(event, ensure_ascii=False).encode('utf-8')
+
+
+class BlockChannelServer:
+    """Accepts publishers and hands every event they send to a callback
+
+    If the callback returns a dict, it is sent back as the reply to the
+    event; otherwise the event is acknowledged with its sequence number.
+    Only clients holding authkey (the user's channel secret by default)
+    are heard.
+    """
+
+    def __init__(self, callback: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                 address: Optional[str] = None, authkey: Optional[bytes] = None):
+        self.callback = callback
+        self.address = address or default_address()
+        self.authkey = authkey or channel_authkey()
+        self._listener: Optional[Listener] = None
+        self._connections: List[Any] = []
+        self._lock = threading.Lock()
+        self._running = False
+        self.received = 0
+        self.rejected = 0
+        self.unauthenticated = 0
+
+    def start(self):
+        """Start listening; raises OSError if the address is in use by a live server"""
+        with self._lock:
+            if self._running:
+                return
+            if self.address.startswith('/') and os.path.exists(self.address):
+                # A socket file left behind by a process that died; bind fails while it exists
+                if self._is_live():
+                    raise OSError(f"Block channel already served at {self.address}")
+                os.unlink(self.address)
+            self._listener = Listener(self.address)
+            self._running = True
+        threading.Thread(target=self._accept_loop, name='block-channel', daemon=True).start()
+        print(f"Block channel listening on {self.address}")
+
+    def _is_live(self) -> bool:
+        try:
+            _dial(self.address, ACK_TIMEOUT).close()
+            return True
+        except OSError:
+            return False
+
+    def stop(self):
+        """Stop listening and close every publisher connection"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            listener, self._listener = self._listener, None
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except OSError:
+                pass
+        try:
+            # Unblock accept() by connecting once before closing
+            Client(self.address).close()
+        except OSError:
+            pass
+        listener.close()
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                connection = self._listener.accept()
+            except (OSError, AttributeError):
+                break
+            if not self._running:
+                connection.close()
+                break
+            with self._lock:
+                self._connections.append(connection)
+            threading.Thread(target=self._read_loop, args=(connection,),
+                             name='block-channel-reader', daemon=True).start()
+
+    def _authenticate(self, connection) -> bool:
+        """The handshake Listener does with an authkey, on this connection's thread"""
+        try:
+            deliver_challenge(connection, self.authkey)
+            answer_challenge(connection, self.authkey)
+            return True
+        except (AuthenticationError, EOFError, OSError) as e:
+            if self._running:
+                self.unauthenticated += 1
+                print(f"Rejected unauthenticated block channel client: {e}")
+            return False
+
+    def _read_loop(self, connection):
+        try:
+            if not self._authenticate(connection):
+                return
+            while self._running:
+                try:
+                    data = connection.recv_bytes(MAX_EVENT_BYTES)
+                except (EOFError, OSError, TypeError):
+                    break  # Publisher gone, or the connection was closed by stop()
+                try:
+                    event = json.loads(data.decode('utf-8'))
+                    if not isinstance(event, dict):
+                        raise ValueError("event is not an object")
+                except ValueError as e:
+                    self.rejected += 1
+                    print(f"Ignoring malformed block event: {e}")
+                    continue
+                self.received += 1
+                reply = None
+                try:
+                    reply = self.callback(event)
+                except Exception as e:
+                    print(f"Error handling block event: {e}")
+                if not isinstance(reply, dict):
+                    reply = {'seq': event.get('seq', 0)}
+                try:
+                    connection.send_bytes(_encode(reply))
+                except (OSError, TypeError, ValueError):
+                    break
+        finally:
+            with self._lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+
+class BlockChannelClient:
+    """Publishes block events, buffering them while the listener is unreachable
+
+    Events are sent by a background thread, so publishing never waits on the
+    listener, even one that has stopped answering.
+    """
+
+    RETRY_INTERVAL = 1.0  # seconds between connection attempts while the listener is down
+
+    def __init__(self, address: Optional[str] = None, backlog_size: int = BACKLOG_SIZE,
+                 authkey: Optional[bytes] = None):
+        self.address = address or default_address()
+        self.authkey = authkey or channel_authkey()
+        self.sender = uuid.uuid4().hex
+        self._backlog = deque(maxlen=backlog_size)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._seq = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def publish(self, event_type: str, **fields) -> Dict[str, Any]:
+        """Queue an event for the sender thread, which sends it once the listener can be reached"""
+        with self._lock:
+            self._seq += 1
+            event = dict(fields, type=event_type, sender=self.sender, seq=self._seq, timestamp=time.time())
+            if len(self._backlog) == self._backlog.maxlen:
+                self.dropped += 1
+            self._backlog.append(_encode(event))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._send_loop, name='block-channel-sender', daemon=True)
+                self._thread.start()
+            self._changed.notify_all()
+        return event
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait up to timeout for buffered events to be sent; returns True if none are left"""
+        with self._lock:
+            return bool(self._changed.wait_for(lambda: not self._backlog, timeout))
+
+    def _send_loop(self):
+        me = threading.current_thread()
+        connection = None
+        try:
+            while True:
+                with self._lock:
+                    self._changed.wait_for(lambda: self._backlog or self._thread is not me)
+                    if self._thread is not me:
+                        return
+                    data = self._backlog[0]
+                if connection is None:
+                    try:
+                        connection = _open(self.address, self.authkey, ACK_TIMEOUT)
+                    except (OSError, EOFError, AuthenticationError):
+                        with self._lock:
+                            self._changed.wait_for(lambda: self._thread is not me, self.RETRY_INTERVAL)
+                        continue
+                try:
+                    connection.send_bytes(data)
+                    if not connection.poll(ACK_TIMEOUT):
+                        raise OSError("no acknowledgement from the block channel")
+                    connection.recv_bytes(MAX_EVENT_BYTES)
+                except (OSError, EOFError):
+                    # The listener went away; reconnect and resend this event
+                    _close(connection)
+                    connection = None
+                    continue
+                with self._lock:
+                    # A full backlog may have dropped the event while it was being sent
+                    if self._backlog and self._backlog[0] is data:
+                        self._backlog.popleft()
+                    self.sent += 1
+                    self._changed.notify_all()
+        finally:
+            if connection is not None:
+                _close(connection)
+            with self._lock:
+                if self._thread is me:
+                    self._thread = None
+
+    def close(self):
+        """Stop the sender thread and close its connection; unsent events are kept"""
+        with self._lock:
+            self._thread = None
+            self._changed.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Events sent, waiting and dropped from a full backlog"""
+        with self._lock:
+            return {'sent': self.sent, 'waiting': len(self._backlog), 'dropped': self.dropped}
+
+
+class _Deadline:
+    """A connection whose reads give up once a deadline has passed"""
+
+    def __init__(self, connection, timeout: float):
+        self.connection = connection
+        self.deadline = time.monotonic() + timeout
+
+    def send_bytes(self, data: bytes):
+        self.connection.send_bytes(data)
+
+    def recv_bytes(self, maxlength: Optional[int] = None) -> bytes:
+        if not self.connection.poll(max(0.0, self.deadline - time.monotonic())):
+            raise TimeoutError("no answer from the channel listener")
+        return self.connection.recv_bytes(maxlength)
+
+
+def _dial(address: str, timeout: float):
+    """Client(address), giving up if the connect takes longer than timeout"""
+    if sys.platform == 'win32':
+        return Client(address)  # Waits for a free pipe instance for at most a second
+    with socket.socket(socket.AF_UNIX) as s:
+        s.settimeout(timeout)
+        s.connect(address)
+        s.settimeout(None)
+        return Connection(s.detach())
+
+
+def _open(address: str, authkey: bytes, timeout: float):
+    """Client(address, authkey=authkey), giving up if the connect or handshake takes longer than timeout"""
+    connection = _dial(address, timeout)
+    try:
+        timed = _Deadline(connection, timeout)
+        answer_challenge(timed, authkey)
+        deliver_challenge(timed, authkey)
+    except Exception:
+        _close(connection)
+        raise
+    return connection
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except OSError:
+        pass
+
+
+def send_request(address: str, request_type: str, timeout: float = ACK_TIMEOUT,
+                 authkey: Optional[bytes] = None, **fields) -> Optional[Dict[str, Any]]:
+    """Send one request and return the listener's reply, or None if nothing answers in time"""
+    try:
+        connection = _open(address, authkey or channel_authkey(), timeout)
+    except (OSError, EOFError, AuthenticationError):
+        return None
+    try:
+        connection.send_bytes(_encode(dict(fields, type=request_type, timestamp=time.time())))
+        if not connection.poll(timeout):
+            return None
+        reply = json.loads(connection.recv_bytes(MAX_EVENT_BYTES).decode('utf-8'))
+    except (OSError, EOFError, ValueError):
+        return None
+    finally:
+        _close(connection)
+    return reply if isinstance(reply, dict) else None
+
+
+def service_status(timeout: float = ACK_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """Status of the blocker service running for the current user, or None if there is none"""
+    return send_request(default_address(SERVICE_CHANNEL), 'status', timeout)
+
+
+def is_new_event(event: Dict[str, Any], last_seen: Dict[str, int]) -> bool:
+    """Check an event against the last sequence number seen from its sender, and record it"""
+    sender, seq = event.get('sender'), event.get('seq')
+    if sender is None or not isinstance(seq, int):
+        return True
+    if seq <= last_seen.get(sender, 0):
+        return False
+    last_seen[sender] = seq
+    return True
+
+
+class BlockListener:
+    """The one block channel listener of a GUI process, shared by the components that show blocks
+
+    The first subscriber starts the server and the last one to leave stops
+    it. Every new event reaches each subscriber once, on the channel's
+    reader thread.
+    """
+
+    def __init__(self, address: Optional[str] = None, authkey: Optional[bytes] = None):
+        self.address = address
+        self.authkey = authkey
+        self._server: Optional[BlockChannelServer] = None
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+        self._last_seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> bool:
+        """Pass block events to callback; returns False if the channel could not be served"""
+        with self._lock:
+            if callback in self._subscribers:
+                return True
+            if self._server is None:
+                server = BlockChannelServer(self._on_event, self.address, self.authkey)
+                try:
+                    server.start()
+                except OSError as e:
+                    print(f"Could not listen for block events: {e}")
+                    return False
+                self._server = server
+            self._subscribers.append(callback)
+            return True
+
+    def unsubscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        """Stop passing events to callback, and stop listening once no one is subscribed"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+            if self._subscribers or self._server is None:
+                return
+            server, self._server = self._server, None
+        server.stop()
+
+    def _on_event(self, event: Dict[str, Any]):
+        with self._lock:
+            if not is_new_event(event, self._last_seen):
+                return
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error handling block event: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Subscribers, and the server's received and rejected counts while it runs"""
+        with self._lock:
+            server = self._server
+            stats = {'subscribers': len(self._subscribers), 'listening': server is not None}
+        if server is not None:
+            stats.update(received=server.received, rejected=server.rejected,
+                         unauthenticated=server.unauthenticated)
+        return stats
+
+
+_block_listener: Optional[BlockListener] = None
+_block_listener_lock = threading.Lock()
+
+
+def get_block_listener() -> BlockListener:
+    """Get the block listener shared by this process's GUI components"""
+    global _block_listener
+    with _block_listener_lock:
+        if _block_listener is None:
+            _block_listener = BlockListener()
+        return _block_listener
+
+
+_block_channel_client: Optional[BlockChannelClient] = None
+_block_channel_client_lock = threading.Lock()
+
+
+def get_block_channel_client() -> BlockChannelClient:
+    """Get the publisher shared by all monitors in this process"""
+    global _block_channel_client
+    with _block_channel_client_lock:
+        if _block_channel_client is None:
+            _block_channel_client = BlockChannelClient()
+        return _block_channel_client
+
+
+def publish_block(url: str, reason: str, title: str = '', user_email: str = '') -> Dict[str, Any]:
+    """Tell the application that url was blocked"""
+    return get_block_channel_client().publish('block', url=url, reason=reason, title=title,
+                                              user_email=user_email)
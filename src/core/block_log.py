@@ -0,0 +1,219 @@
+"""
+Append-only log of block events, with hourly and daily rollups.
+
+Monitors used to record a block, if at all, by overwriting the
+``last_blocked_url`` setting from the monitor thread, which cost a
+synchronous write per block and kept no history. Every block is now
+appended to ``block_events`` instead, by a background writer: ``record``
+only queues the event, and the writer stores what is queued once
+``batch_size`` events are waiting or the oldest has waited
+``flush_interval`` seconds, in one transaction per batch.
+
+In the same transaction the batch is counted per user, stage and hour or
+day and added to ``block_stats_hourly`` and ``block_stats_daily`` with
+UPSERTs, so dashboards and partner reports read a few precomputed rows
+instead of scanning raw events.
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .domain_index import normalize_domain
+from ..utils.db_connection import get_connection
+from ..utils.migrations import migrate
+
+FLUSH_INTERVAL = 0.25  # seconds an event may wait before it is written
+FLUSH_BATCH = 200  # events that are written at once, without waiting
+
+
+class BlockEvent(NamedTuple):
+    """One block, as stored in block_events"""
+    user_email: str
+    occurred_at: float  # Unix time
+    url: str
+    domain: str
+    reason: str
+    stage: str
+    source: str
+
+
+def _hour(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d %H:00', time.localtime(timestamp))
+
+
+def _day(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
+
+
+class BlockEventLog:
+    """Writes block events of one database in batches, on a thread of its own"""
+
+    def __init__(self, database_path: str, flush_interval: float = FLUSH_INTERVAL,
+                 batch_size: int = FLUSH_BATCH):
+        self.database_path = database_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # BlockEvent to write, or an Event to set once everything queued before it is written
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    def record(self, user_email: str, url: Optional[str], reason: str, stage: str = '', source: str = ''):
+        """Queue a block event; never waits for the database"""
+        event = BlockEvent(user_email, time.time(), url or '', normalize_domain(url or ''),
+                           reason or '', stage or '', source)
+        self._start()
+        self._queue.put(event)
+        with self._lock:
+            self.recorded += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='block-event-log', daemon=True)
+                self._thread.start()
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until the events recorded so far are written; returns False on timeout"""
+        with self._lock:
+            if self._thread is None:
+                return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _run(self):
+        # Databases created before the log existed get its tables here
+        migrate(self.database_path)
+        while True:
+            item = self._queue.get()
+            batch: List[BlockEvent] = []
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    # Write now rather than make flush() wait out the interval
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch: List[BlockEvent]):
+        """Append a batch and add it to the rollups, in one transaction"""
+        hourly: Counter = Counter()
+        daily: Counter = Counter()
+        for event in batch:
+            hourly[(event.user_email, _hour(event.occurred_at), event.stage)] += 1
+            daily[(event.user_email, _day(event.occurred_at), event.stage)] += 1
+        try:
+            with get_connection(self.database_path) as conn:
+                conn.executemany('''
+                    INSERT INTO block_events (user_email, occurred_at, url, domain, reason, stage, source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', batch)
+                conn.executemany('''
+                    INSERT INTO block_stats_hourly (user_email, hour, stage, blocks) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user_email, hour, stage) DO UPDATE SET blocks = blocks + excluded.blocks
+                ''', [key + (count,) for key, count in hourly.items()])
+                conn.executemany('''
+                    INSERT INTO block_stats_daily (user_email, day, stage, blocks) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user_email, day, stage) DO UPDATE SET blocks = blocks + excluded.blocks
+                ''', [key + (count,) for key, count in daily.items()])
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+        except sqlite3.Error as e:
+            with self._lock:
+                self.errors += len(batch)
+            print(f"Error writing block events: {e}")
+
+    def hourly_counts(self, user_email: str, since: float) -> List[Tuple[str, str, int]]:
+        """(hour, stage, blocks) rows from the hour containing since onwards"""
+        return self._query('''
+            SELECT hour, stage, blocks FROM block_stats_hourly
+            WHERE user_email = ? AND hour >= ? ORDER BY hour
+        ''', (user_email, _hour(since)))
+
+    def daily_counts(self, user_email: str, days: int = 7) -> List[Tuple[str, str, int]]:
+        """(day, stage, blocks) rows of the last days days, today included"""
+        return self._query('''
+            SELECT day, stage, blocks FROM block_stats_daily
+            WHERE user_email = ? AND day >= ? ORDER BY day
+        ''', (user_email, _day(time.time() - (days - 1) * 86400)))
+
+    def recent(self, user_email: str, limit: int = 50) -> List[BlockEvent]:
+        """The user's latest block events, newest first"""
+        rows = self._query('''
+            SELECT user_email, occurred_at, url, domain, reason, stage, source FROM block_events
+            WHERE user_email = ? ORDER BY occurred_at DESC LIMIT ?
+        ''', (user_email, limit))
+        return [BlockEvent(*row) for row in rows]
+
+    def last_blocked_url(self, user_email: str) -> Optional[str]:
+        """URL of the user's latest block that had one"""
+        rows = self._query('''
+            SELECT url FROM block_events
+            WHERE user_email = ? AND url != '' ORDER BY occurred_at DESC LIMIT 1
+        ''', (user_email,))
+        return rows[0][0] if rows else None
+
+    def _query(self, sql: str, params: tuple) -> list:
+        try:
+            with get_connection(self.database_path) as conn:
+                return conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error reading block events: {e}")
+            return []
+
+    def stats(self) -> Dict[str, int]:
+        """Events recorded, written, waiting and lost to errors, and batches written"""
+        with self._lock:
+            return {
+                'recorded': self.recorded,
+                'written': self.written,
+                'waiting': self._queue.qsize(),
+                'batches': self.batches,
+                'errors': self.errors
+            }
+
+
+_block_logs: Dict[str, BlockEventLog] = {}
+_block_logs_lock = threading.Lock()
+
+
+def get_block_log(database_path: str) -> BlockEventLog:
+    """Get the block event log shared by all monitors writing to database_path"""
+    path = os.path.abspath(database_path)
+    with _block_logs_lock:
+        log = _block_logs.get(path)
+        if log is None:
+            log = _block_logs[path] = BlockEventLog(path)
+        return log
+
+
+@atexit.register
+def _flush_block_logs():
+    """Write queued events before the interpreter exits; the writer threads are daemons"""
+    with _block_logs_lock:
+        logs = list(_block_logs.values())
+    for log in logs:
+        log.flush(timeout=1.0)
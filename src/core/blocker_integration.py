@@ -6,19 +6,20 @@ This file should be imported and integrated with your main_window.py
 
 import os
 import sys
-import json
-import tempfile
 import threading
-from typing import Optional
-from PyQt5.QtCore import QTimer, pyqtSignal, QObject
+from typing import Dict, Optional
+from PyQt5.QtCore import pyqtSignal, QObject
 from PyQt5.QtWidgets import QMessageBox
 
 # Add the path to import our blocker modules
 current_dir = os.path.dirname(__file__)
 sys.path.append(current_dir)
 
+from src.core.block_channel import get_block_listener
+from src.core.throttle import block_event_key, get_throttle
+
 try:
-    from adult_content_blocker import AdultContentBlocker, BlockScreen
+    from adult_content_blocker import AdultContentBlocker
     from browser_integration import ContentBlockerService
 except ImportError as e:
     print(f"Warning: Could not import blocker modules: {e}")
@@ -46,8 +47,8 @@ class BlockerIntegration(QObject):
         self.main_window = main_window
         self.adult_content_blocker = None
         self.content_blocking_service = None
-        self.signal_monitor_timer = None
-        self.current_block_screen = None
+        self.listening = False
+        self.signal_throttle = get_throttle('block_signals')
         
         # Connect signals
         self.content_blocked.connect(self.show_block_screen)
@@ -70,7 +71,7 @@ class BlockerIntegration(QObject):
                 self.main_window.user_email
             )
             
-            # Setup signal file monitoring
+            # Listen for block events from the monitors
             self.setup_signal_monitoring()
             
             # Check if adult content blocking is enabled and start if needed
@@ -252,73 +253,35 @@ class BlockerIntegration(QObject):
             print(f"Error stopping blocking: {e}")
     
     def setup_signal_monitoring(self):
-        """Setup monitoring for block signals from other processes"""
+        """Listen for block events pushed by the monitors, in this or other processes"""
         try:
-            # Create a timer to check for block signals
-            self.signal_monitor_timer = QTimer()
-            self.signal_monitor_timer.timeout.connect(self.check_for_block_signals)
-            self.signal_monitor_timer.start(1000)  # Check every second
+            self.listening = get_block_listener().subscribe(self.on_block_event)
             
         except Exception as e:
             print(f"Error setting up signal monitoring: {e}")
     
-    def check_for_block_signals(self):
-        """Check for block signals from the monitoring service"""
-        try:
-            signal_file = os.path.join(tempfile.gettempdir(), 'blockerhero_signal.json')
-            
-            if os.path.exists(signal_file):
-                try:
-                    with open(signal_file, 'r') as f:
-                        signal_data = json.load(f)
-                    
-                    # Check if this is a new signal
-                    if self.is_new_signal(signal_data):
-                        self.content_blocked.emit(
-                            signal_data.get('url', ''),
-                            signal_data.get('reason', ''),
-                            signal_data.get('title', '')
-                        )
-                    
-                    # Clean up the signal file
-                    os.remove(signal_file)
-                    
-                except (json.JSONDecodeError, KeyError) as e:
-                    print(f"Error processing signal file: {e}")
-                    # Remove corrupted signal file
-                    try:
-                        os.remove(signal_file)
-                    except:
-                        pass
-                        
-        except Exception as e:
-            # Don't print errors for normal file operations
-            pass
+    def on_block_event(self, event: Dict):
+        """Handle a block event; runs on the channel's reader thread"""
+        if event.get('type') == 'block' and self.is_new_signal(event):
+            # Queued to the GUI thread, since this object lives there
+            self.content_blocked.emit(
+                event.get('url', ''),
+                event.get('reason', ''),
+                event.get('title', '')
+            )
     
     def is_new_signal(self, signal_data: dict) -> bool:
-        """Check if this is a new block signal"""
-        # Simple implementation - in practice, you might want to track processed signals
-        return signal_data.get('timestamp', 0) > 0
+        """Check if this is a new block signal, rather than a repeat of a recent block"""
+        key = block_event_key(signal_data.get('url'), signal_data.get('reason', ''), signal_data.get('title', ''))
+        return self.signal_throttle.allow(key)
     
     def show_block_screen(self, url: str, reason: str, detected_content: str):
         """Show the block screen"""
         try:
-            # Close any existing block screen
-            if self.current_block_screen:
-                self.current_block_screen.close()
-                self.current_block_screen = None
-            
-            # Create block screen with user email for customization loading
-            self.current_block_screen = BlockScreen(self.main_window.user_email)
-            
-            # Set the block reason
-            if hasattr(self.current_block_screen, 'blkRsn_lbl'):
-                self.current_block_screen.blkRsn_lbl.setText(f"Blocked: {reason}")
-            
-            # Show the block screen
-            self.current_block_screen.exec_()
-            self.current_block_screen = None
+            from src.ui.block_dispatcher import get_block_dispatcher
             
+            # Queued to the GUI thread; a screen that is already showing absorbs the event
+            get_block_dispatcher().dispatch(url, reason, self.main_window.user_email, detected_content)
             print(f"Blocked content: {url} - {reason}")
             
         except Exception as e:
@@ -415,14 +378,14 @@ class BlockerIntegration(QObject):
             # Stop all monitoring
             self.stop_blocking()
             
-            # Stop signal monitoring
-            if self.signal_monitor_timer:
-                self.signal_monitor_timer.stop()
+            # Stop listening for block events
+            if self.listening:
+                get_block_listener().unsubscribe(self.on_block_event)
+                self.listening = False
             
             # Close any open block screen
-            if self.current_block_screen:
-                self.current_block_screen.close()
-                self.current_block_screen = None
+            from src.ui.block_dispatcher import get_block_dispatcher
+            get_block_dispatcher().close_screen()
             
             print("Blocker integration cleaned up")
             
@@ -0,0 +1,254 @@
+"""
+Headless blocking service.
+
+Runs the window monitors, the detection pipeline, the network filters and
+the block event log in a process of its own that never imports PyQt5. Once
+the service is running, protection no longer depends on the GUI: it starts
+before the main window is shown, keeps going if the GUI stalls or crashes,
+and works on machines without a display.
+
+Blocks are published on the block channel, where the GUI listens and only
+shows the block screen. The service takes control requests on a channel of
+its own (``status``, ``reload`` and ``stop``); the GUI asks for the status
+to find out whether a service is enforcing its user. Like the block
+channel, the control channel only hears clients holding the user's channel
+secret, so no other local user can stop the service. Writes made by the
+GUI or any other process reach the service's caches through its data
+version watcher within a tick; ``reload`` forces a refresh. Run it in the
+user's session, where the browser windows are:
+
+    python -m src.core.blocker_service --db app_blocker.db [--email user] [--dns]
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from .block_channel import (
+    SERVICE_CHANNEL, BlockChannelServer, default_address, get_block_channel_client, publish_block,
+    send_request
+)
+from .block_log import get_block_log
+from .browser_integration import BrowserContentMonitor, DNSFilter, extract_url_from_title
+from .content_analyzer import ContentAnalyzer
+from .detection_pipeline import DetectionPipeline, Verdict
+from .domain_index import get_adult_domain_index, normalize_domain
+from .fetch_engine import get_fetch_engine
+from .keyword_matcher import KeywordMatcher, build_keyword_matcher
+from .monitor_scheduler import WindowSnapshot, get_monitor_scheduler
+from .policy import get_policy
+from .throttle import block_event_key, get_throttle, throttle_stats
+from .url_patterns import url_block_reason
+from ..utils.data_version import get_data_version_watcher
+from ..utils.database import Database, add_change_listener, notify_change, remove_change_listener
+from ..utils.db_connection import connection_stats
+
+BROWSER_PROCESS_NAMES = ('chrome', 'firefox', 'msedge', 'opera', 'brave')
+
+
+class BlockerService:
+    """Detects and blocks adult content in browser windows, without a GUI"""
+
+    TRIGGER_COOLDOWN = 10  # seconds between blocks of the same window
+
+    def __init__(self, database_path: str, user_email: str, use_dns_filter: bool = False,
+                 control_address: Optional[str] = None, control_authkey: Optional[bytes] = None):
+        self.database_path = database_path
+        self.user_email = user_email
+        self.is_running = False
+        # A blocked window is published at most once per cooldown and skips the pipeline meanwhile
+        self.throttle = get_throttle('service_blocks', suppress_for=self.TRIGGER_COOLDOWN)
+        self.website_filter = BrowserContentMonitor(database_path, user_email)
+        self.page_analyzer = ContentAnalyzer(database_path, user_email)
+        self.dns_filter = DNSFilter(database_path, user_email) if use_dns_filter else None
+        self.block_log = get_block_log(database_path)
+        self.control = BlockChannelServer(self._on_control_request,
+                                          control_address or default_address(SERVICE_CHANNEL),
+                                          authkey=control_authkey)
+        self.pipeline = DetectionPipeline(
+            'service',
+            title_rule=self._match_title,
+            domain_rule=self._match_domain,
+            url_rule=lambda url: url_block_reason(url, self._keyword_matcher()),
+            page_scan=self.page_analyzer.page_scan,
+            flight_tag=(os.path.abspath(database_path), user_email)
+        )
+        self.detector_name = f"blocker_service:{id(self)}"
+        self._keywords: Optional[FrozenSet[str]] = None
+        self._matcher: Optional[KeywordMatcher] = None
+        self._stopped = threading.Event()
+        self.started_at = 0.0
+        self.blocks = 0
+
+    def start(self) -> bool:
+        """Start monitoring; returns False if a service is already running for this user"""
+        if send_request(self.control.address, 'status', authkey=self.control.authkey) is not None:
+            print(f"Blocker service already running at {self.control.address}")
+            return False
+        try:
+            self.control.start()
+        except OSError as e:
+            print(f"Blocker service already running: {e}")
+            return False
+
+        self.is_running = True
+        self.started_at = time.time()
+        self._stopped.clear()
+        self.website_filter.reload_blocked_websites()
+        add_change_listener(self._on_database_change)
+        get_data_version_watcher(self.database_path).start()
+        if self.dns_filter is not None:
+            self.dns_filter.setup_dns_filtering()
+        get_monitor_scheduler().register(self.detector_name, self._check_snapshot)
+        print(f"Blocker service started for {self.user_email}")
+        return True
+
+    def stop(self):
+        """Stop monitoring and flush pending writes and block events"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        get_monitor_scheduler().unregister(self.detector_name)
+        remove_change_listener(self._on_database_change)
+        get_data_version_watcher(self.database_path).stop()
+        if self.dns_filter is not None:
+            self.dns_filter.remove_dns_filtering()
+        self.block_log.flush()
+        get_block_channel_client().flush()
+        self.control.stop()
+        self._stopped.set()
+        print("Blocker service stopped")
+
+    def run(self) -> bool:
+        """Start, then block until a stop request or SIGINT/SIGTERM"""
+        if not self.start():
+            return False
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: self._stopped.set())
+        try:
+            # Wake up regularly so signals are handled on every platform
+            while not self._stopped.wait(1.0):
+                pass
+        finally:
+            self.stop()
+        return True
+
+    def _on_database_change(self, db_path: str, user_email: Optional[str], table: Optional[str]):
+        """Reload the blocked websites when they may have changed"""
+        if table not in (None, 'blocked_items') or user_email not in (None, self.user_email):
+            return
+        if os.path.abspath(db_path) == os.path.abspath(self.database_path):
+            self.website_filter.reload_blocked_websites()
+
+    def _on_control_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a request from the control channel"""
+        request_type = request.get('type')
+        if request_type == 'status':
+            return dict(self.status(), ok=True)
+        if request_type == 'reload':
+            # Refresh now rather than at the watcher's next tick
+            notify_change(self.database_path, request.get('user_email'), request.get('table'))
+            return {'ok': True}
+        if request_type == 'stop':
+            self._stopped.set()
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown request: {request_type}"}
+
+    def is_adult_blocking_enabled(self) -> bool:
+        """Check if adult content blocking is enabled"""
+        try:
+            return bool(get_policy(self.database_path, self.user_email).get_setting('checkBox', True))
+        except Exception as e:
+            print(f"Error checking setting: {e}")
+            return True
+
+    def _check_snapshot(self, snapshot: WindowSnapshot):
+        """Run the browser windows due in one scheduler snapshot through the pipeline"""
+        if not self.is_adult_blocking_enabled():
+            return
+        for window in snapshot.windows_of(BROWSER_PROCESS_NAMES):
+            title = window.title
+            url = extract_url_from_title(title)
+            if self.throttle.suppressed(block_event_key(url, window=title)):
+                continue
+            # Only the foreground page is fetched; other windows get the inline checks and cached verdicts
+            verdict = self.pipeline.run(title, url, fetch=window.hwnd == snapshot.foreground_hwnd)
+            if verdict.pending is not None:
+                verdict.pending.add_done_callback(
+                    lambda future, url=url, title=title: self._on_verdict(url, title, future.result())
+                )
+            else:
+                self._on_verdict(url, title, verdict)
+
+    def _on_verdict(self, url: Optional[str], title: str, verdict: Verdict):
+        """Record and publish a block, at most once per window per cooldown"""
+        if not verdict.blocked or not self.is_running:
+            return
+        if not self.throttle.allow(block_event_key(url, window=title)):
+            return
+        self.blocks += 1
+        print(f"Blocking {url or title} ({verdict.stage}): {verdict.reason}")
+        self.block_log.record(self.user_email, url, verdict.reason, verdict.stage, 'service')
+        publish_block(url or '', verdict.reason, title, self.user_email)
+
+    def _keyword_matcher(self) -> KeywordMatcher:
+        """The built-in adult keywords plus the user's, recompiled when the policy changes"""
+        keywords = get_policy(self.database_path, self.user_email).keywords
+        if keywords is not self._keywords:
+            self._matcher = build_keyword_matcher(keywords)
+            self._keywords = keywords
+        return self._matcher
+
+    def _match_title(self, title: str) -> Optional[Tuple[str, str]]:
+        """Title rule of the detection pipeline"""
+        keyword = self._keyword_matcher().search(title.lower())
+        return (f"Blocked keyword found in title: {keyword}", keyword) if keyword else None
+
+    def _match_domain(self, url: str) -> Optional[Tuple[str, str]]:
+        """Domain rule of the detection pipeline: the user's blocked websites, then adult domains"""
+        blocked, reason = self.website_filter.should_block_url(url)
+        if blocked:
+            return reason, url
+        domain = get_adult_domain_index().match(normalize_domain(url))
+        return (f'Blocked domain: {domain}', domain) if domain else None
+
+    def status(self) -> Dict[str, Any]:
+        """Who is being protected, blocks so far and the monitors' counters"""
+        return {
+            'pid': os.getpid(),
+            'user_email': self.user_email,
+            'database_path': os.path.abspath(self.database_path),
+            'uptime': time.time() - self.started_at if self.is_running else 0.0,
+            'blocks': self.blocks,
+            'dns_filter': self.dns_filter is not None,
+            'block_log': self.block_log.stats(),
+            'data_version': get_data_version_watcher(self.database_path).stats(),
+            'database_connections': connection_stats(),
+            'block_channel': get_block_channel_client().stats(),
+            'pipeline': self.pipeline.stats(),
+            'throttles': throttle_stats(),
+            'scheduler': get_monitor_scheduler().stats(),
+            'fetch_engine': get_fetch_engine().stats()
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run content blocking without the GUI")
+    parser.add_argument('--db', default='app_blocker.db', help="Path of the application database")
+    parser.add_argument('--email', help="User whose settings to enforce (default: the verified user)")
+    parser.add_argument('--dns', action='store_true', help="Also block adult domains in the hosts file")
+    args = parser.parse_args(argv)
+
+    user_email = args.email or Database(args.db).get_verified_user()
+    if not user_email:
+        print("No verified user yet; sign in with the application first")
+        return 2
+    return 0 if BlockerService(args.db, user_email, use_dns_filter=args.dns).run() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
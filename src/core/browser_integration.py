@@ -1,18 +1,51 @@
 import json
 import os
 import subprocess
-import tempfile
 import threading
 import time
-from typing import Dict, List, Optional, Tuple
-import sqlite3
+from typing import List, Optional, Tuple
 from pathlib import Path
-from urllib.parse import urlparse
 
 import re
-import requests
-import win32gui
-from PyQt5.QtWidgets import QApplication
+
+from .block_channel import publish_block
+from .block_log import get_block_log
+from .detection_pipeline import DetectionPipeline, Verdict
+from .domain_index import DomainIndex, get_adult_domain_index, normalize_domain
+from .html_scanner import LINK_HREF, HtmlScanner
+from .policy import get_policy
+from .polling_governor import get_polling_governor
+from .monitor_scheduler import WindowInfo, WindowSnapshot, get_monitor_scheduler
+from .throttle import block_event_key, get_throttle
+from ..utils.data_version import get_data_version_watcher
+from ..utils.database import add_change_listener, remove_change_listener
+from ..utils.db_connection import get_connection
+
+# Common patterns for URLs in browser titles
+_TITLE_URL_PATTERNS = [
+    re.compile(r'https?://[^\s\-]+'),  # Direct URL
+    re.compile(r'(?:- )?((?:www\.)?[a-zA-Z0-9\-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?)'),  # Domain after dash
+]
+
+
+def extract_url_from_title(title: str) -> Optional[str]:
+    """Extract URL from browser window title"""
+    title_lower = title.lower()
+    
+    # Skip if it's just a browser name or common non-URL title
+    if any(skip_term in title_lower for skip_term in 
+           ['google chrome', 'mozilla firefox', 'microsoft edge', 'new tab', 'blank page']):
+        return None
+    
+    for pattern in _TITLE_URL_PATTERNS:
+        match = pattern.search(title)
+        if match:
+            url = match.group(0)
+            if not url.startswith('http'):
+                url = 'https://' + url
+            return url
+    
+    return None
 
 
 class BrowserExtensionCommunicator:
@@ -104,42 +137,54 @@ class BrowserContentMonitor:
         self.user_email = user_email
         self.is_monitoring = False
         self.blocked_websites = []
+        self.blocked_domain_index = DomainIndex()
+        self.blocked_domain_terms = []  # Entries without a TLD, matched inside host names
         self.reload_blocked_websites()
         
     def reload_blocked_websites(self):
         """Reload blocked websites from database"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
+            with get_connection(self.database_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT item FROM blocked_items 
                     WHERE email = ? AND type = 'block' AND item_type = 'website'
                 ''', (self.user_email,))
-                self.blocked_websites = [row[0] for row in cursor.fetchall()]
+                blocked_websites = [row[0] for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error loading blocked websites: {e}")
-            self.blocked_websites = []
+            blocked_websites = []
+        
+        # Only rebuild the index when the list actually changed
+        if blocked_websites != self.blocked_websites:
+            self.blocked_websites = blocked_websites
+            self.blocked_domain_index = DomainIndex(blocked_websites)
+            self.blocked_domain_terms = [
+                site for site in (normalize_domain(site) for site in blocked_websites)
+                if site and '.' not in site
+            ]
             
-    def should_block_url(self, url: str) -> Tuple[bool, str]:
-        """Check if URL should be blocked"""
+    def should_block_url(self, url: str, reload: bool = False) -> Tuple[bool, str]:
+        """Check if URL should be blocked
+
+        The list is kept current by the owner's change listener, fed by the
+        data version watcher; pass reload=True to read it again first.
+        """
         try:
-            # Reload blocked websites to get latest
-            self.reload_blocked_websites()
+            if reload:
+                self.reload_blocked_websites()
             
-            # Parse the URL
-            parsed = urlparse(url.lower())
-            domain = parsed.netloc
-            if domain.startswith('www.'):
-                domain = domain[4:]
+            domain = normalize_domain(url)
                 
-            # Check against blocked websites
-            for blocked_site in self.blocked_websites:
-                blocked_domain = blocked_site.lower()
-                if blocked_domain.startswith('www.'):
-                    blocked_domain = blocked_domain[4:]
-                    
-                if blocked_domain in domain:
-                    return True, f"Website {blocked_site} is blocked"
+            # Check the host and its parent domains against blocked websites
+            blocked_site = self.blocked_domain_index.match(domain)
+            if blocked_site:
+                return True, f"Website {blocked_site} is blocked"
+            
+            # Entries without a TLD (e.g. "facebook") still match inside the host
+            for blocked_term in self.blocked_domain_terms:
+                if blocked_term in domain:
+                    return True, f"Website {blocked_term} is blocked"
                     
             return False, ""
             
@@ -208,25 +253,14 @@ class BrowserContentMonitor:
     def is_adult_blocking_enabled(self) -> bool:
         """Check if adult content blocking is enabled"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                # First check the main adult content blocking setting
-                cursor.execute("""
-                    SELECT setting_value FROM user_settings 
-                    WHERE user_email = ? AND setting_name = 'adult_content_blocking'
-                """, (self.user_email,))
-                result = cursor.fetchone()
-                main_setting = result[0].lower() == 'true' if result else True
+            policy = get_policy(self.database_path, self.user_email)
+            # First check the main adult content blocking setting
+            main_setting = str(policy.get_setting('adult_content_blocking', True)).lower() == 'true'
 
-                # Then check auto-block setting
-                cursor.execute("""
-                    SELECT setting_value FROM user_settings 
-                    WHERE user_email = ? AND setting_name = 'auto_block_adult'
-                """, (self.user_email,))
-                result = cursor.fetchone()
-                auto_block = result[0].lower() == 'true' if result else True
+            # Then check auto-block setting
+            auto_block = str(policy.get_setting('auto_block_adult', True)).lower() == 'true'
 
-                return main_setting and auto_block
+            return main_setting and auto_block
         except Exception as e:
             print(f"Error checking adult blocking settings: {e}")
             return True  # Default to enabled for safety
@@ -329,11 +363,29 @@ class DNSFilter:
 class RegistryBrowserMonitor:
     """Monitor browser URLs using Windows registry and process monitoring"""
     
+    TRIGGER_COOLDOWN = 10  # seconds between block triggers for the same window
+    
     def __init__(self, database_path: str, user_email: str):
+        from .adult_content_blocker import ContentAnalyzer
+        from .content_analyzer import ContentAnalyzer as PageAnalyzer
+        
         self.database_path = database_path
         self.user_email = user_email
         self.is_monitoring = False
-        self.last_check_time = {}
+        # Blocked windows are re-triggered at most once per cooldown and skip the pipeline meanwhile
+        self.throttle = get_throttle('registry_blocks', suppress_for=self.TRIGGER_COOLDOWN)
+        self.url_analyzer = ContentAnalyzer()
+        self.page_analyzer = PageAnalyzer(database_path, user_email)
+        self.website_filter = BrowserContentMonitor(database_path, user_email)
+        self.pipeline = DetectionPipeline(
+            'registry',
+            title_rule=self._match_title,
+            domain_rule=self._match_domain,
+            url_rule=self.url_analyzer.url_block_reason,
+            page_scan=self.page_analyzer.page_scan,
+            flight_tag=(os.path.abspath(database_path), user_email)
+        )
+        self.detector_name = f"registry_browser_monitor:{id(self)}"
         
     def start_monitoring(self):
         """Start monitoring browser activity"""
@@ -343,8 +395,10 @@ class RegistryBrowserMonitor:
             import psutil
             
             self.is_monitoring = True
-            monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            monitor_thread.start()
+            self.website_filter.reload_blocked_websites()
+            add_change_listener(self._on_database_change)
+            get_data_version_watcher(self.database_path).start()
+            get_monitor_scheduler().register(self.detector_name, self._check_snapshot)
             print("Registry browser monitoring started")
             return True
         except ImportError as e:
@@ -358,184 +412,109 @@ class RegistryBrowserMonitor:
     def stop_monitoring(self):
         """Stop monitoring"""
         self.is_monitoring = False
+        get_monitor_scheduler().unregister(self.detector_name)
+        remove_change_listener(self._on_database_change)
         print("Registry browser monitoring stopped")
     
-    def _monitor_loop(self):
-        """Main monitoring loop"""
-        while self.is_monitoring:
-            try:
-                if self.is_adult_blocking_enabled():
-                    self._check_browser_activity()
-                time.sleep(2)  # Check every 2 seconds
-            except Exception as e:
-                print(f"Error in monitor loop: {e}")
-                time.sleep(5)
+    def _on_database_change(self, db_path: str, user_email: Optional[str], table: Optional[str]):
+        """Reload the blocked websites when they may have changed"""
+        if table not in (None, 'blocked_items') or user_email not in (None, self.user_email):
+            return
+        if os.path.abspath(db_path) == os.path.abspath(self.database_path):
+            self.website_filter.reload_blocked_websites()
     
-    def _check_browser_activity(self):
+    def _check_snapshot(self, snapshot: WindowSnapshot):
+        """Check the windows due in one scheduler snapshot"""
+        if self.is_adult_blocking_enabled():
+            self._check_browser_activity(snapshot)
+    
+    def _check_browser_activity(self, snapshot: WindowSnapshot):
         """Check current browser activity"""
         try:
-            import psutil
-            from win32gui import GetWindowText, GetForegroundWindow
-            
-            # Get current active window title
-            active_window_title = GetWindowText(GetForegroundWindow())
-            
-            # Check if it's a browser window and extract URL
-            url = self._extract_url_from_title(active_window_title)
-            if url:
-                # First check if the domain is blocked
-                blocked, reason = self.should_block_url(url)
-                if blocked:
-                    print(f"Blocking access to {url}: {reason}")
-                    self.trigger_block_screen(url, reason)
-                    return
-                
-                # Then check content for adult material
-                from ..core.content_analyzer import ContentAnalyzer
-                analyzer = ContentAnalyzer(self.database_path, self.user_email)
-                result = analyzer.analyze_webpage(url)
-                
-                if result.get('is_blocked', False):
-                    print(f"Adult content detected at: {url}")
-                    reason = result.get('reason', 'Adult content detected')
-                    print(f"Attempting to trigger block screen for URL: {url}")
-                    # Set the block reason in the database
-                    with sqlite3.connect(self.database_path) as conn:
-                        cursor = conn.cursor()
-                        cursor.execute("""
-                            UPDATE user_settings 
-                            SET setting_value = ? 
-                            WHERE user_email = ? AND setting_name = 'last_blocked_url'
-                        """, (url, self.user_email))
-                        conn.commit()
-                    # Show block screen
-                    self._show_block_screen_direct(url, reason)
-                    print("Block screen trigger completed")
-            
-            # Get all browser processes
-            browser_processes = []
-            for proc in psutil.process_iter(['pid', 'name']):
-                try:
-                    if any(browser in proc.info['name'].lower() 
-                          for browser in ['chrome', 'firefox', 'edge', 'opera']):
-                        browser_processes.append(proc)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            # Check each browser process
-            for proc in browser_processes:
-                self._check_browser_process(proc)
+            # The active window goes through every stage, fetching its page in
+            # the background if the cheaper checks do not decide
+            title = snapshot.foreground_title
+            url = self._extract_url_from_title(title)
+            if url and not self.throttle.suppressed(block_event_key(url, window=title)):
+                verdict = self.pipeline.run(title, url)
+                if verdict.pending is not None:
+                    verdict.pending.add_done_callback(
+                        lambda future: self._on_page_verdict(url, title, future.result())
+                    )
+                else:
+                    self._on_page_verdict(url, title, verdict)
+            
+            # Check the other windows of all browser processes
+            self._check_browser_windows([
+                window for window in snapshot.windows_of(['chrome', 'firefox', 'edge', 'opera'])
+                if window.hwnd != snapshot.foreground_hwnd
+            ])
                 
         except Exception as e:
             print(f"Error checking browser activity: {e}")
     
-    def _check_browser_process(self, process):
-        """Check a specific browser process"""
-        import win32gui
-        import win32process
+    def _on_page_verdict(self, url: str, title: str, verdict: Verdict):
+        """Block a page whose verdict says so, at most once per cooldown"""
+        if not verdict.blocked or not self.is_monitoring:
+            return
+        # Re-trigger a blocked window at most once per cooldown
+        if not self.throttle.allow(block_event_key(url, window=title)):
+            return
+        print(f"Blocking access to {url} ({verdict.stage}): {verdict.reason}")
+        get_block_log(self.database_path).record(self.user_email, url, verdict.reason, verdict.stage,
+                                                 'registry_monitor')
+        if verdict.stage in ('verdict_cache', 'html_scan'):
+            self._block_adult_page(url, verdict.reason)
+        else:
+            self._trigger_block_screen(url, verdict.reason, title)
+    
+    def _block_adult_page(self, url: str, reason: str):
+        """Show the block screen for an adult page"""
+        print(f"Adult content detected at: {url}")
+        print(f"Attempting to trigger block screen for URL: {url}")
+        # Show block screen
+        self._show_block_screen_direct(url, reason)
+        print("Block screen trigger completed")
+    
+    def _check_browser_windows(self, windows: List[WindowInfo]):
+        """Check the windows of the browser processes"""
         try:
-            # Get process windows
-            def enum_windows_callback(hwnd, windows):
-                if win32gui.IsWindowVisible(hwnd):
-                    try:
-                        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                        if pid == process.pid:
-                            title = win32gui.GetWindowText(hwnd)
-                            if title and len(title) > 10:  # Filter out empty/short titles
-                                windows.append(title)
-                    except:
-                        pass
-            
-            windows = []
-            win32gui.EnumWindows(enum_windows_callback, windows)
-            
-            # Analyze window titles for URLs
-            for title in windows:
-                url = self._extract_url_from_title(title)
-                if url:
-                    self._analyze_url(url, title)
+            # Analyze window titles for URLs; background pages are not fetched
+            for window in windows:
+                if len(window.title) <= 10:  # Filter out short titles
+                    continue
+                url = self._extract_url_from_title(window.title)
+                if url and not self.throttle.suppressed(block_event_key(url, window=window.title)):
+                    self._on_page_verdict(url, window.title, self.pipeline.run(window.title, url, fetch=False))
                     
         except Exception as e:
-            print(f"Error checking browser process: {e}")
+            print(f"Error checking browser windows: {e}")
     
-    def _extract_url_from_title(self, title: str) -> Optional[str]:
-        """Extract URL from browser window title"""
-        import re
-        
-        # Common patterns for URLs in browser titles
-        patterns = [
-            r'https?://[^\s\-]+',  # Direct URL
-            r'(?:- )?((?:www\.)?[a-zA-Z0-9\-]+\.[a-zA-Z]{2,}(?:/[^\s]*)?)',  # Domain after dash
-        ]
-        
-        title_lower = title.lower()
-        
-        # Skip if it's just a browser name or common non-URL title
-        if any(skip_term in title_lower for skip_term in 
-               ['google chrome', 'mozilla firefox', 'microsoft edge', 'new tab', 'blank page']):
-            return None
-        
-        for pattern in patterns:
-            match = re.search(pattern, title)
-            if match:
-                url = match.group(0)
-                if not url.startswith('http'):
-                    url = 'https://' + url
-                return url
-        
+    def _match_title(self, title: str) -> Optional[Tuple[str, str]]:
+        """Title rule of the detection pipeline"""
+        keywords = self.url_analyzer._find_adult_keywords(title.lower())
+        if keywords:
+            return f"Adult keywords in page title: {', '.join(keywords[:3])}", ', '.join(keywords)
         return None
     
-    def _analyze_url(self, url: str, title: str):
-        """Analyze URL for adult content"""
-        try:
-            # Skip if we checked this URL recently
-            current_time = time.time()
-            if url in self.last_check_time:
-                if current_time - self.last_check_time[url] < 10:  # 10 second cooldown
-                    return
-            
-            self.last_check_time[url] = current_time
-            
-            # Import and use content analyzer
-            from adult_content_blocker import ContentAnalyzer
-            analyzer = ContentAnalyzer()
-            
-            # Analyze URL
-            result = analyzer.analyze_url(url)
-            
-            if result['is_blocked']:
-                print(f"BLOCKED URL DETECTED: {url}")
-                print(f"Reason: {result['reason']}")
-                self._trigger_block_screen(url, result['reason'], title)
-                return
-            
-            # Also analyze page title for keywords
-            title_result = analyzer._find_adult_keywords(title)
-            if title_result:
-                reason = f"Adult keywords in page title: {', '.join(title_result[:3])}"
-                print(f"BLOCKED TITLE DETECTED: {title}")
-                print(f"Reason: {reason}")
-                self._trigger_block_screen(url, reason, title)
-                
-        except Exception as e:
-            print(f"Error analyzing URL: {e}")
+    def _match_domain(self, url: str) -> Optional[Tuple[str, str]]:
+        """Domain rule of the detection pipeline: the user's blocked websites, then adult domains"""
+        # The list is reloaded by _on_database_change, not on every check
+        blocked, reason = self.website_filter.should_block_url(url)
+        if blocked:
+            return reason, url
+        domain = self.url_analyzer.match_domain(url)
+        return (f'Blocked domain: {domain}', domain) if domain else None
+    
+    def _extract_url_from_title(self, title: str) -> Optional[str]:
+        """Extract URL from browser window title"""
+        return extract_url_from_title(title)
     
     def _trigger_block_screen(self, url: str, reason: str, title: str):
         """Trigger block screen (communicates with main app)"""
         try:
-            # Create a signal file that the main app can monitor
-            signal_file = os.path.join(tempfile.gettempdir(), 'blockerhero_signal.json')
-            
-            signal_data = {
-                'timestamp': time.time(),
-                'url': url,
-                'reason': reason,
-                'title': title,
-                'user_email': self.user_email
-            }
-            
-            with open(signal_file, 'w') as f:
-                json.dump(signal_data, f)
+            # Push the event to the main app over the block channel
+            publish_block(url, reason, title, self.user_email)
             
             # Also try to show block screen directly
             self._show_block_screen_direct(url, reason)
@@ -546,65 +525,16 @@ class RegistryBrowserMonitor:
     def _show_block_screen_direct(self, url: str, reason: str):
         """Show block screen directly"""
         try:
-            print("Initializing block screen...")
-            from PyQt5.QtWidgets import QApplication, QDesktopWidget
-            from PyQt5.QtCore import Qt
-            from ..ui.blkScrn import BlockScreen
-            
-            # Get the QApplication instance or create a new one
-            app = QApplication.instance()
-            if not app:
-                print("Creating new QApplication instance")
-                app = QApplication([])
-            
-            print(f"Creating block screen for URL: {url}")
-            
-            # Create the block screen
-            self.block_screen = BlockScreen(user_email=self.user_email)  # Keep reference
-            
-            # Set the block reason
-            if hasattr(self.block_screen, 'blkRsn_lbl'):
-                print("Setting block reason label")
-                self.block_screen.blkRsn_lbl.setText(f"Blocked URL: {url}")
-                self.block_screen.blkRsn_lbl.show()
-            
-            # Ensure it covers the full screen on the correct monitor
-            desktop = QDesktopWidget().screenGeometry()
-            self.block_screen.resize(desktop.width(), desktop.height())
-            
-            print("Showing block screen")
-            self.block_screen.show()
-            self.block_screen.activateWindow()
-            self.block_screen.raise_()
-            
-            # Force the screen to be modal and grab all input
-            self.block_screen.setWindowState(Qt.WindowFullScreen)
-            self.block_screen.setWindowFlags(
-                Qt.WindowStaysOnTopHint | 
-                Qt.FramelessWindowHint |
-                Qt.WindowSystemMenuHint
-            )
-            
-            print("Executing block screen modal loop")
-            result = self.block_screen.exec_()
-            print(f"Block screen closed with result: {result}")
-            
+            # Runs on a scheduler thread: the dispatcher shows the screen on the GUI thread
+            from ..ui.block_dispatcher import dispatch_block
+            dispatch_block(url, reason, self.user_email)
         except Exception as e:
             print(f"Error showing block screen: {e}")
-            import traceback
-            print("Traceback:", traceback.format_exc())
     
     def is_adult_blocking_enabled(self) -> bool:
         """Check if adult content blocking is enabled"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT setting_value FROM user_settings WHERE user_email = ? AND setting_name = 'checkBox'",
-                    (self.user_email,)
-                )
-                result = cursor.fetchone()
-                return bool(result[0]) if result else True
+            return bool(get_policy(self.database_path, self.user_email).get_setting('checkBox', True))
         except Exception as e:
             print(f"Error checking setting: {e}")
             return True
@@ -617,6 +547,24 @@ class ContentBlockerService:
         self.database_path = database_path
         self.user_email = user_email
         self.is_running = False
+        self.basic_windows = {}  # Last URL seen in each browser window
+        self.throttle = get_throttle('content_service_blocks')
+        self.pipeline = DetectionPipeline(
+            'content_service',
+            domain_rule=self._match_domain,
+            # The scanner stops, and the connection is closed, at the first match
+            page_scan=lambda url: self._page_scan(),
+            page_headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.5',
+                'DNT': '1',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1'
+            },
+            raise_for_status=True
+        )
+        self.detector_name = f"content_blocker_service:{id(self)}"
         
         # Initialize browser monitor
         self.browser_monitor = self._setup_browser_monitor()
@@ -676,6 +624,8 @@ class ContentBlockerService:
         try:
             if self.browser_monitor['type'] == 'selenium':
                 self.browser_monitor['driver'].quit()
+            else:
+                get_monitor_scheduler().unregister(self.detector_name)
             
             print("Content blocking service stopped")
             
@@ -684,6 +634,10 @@ class ContentBlockerService:
     
     def _start_selenium_monitor(self):
         """Start monitoring with Selenium"""
+        # The driven browser is the page the user is looking at, so it is
+        # polled at the governor's foreground rate
+        governor = get_polling_governor()
+        
         def monitor_loop():
             while self.is_running:
                 try:
@@ -697,92 +651,66 @@ class ContentBlockerService:
                     if self._analyze_content(current_url, page_source):
                         self._show_block_screen(current_url)
                     
-                    time.sleep(1)  # Check every second
+                    time.sleep(governor.foreground_delay())
                 except Exception as e:
                     print(f"Error in selenium monitor: {e}")
-                    time.sleep(1)
+                    time.sleep(governor.foreground_delay())
         
         threading.Thread(target=monitor_loop, daemon=True).start()
     
     def _start_basic_monitor(self):
         """Start basic URL monitoring"""
-        def monitor_loop():
-            last_url = None
-            browser_windows = {}
-            
-            def enum_window_callback(hwnd, windows):
-                try:
-                    if win32gui.IsWindowVisible(hwnd):
-                        title = win32gui.GetWindowText(hwnd)
-                        if not title:  # Skip windows without titles
-                            return
-                        try:
-                            classname = win32gui.GetClassName(hwnd)
-                            # Check for common browser window classes
-                            if any(browser in classname.lower() for browser in ['chrome', 'firefox', 'edge', 'iexplore']):
-                                windows[hwnd] = title
-                        except Exception:
-                            # If we can't get class name, try to detect browser in title
-                            if any(browser in title.lower() for browser in ['chrome', 'firefox', 'edge', 'internet explorer']):
-                                windows[hwnd] = title
-                except Exception:
-                    pass  # Skip any window that causes errors
+        self.basic_windows = {}
+        get_monitor_scheduler().register(self.detector_name, self._check_basic_snapshot)
+    
+    def _check_basic_snapshot(self, snapshot: WindowSnapshot):
+        """Check the browser windows due in one scheduler snapshot"""
+        try:
+            # Get all browser windows
+            current_windows = {}
+            for window in snapshot.windows:
+                if window.class_name:
+                    # Check for common browser window classes
+                    if any(browser in window.class_name.lower() for browser in ['chrome', 'firefox', 'edge', 'iexplore']):
+                        current_windows[window.hwnd] = window.title
+                elif any(browser in window.title.lower() for browser in ['chrome', 'firefox', 'edge', 'internet explorer']):
+                    # If we can't get class name, try to detect browser in title
+                    current_windows[window.hwnd] = window.title
+            
+            # Check each browser window
+            for hwnd, title in current_windows.items():
+                # Extract URL from title
+                url = self._extract_url_from_title(title)
+                
+                # Only process if it's a new URL for this window
+                if url and self.basic_windows.get(hwnd) != url:
+                    self.basic_windows[hwnd] = url
+                    # First check if URL itself is blocked, otherwise
+                    # classify the page without holding up the loop
+                    verdict = self.pipeline.run(url=url)
+                    if verdict.pending is not None:
+                        verdict.pending.add_done_callback(
+                            lambda future, url=url: self._on_page_verdict(url, future.result())
+                        )
+                    else:
+                        self._on_page_verdict(url, verdict)
+            
+            # Clean up old window references; event snapshots only hold changed windows
+            if snapshot.complete:
+                self.basic_windows = {hwnd: url for hwnd, url in self.basic_windows.items()
+                                      if hwnd in current_windows}
             
-            while self.is_running:
-                try:
-                    # Get all browser windows
-                    current_windows = {}
-                    win32gui.EnumWindows(enum_window_callback, current_windows)
-                    
-                    # Check each browser window
-                    for hwnd, title in current_windows.items():
-                        # Extract URL from title
-                        url = self._extract_url_from_title(title)
-                        
-                        # Only process if it's a new URL for this window
-                        if url and (hwnd not in browser_windows or browser_windows[hwnd] != url):
-                            browser_windows[hwnd] = url
-                            try:
-                                # First check if URL itself is blocked
-                                if self._is_blocked_url(url):
-                                    print(f"Blocked URL detected: {url}")
-                                    self._show_block_screen(url)
-                                    continue
-
-                                # Try to get content
-                                headers = {
-                                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                                    'Accept-Language': 'en-US,en;q=0.5',
-                                    'DNT': '1',
-                                    'Connection': 'keep-alive',
-                                    'Upgrade-Insecure-Requests': '1'
-                                }
-                                
-                                response = requests.get(url, headers=headers, timeout=5, verify=True)
-                                response.raise_for_status()  # Raise an error for bad status codes
-                                
-                                # Check content if response is successful
-                                if self._analyze_content(url, response.text):
-                                    print(f"Adult content detected at: {url}")
-                                    self._show_block_screen(url)
-                                    
-                            except requests.RequestException as e:
-                                print(f"Error fetching {url}: {e}")
-                                continue
-                    
-                    # Clean up old window references
-                    browser_windows = {hwnd: url for hwnd, url in browser_windows.items() 
-                                    if hwnd in current_windows}
-                    
-                    time.sleep(0.5)  # Check twice per second
-                    
-                except Exception as e:
-                    print(f"Error in basic monitor: {e}")
-                    time.sleep(1)
-                    browser_windows = {}  # Reset on error
-        
-        threading.Thread(target=monitor_loop, daemon=True).start()
+        except Exception as e:
+            print(f"Error in basic monitor: {e}")
+            self.basic_windows = {}  # Reset on error
+    
+    def _on_page_verdict(self, url: str, verdict: Verdict):
+        """Show the block screen for a blocked page"""
+        if verdict.blocked and self.is_running and self.throttle.allow(block_event_key(url)):
+            print(f"Blocked URL detected ({verdict.stage}): {url}")
+            get_block_log(self.database_path).record(self.user_email, url, verdict.reason, verdict.stage,
+                                                     'content_service')
+            self._show_block_screen(url)
     
     def _analyze_content(self, url: str, content: str) -> bool:
         """Analyze webpage content comprehensively"""
@@ -791,72 +719,38 @@ class ContentBlockerService:
             if self._is_blocked_url(url):
                 return True
 
-            # Parse HTML content
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Check title
-            if soup.title and self._has_adult_content(soup.title.string):
-                return True
-            
-            # Check meta tags
-            for meta in soup.find_all('meta'):
-                # Check meta description
-                if meta.get('name', '').lower() == 'description':
-                    if self._has_adult_content(meta.get('content', '')):
-                        return True
-                
-                # Check meta keywords
-                if meta.get('name', '').lower() == 'keywords':
-                    if self._has_adult_content(meta.get('content', '')):
-                        return True
-                
-                # Check OpenGraph meta tags
-                if meta.get('property', '').startswith('og:'):
-                    if self._has_adult_content(meta.get('content', '')):
-                        return True
-            
-            # Check all links
-            for link in soup.find_all('a'):
-                href = link.get('href', '')
-                if href and self._is_blocked_url(href):
-                    return True
-                if self._has_adult_content(link.get_text()):
-                    return True
-            
-            # Check image alt text and titles
-            for img in soup.find_all('img'):
-                if self._has_adult_content(img.get('alt', '')) or self._has_adult_content(img.get('title', '')):
-                    return True
-            
-            # Check main content areas
-            content_areas = soup.find_all(['p', 'div', 'article', 'section', 'main'])
-            for area in content_areas:
-                if self._has_adult_content(area.get_text()):
-                    return True
-            
-            # Check headers
-            headers = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-            for header in headers:
-                if self._has_adult_content(header.get_text()):
-                    return True
-                    
-            return False
+            scanner, match = self._page_scan()
+            scanner.feed(content)
+            scanner.close()
+            return match() is not None
             
         except Exception as e:
             print(f"Error analyzing content: {e}")
             return False
     
+    def _page_scan(self):
+        """Scanner over every section of a page that stops at the first match, and its match"""
+        found = []
+        
+        def on_text(section: str, text: str) -> bool:
+            if section == LINK_HREF:
+                blocked = self._is_blocked_url(text)
+            else:
+                blocked = self._has_adult_content(text)
+            if blocked:
+                found.append((f"Adult content detected in {section}", text[:100]))
+            return blocked
+        
+        return HtmlScanner(on_text), lambda: found[0] if found else None
+    
+    def _match_domain(self, url: str) -> Optional[Tuple[str, str]]:
+        """Domain rule of the detection pipeline"""
+        return ("Blocked URL", url) if self._is_blocked_url(url) else None
+    
     def _is_blocked_url(self, url: str) -> bool:
         """Check if URL is in blocked list"""
-        blocked_domains = [
-            'pornhub.com', 'xvideos.com', 'redtube.com',
-            # Add more domains as needed
-        ]
-        
         try:
-            domain = urlparse(url).netloc
-            return any(blocked in domain for blocked in blocked_domains)
+            return get_adult_domain_index().match(url) is not None
         except:
             return False
     
@@ -950,37 +844,16 @@ class ContentBlockerService:
     def _show_block_screen(self, url: str):
         """Show block screen"""
         try:
-            from src.ui.blkScrn import BlockScreen
-            from PyQt5.QtWidgets import QApplication
-            from PyQt5.QtCore import QTimer
-            
-            # Get the main application instance
-            app = QApplication.instance()
-            if not app:
-                return  # We should only show block screen when main app is running
-            
-            # Create block screen in the main thread using a timer
-            def show_block_screen():
-                try:
-                    # Create and show block screen
-                    block_screen = BlockScreen(self.user_email)
-                    if hasattr(block_screen, 'blkRsn_lbl'):
-                        block_screen.blkRsn_lbl.setText(f"Blocked URL: {url}")
-                        block_screen.blkRsn_lbl.show()  # Make sure it's visible
-                    block_screen.exec_()  # Show modal dialog
-                except Exception as e:
-                    print(f"Error creating block screen: {e}")
-            
-            # Use a QTimer to ensure we run in the main thread
-            QTimer.singleShot(0, show_block_screen)
-            
+            # Only shown when the main app is running; the dispatcher moves it to the GUI thread
+            from ..ui.block_dispatcher import dispatch_block
+            dispatch_block(url, f"Blocked URL: {url}", self.user_email)
         except Exception as e:
             print(f"Error showing block screen: {e}")
     
     def _get_block_settings(self) -> dict:
         """Get blocking settings from database"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
+            with get_connection(self.database_path) as conn:
                 cursor = conn.cursor()
                 
                 # Get settings
@@ -1005,44 +878,6 @@ class ContentBlockerService:
                 'countdown': 60,
                 'redirect_url': 'https://www.google.com'
             }
-    
-    def _start_signal_file_monitoring(self):
-        """Monitor signal file for block triggers"""
-        def monitor_signal_file():
-            signal_file = os.path.join(tempfile.gettempdir(), 'blockerhero_signal.json')
-            last_modified = 0
-            
-            while self.is_running:
-                try:
-                    if os.path.exists(signal_file):
-                        current_modified = os.path.getmtime(signal_file)
-                        if current_modified > last_modified:
-                            last_modified = current_modified
-                            
-                            with open(signal_file, 'r') as f:
-                                signal_data = json.load(f)
-                            
-                            # Process the signal
-                            self._process_block_signal(signal_data)
-                    
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    print(f"Error monitoring signal file: {e}")
-                    time.sleep(5)
-        
-        self.signal_file_monitor = threading.Thread(target=monitor_signal_file, daemon=True)
-        self.signal_file_monitor.start()
-    
-    def _process_block_signal(self, signal_data: Dict):
-        """Process a block signal"""
-        try:
-            print(f"Processing block signal: {signal_data['url']}")
-            # Here you would communicate with the main PyQt application
-            # This could be through Qt signals, shared memory, named pipes, etc.
-            
-        except Exception as e:
-            print(f"Error processing block signal: {e}")
 
 # Integration function for the main application
 def setup_content_blocking_service(main_window):
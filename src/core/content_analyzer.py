@@ -1,53 +1,44 @@
-from typing import Dict, List, Optional, Set, Tuple
-import re
-import json
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from urllib.parse import urlparse
-import sqlite3
 import time
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QTimer
+
+from .fetch_engine import get_fetch_engine
+from .html_scanner import IMG_ALT, META_DESCRIPTION, TEXT, TITLE, HtmlScanner
+from .keyword_matcher import KeywordMatcher
+from .policy import PolicySnapshot, get_policy
 
 class ContentAnalyzer:
     """Analyzes webpage content for adult content"""
     
+    # Confidence and reason reported for a match in each part of a page
+    SECTION_VERDICTS = {
+        TITLE: (0.9, "Adult content detected in page metadata"),
+        META_DESCRIPTION: (0.9, "Adult content detected in page metadata"),
+        TEXT: (0.8, "Adult content detected in page content"),
+        IMG_ALT: (0.7, "Adult content detected in image metadata")
+    }
+    
     def __init__(self, database_path: str, user_email: str):
         self.database_path = database_path
         self.user_email = user_email
         self.load_block_settings()
         
+    @property
+    def policy(self) -> PolicySnapshot:
+        """Current in-memory policy snapshot for the user"""
+        return get_policy(self.database_path, self.user_email)
+        
     def load_block_settings(self):
-        """Load blocking settings from database"""
+        """Load blocking settings from the policy snapshot"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                # Get block message
-                cursor.execute(
-                    "SELECT setting_value FROM user_settings WHERE user_email = ? AND setting_name = 'block_message'",
-                    (self.user_email,)
-                )
-                result = cursor.fetchone()
-                self.block_message = result[0] if result else """
+            policy = self.policy
+            self.block_message = policy.get_setting('block_message', """
                 <div style='text-align: center; font-size: 18px; color: #2c3e50;'>
                     <h2 style='color: #e74c3c;'>اتقي الله في نفسك</h2>
-                </div>"""
-                
-                # Get countdown duration
-                cursor.execute(
-                    "SELECT setting_value FROM user_settings WHERE user_email = ? AND setting_name = 'countdown_duration'",
-                    (self.user_email,)
-                )
-                result = cursor.fetchone()
-                self.countdown_duration = int(result[0]) if result else 60
-                
-                # Get redirect URL
-                cursor.execute(
-                    "SELECT setting_value FROM user_settings WHERE user_email = ? AND setting_name = 'redirect_url'",
-                    (self.user_email,)
-                )
-                result = cursor.fetchone()
-                self.redirect_url = result[0] if result else "https://www.google.com"
+                </div>""")
+            self.countdown_duration = int(policy.get_setting('countdown_duration', 60))
+            self.redirect_url = policy.get_setting('redirect_url', "https://www.google.com")
                 
         except Exception as e:
             print(f"Error loading block settings: {e}")
@@ -64,90 +55,43 @@ class ContentAnalyzer:
     def analyze_webpage(self, url: str) -> Dict:
         """Analyze webpage content for adult content"""
         try:
-            # Get webpage content
-            response = requests.get(url, timeout=5)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract text content
-            title = soup.title.string if soup.title else ""
-            meta_desc = soup.find('meta', {'name': 'description'})
-            description = meta_desc['content'] if meta_desc else ""
-            
-            # Get visible text
-            visible_text = ' '.join([
-                text for text in soup.stripped_strings
-                if len(text.strip()) > 0
-            ])
-            
-            # Analyze content
-            result = {
-                'is_blocked': False,
-                'reason': None,
-                'confidence': 0.0
-            }
-            
-            # Check title and meta description
-            if self._check_adult_content(title) or self._check_adult_content(description):
-                result['is_blocked'] = True
-                result['reason'] = "Adult content detected in page metadata"
-                result['confidence'] = 0.9
-                return result
-            
-            # Check main content
-            content_check = self._check_adult_content(visible_text)
-            if content_check:
-                result['is_blocked'] = True
-                result['reason'] = "Adult content detected in page content"
-                result['confidence'] = 0.8
-                return result
-            
-            # Check images
-            images = soup.find_all('img')
-            for img in images:
-                alt_text = img.get('alt', '')
-                if self._check_adult_content(alt_text):
-                    result['is_blocked'] = True
-                    result['reason'] = "Adult content detected in image metadata"
-                    result['confidence'] = 0.7
-                    return result
-            
-            return result
-            
+            return self.analyze_webpage_async(url).result()
         except Exception as e:
             print(f"Error analyzing webpage: {e}")
             return {'is_blocked': False, 'reason': None, 'confidence': 0.0}
     
+    def analyze_webpage_async(self, url: str) -> Future:
+        """Queue a webpage on the shared fetch engine; the future resolves to the analysis result"""
+        scanner, match = self.page_scan(url)
+        
+        def on_fetched(stats: Dict) -> Dict:
+            found = match()
+            return {
+                'is_blocked': found is not None,
+                'reason': found[0] if found else None,
+                'confidence': self.SECTION_VERDICTS[found[1]][0] if found else 0.0
+            }
+        
+        return get_fetch_engine().submit(url, scanner, then=on_fetched)
+    
+    def page_scan(self, url: str) -> Tuple[HtmlScanner, Callable[[], Optional[Tuple[str, str]]]]:
+        """Scanner for a page and a function returning (reason, section) of its first match"""
+        found = []
+        
+        def on_text(section: str, text: str) -> bool:
+            is_blocked, _ = self._check_adult_content(text)
+            if is_blocked:
+                found.append((self.SECTION_VERDICTS[section][1], section))
+            return is_blocked
+        
+        # The download stops at the first match. The head comes before the
+        # body, so metadata is still checked first
+        scanner = HtmlScanner(on_text, self.SECTION_VERDICTS)
+        return scanner, lambda: found[0] if found else None
+    
     def _get_blocked_keywords(self) -> Set[str]:
         """Get all blocked keywords for the user"""
-        try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                # Get user's custom keywords
-                cursor.execute("SELECT keyword FROM blocked_keywords WHERE user_email = ?", (self.user_email,))
-                custom_keywords = set(keyword[0].lower() for keyword in cursor.fetchall())
-                
-                # Get default keywords from settings
-                cursor.execute("""
-                    SELECT setting_value FROM user_settings 
-                    WHERE user_email = ? AND setting_name = 'default_keywords'
-                """, (self.user_email,))
-                result = cursor.fetchone()
-                if result and result[0]:
-                    try:
-                        default_keywords = set(json.loads(result[0]))
-                    except json.JSONDecodeError:
-                        default_keywords = set()
-                else:
-                    default_keywords = {
-                        'porn', 'xxx', 'adult content', 'nsfw', 'nude', 'naked',
-                        'sex', 'explicit', 'adult', 'mature', '18+'
-                    }
-                
-                return custom_keywords.union(default_keywords)
-                
-        except Exception as e:
-            print(f"Error getting blocked keywords: {e}")
-            return set()
+        return self.policy.keywords
 
     def _check_adult_content(self, text: str) -> Tuple[bool, str]:
         """Check if text contains adult content. Returns (is_blocked, matching_keyword)"""
@@ -156,34 +100,19 @@ class ContentAnalyzer:
                 return False, ""
                 
             text = text.lower()
-            blocked_keywords = self._get_blocked_keywords()
+            policy = self.policy
             
-            # First check exact matches using word boundaries
-            text_words = set(re.findall(r'\b\w+\b', text))
-            for keyword in blocked_keywords:
-                if keyword in text_words:
+            # Single pass over the text: single words must match on word
+            # boundaries, phrases (which might span word boundaries) anywhere
+            for start, keyword in policy.keyword_matcher.find_all(text):
+                if ' ' in keyword or KeywordMatcher.is_whole_word(text, start, start + len(keyword)):
                     return True, keyword
-            
-            # Then check for phrases (which might span word boundaries)
-            for keyword in blocked_keywords:
-                if len(keyword.split()) > 1:  # Multi-word keyword
-                    if keyword in text:
-                        return True, keyword
                         
             # Finally, check for partial matches within words if enabled
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT setting_value FROM user_settings 
-                    WHERE user_email = ? AND setting_name = 'strict_keyword_matching'
-                """, (self.user_email,))
-                result = cursor.fetchone()
-                strict_matching = result[0].lower() == 'true' if result else True
-            
-            if not strict_matching:
-                for keyword in blocked_keywords:
-                    if keyword.replace(' ', '') in text.replace(' ', ''):
-                        return True, keyword
+            if not policy.strict_matching:
+                compact_keyword = policy.compact_matcher.search(text.replace(' ', ''))
+                if compact_keyword:
+                    return True, policy.compact_keywords[compact_keyword]
             
             return False, ""
             
@@ -191,27 +120,11 @@ class ContentAnalyzer:
             print(f"Error checking adult content: {e}")
             return False, ""
 
-    def show_block_screen(self, url: str, reason: str):
-        """Show block screen and handle redirection"""
+    def show_block_screen(self, url: str, reason: str) -> bool:
+        """Show the block screen on the GUI thread without waiting for it"""
         try:
-            from src.ui.blkScrn import BlockScreen
-            from PyQt5.QtWidgets import QApplication
-            
-            # Ensure we have a QApplication instance
-            app = QApplication.instance() or QApplication([])
-            
-            # Create block screen with user email
-            block_screen = BlockScreen(self.user_email)
-            
-            # Set the reason in the block screen
-            if hasattr(block_screen, 'blkRsn_lbl'):
-                block_screen.blkRsn_lbl.setText(f"Blocked: {reason}")
-                
-            # Show the block screen modally
-            block_screen.exec_()
-            
-            return block_screen
-            
+            from src.ui.block_dispatcher import dispatch_block
+            return dispatch_block(url, reason, self.user_email)
         except Exception as e:
             print(f"Error showing block screen: {e}")
-            return None
+            return False
@@ -0,0 +1,305 @@
+"""
+Cheap-to-expensive detection cascade shared by the monitors.
+
+Every monitor classifies a browser window the same way: stages ordered by
+cost, each of which either decides (allow or block) or passes the window on
+to the next one:
+
+    window_cache -> title -> domain -> url_patterns -> verdict_cache -> fetch -> html_scan
+
+The stages up to the page verdict cache run inline and take microseconds.
+What the title, domain and URL rules made of a window is cached under a
+hash of its title and URL, so a window seen again skips them. Only when
+none of them decides is the page fetched; that happens on the shared fetch
+engine, and the verdict comes back through a future and is stored in the
+verdict cache for the next check. Monitors plug in their own rules for each stage,
+so what counts as a match can differ while the order and the bookkeeping do
+not. Every stage records how often it ran, what it decided and the time it
+took, so ``stats()`` shows where detection time goes.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import requests
+
+from .fetch_engine import get_fetch_engine
+from .html_scanner import HtmlScanner
+from .single_flight import get_single_flight
+from .verdict_cache import VerdictCache, get_verdict_cache, title_key, url_key
+
+ALLOW = 'allow'
+BLOCK = 'block'
+UNDECIDED = 'undecided'
+
+# What a rule returns when it matches: the block reason and what was detected
+Match = Tuple[str, str]
+
+
+class Verdict(NamedTuple):
+    """Outcome of a stage or of the whole pipeline"""
+    decision: str
+    reason: str = ''
+    detected: str = ''
+    stage: str = ''
+    # For an undecided pipeline run that started a page fetch: resolves to the final Verdict
+    pending: Optional[Future] = None
+
+    @property
+    def blocked(self) -> bool:
+        return self.decision == BLOCK
+
+
+_UNDECIDED = Verdict(UNDECIDED)
+
+
+class _StageStats:
+    """Call counts, decisions and time spent in one stage"""
+
+    __slots__ = ('calls', 'allow', 'block', 'undecided', 'total_time', 'max_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.allow = 0
+        self.block = 0
+        self.undecided = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, decision: str, elapsed: float):
+        self.calls += 1
+        setattr(self, decision, getattr(self, decision) + 1)
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def as_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'allow': self.allow,
+            'block': self.block,
+            'undecided': self.undecided,
+            'total_time': self.total_time,
+            'avg_ms': self.total_time / self.calls * 1000 if self.calls else 0.0,
+            'max_ms': self.max_time * 1000
+        }
+
+
+class _TimedScanner:
+    """Scanner wrapper that adds up the time spent scanning, apart from downloading"""
+
+    def __init__(self, scanner: HtmlScanner):
+        self.scanner = scanner
+        self.scan_time = 0.0
+
+    @property
+    def stopped(self) -> bool:
+        return self.scanner.stopped
+
+    def feed(self, text: str) -> bool:
+        started = time.perf_counter()
+        try:
+            return self.scanner.feed(text)
+        finally:
+            self.scan_time += time.perf_counter() - started
+
+    def close(self) -> bool:
+        started = time.perf_counter()
+        try:
+            return self.scanner.close()
+        finally:
+            self.scan_time += time.perf_counter() - started
+
+
+class DetectionPipeline:
+    """Runs a window title and URL through the detection stages in order of cost
+
+    Each rule is optional. title_rule gets the title, domain_rule and
+    url_rule get the URL, and each returns a ``(reason, detected)`` match
+    or None. page_scan creates a scanner for a URL and a function that
+    returns the page's match once the scan is over. flight_tag stands for
+    the rules, such as the keyword set they match: window and page
+    verdicts are cached under namespace and flight_tag, so a verdict is
+    never read with rules other than those that reached it, and page
+    analyses with the same flight_tag share one download and scan between
+    pipelines. Assign a new flight_tag when the rules change.
+    """
+
+    STAGES = ('window_cache', 'title', 'domain', 'url_patterns', 'verdict_cache', 'fetch', 'html_scan')
+    FETCH_ERROR_TTL = 30  # seconds before a page that could not be fetched is retried
+
+    def __init__(self, namespace: str,
+                 title_rule: Optional[Callable[[str], Optional[Match]]] = None,
+                 domain_rule: Optional[Callable[[str], Optional[Match]]] = None,
+                 url_rule: Optional[Callable[[str], Optional[Match]]] = None,
+                 page_scan: Optional[Callable[[str], Tuple[HtmlScanner, Callable[[], Optional[Match]]]]] = None,
+                 page_headers: Optional[Dict[str, str]] = None,
+                 raise_for_status: bool = False,
+                 flight_tag: Hashable = None,
+                 verdict_cache: Optional[VerdictCache] = None):
+        self.namespace = namespace
+        self.title_rule = title_rule
+        self.domain_rule = domain_rule
+        self.url_rule = url_rule
+        self.page_scan = page_scan
+        self.page_headers = page_headers
+        self.raise_for_status = raise_for_status
+        self.flight_tag = flight_tag
+        self.verdict_cache = verdict_cache if verdict_cache is not None else get_verdict_cache()
+        self._lock = threading.Lock()
+        self._stats = {stage: _StageStats() for stage in self.STAGES}
+        self._pending: Dict[Hashable, Future] = {}  # This pipeline's page analyses by cache key
+        self.runs = 0
+
+    def window_key(self, title: str, url: Optional[str]) -> Tuple:
+        """Verdict cache key of what the title, domain and URL rules made of a window"""
+        return (self.namespace, 'window', title_key(title) if title else '', url_key(url) if url else '',
+                self.flight_tag)
+
+    def page_key(self, url: str) -> Tuple:
+        """Verdict cache key of a page's analysis"""
+        return (self.namespace, 'page', url_key(url), self.flight_tag)
+
+    def run(self, title: str = '', url: Optional[str] = None, fetch: bool = True) -> Verdict:
+        """Classify a window, stopping at the first stage that decides
+
+        When the inline stages do not decide and fetch is true, the page is
+        analyzed in the background: the returned verdict is undecided and
+        its pending future resolves to the final verdict. A page this
+        pipeline is already analyzing returns undecided with no future.
+        """
+        self.runs += 1
+        key = self.window_key(title, url)
+        verdict = self._check_window_cache(key)
+        if verdict is None:
+            verdict = self._run_rules(title, url)
+            self.verdict_cache.put(key, tuple(verdict[1:4]) if verdict.blocked else False)
+        if verdict.decision != UNDECIDED:
+            return verdict
+
+        if not url or self.page_scan is None:
+            return Verdict(ALLOW)
+
+        verdict = self._check_cache(url)
+        if verdict.decision != UNDECIDED or not fetch:
+            return verdict
+        return self._fetch_page(url)
+
+    def _check_window_cache(self, key: Hashable) -> Optional[Verdict]:
+        """The cached verdict of the rules on a window, or None if they have to run"""
+        started = time.perf_counter()
+        cached = self.verdict_cache.get(key)
+        # A cached block keeps the stage that decided it, so callers treat it the same
+        verdict = Verdict(BLOCK, *cached) if cached else _UNDECIDED
+        self._record('window_cache', verdict.decision, time.perf_counter() - started)
+        return verdict if cached is not None else None
+
+    def _run_rules(self, title: str, url: Optional[str]) -> Verdict:
+        """Run the title, domain and URL rules until one blocks"""
+        if title and self.title_rule is not None:
+            verdict = self._run_rule('title', self.title_rule, title)
+            if verdict.decision != UNDECIDED:
+                return verdict
+        if url:
+            for stage, rule in (('domain', self.domain_rule), ('url_patterns', self.url_rule)):
+                if rule is not None:
+                    verdict = self._run_rule(stage, rule, url)
+                    if verdict.decision != UNDECIDED:
+                        return verdict
+        return _UNDECIDED
+
+    def _run_rule(self, stage: str, rule: Callable[[str], Optional[Match]], value: str) -> Verdict:
+        started = time.perf_counter()
+        try:
+            match = rule(value)
+        except Exception as e:
+            print(f"Error in {stage} check: {e}")
+            match = None
+        verdict = Verdict(BLOCK, match[0], match[1], stage) if match else _UNDECIDED
+        self._record(stage, verdict.decision, time.perf_counter() - started)
+        return verdict
+
+    def _check_cache(self, url: str) -> Verdict:
+        started = time.perf_counter()
+        cached = self.verdict_cache.get(self.page_key(url))
+        if cached is None:
+            verdict = _UNDECIDED
+        elif cached:
+            verdict = Verdict(BLOCK, cached[0], cached[1], 'verdict_cache')
+        else:
+            verdict = Verdict(ALLOW, stage='verdict_cache')
+        self._record('verdict_cache', verdict.decision, time.perf_counter() - started)
+        return verdict
+
+    def _fetch_page(self, url: str) -> Verdict:
+        key = self.page_key(url)
+        result = Future()
+        with self._lock:
+            # Checked and claimed at once, so two threads cannot both start the analysis
+            if key in self._pending:
+                return Verdict(UNDECIDED, stage='fetch')
+            self._pending[key] = result
+
+        def start() -> Future:
+            scanner, finish = self.page_scan(url)
+            timed = _TimedScanner(scanner)
+            submitted = time.perf_counter()
+
+            def on_fetched(stats: Dict) -> Tuple[Optional[Match], float, float]:
+                match = finish()
+                return match, time.perf_counter() - submitted, timed.scan_time
+
+            return get_fetch_engine().submit(url, timed, headers=self.page_headers,
+                                             raise_for_status=self.raise_for_status, then=on_fetched)
+
+        # The tag in key is the one the verdict will be cached under
+        flight_key = ('page',) + key
+        try:
+            analysis = get_single_flight().do(flight_key, start)
+        except Exception:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise
+        self._record('fetch', UNDECIDED, 0.0)
+        analysis.add_done_callback(lambda analysis: self._on_page_analyzed(url, key, analysis, result))
+        return Verdict(UNDECIDED, stage='fetch', pending=result)
+
+    def _on_page_analyzed(self, url: str, key, analysis: Future, result: Future):
+        with self._lock:
+            self._pending.pop(key, None)
+        try:
+            match, elapsed, scan_time = analysis.result()
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            # Retry failed fetches sooner than a normal allow verdict expires
+            self.verdict_cache.put(key, False, self.FETCH_ERROR_TTL)
+            result.set_result(Verdict(ALLOW, stage='fetch'))
+            return
+        except Exception as e:
+            print(f"Error analyzing page {url}: {e}")
+            result.set_result(Verdict(ALLOW, stage='html_scan'))
+            return
+
+        self.verdict_cache.put(key, tuple(match) if match else False)
+        verdict = Verdict(BLOCK, match[0], match[1], 'html_scan') if match else Verdict(ALLOW, stage='html_scan')
+        with self._lock:
+            # The fetch stage counted its call when the page was queued; add its time now
+            fetch_stats = self._stats['fetch']
+            fetch_stats.total_time += elapsed - scan_time
+            fetch_stats.max_time = max(fetch_stats.max_time, elapsed - scan_time)
+        self._record('html_scan', verdict.decision, scan_time)
+        result.set_result(verdict)
+
+    def _record(self, stage: str, decision: str, elapsed: float):
+        with self._lock:
+            self._stats[stage].record(decision, elapsed)
+
+    def stats(self) -> Dict:
+        """Runs, and calls, decisions and time spent per stage"""
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'pending': len(self._pending),
+                'stages': {stage: stats.as_dict() for stage, stats in self._stats.items()}
+            }
@@ -0,0 +1,160 @@
+"""
+Domain index keyed on reversed host labels.
+
+Blocked domains are stored in a trie walked from the top-level label down,
+e.g. ``com -> pornhub``, so checking whether a host or any of its parent
+domains is blocked costs one dictionary lookup per label of the host,
+independent of how many domains are indexed. Matching on whole labels also
+avoids substring false positives such as ``sex.com`` matching ``essex.com``.
+"""
+
+import re
+from typing import Dict, Iterable, Optional, Union
+from urllib.parse import urlparse
+
+from .content_filters import ADULT_DOMAINS
+
+# Marks a node whose path is itself a blocked domain. Real labels are
+# non-empty strings, so None can never collide with one.
+_TERMINAL = None
+
+# Host names embedded in free text, e.g. window titles or page text
+_HOST_PATTERN = re.compile(
+    r'(?<![a-z0-9-])(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}(?![a-z0-9-])'
+)
+
+
+def normalize_domain(value: str) -> str:
+    """Reduce a URL, host name or list entry to a bare lowercase host"""
+    if not value:
+        return ''
+    value = value.strip().lower()
+    if '://' in value:
+        value = urlparse(value).netloc
+    else:
+        value = value.split('/', 1)[0]
+    value = value.rsplit('@', 1)[-1].split(':', 1)[0].strip('.')
+    if value.startswith('*.'):
+        value = value[2:]
+    if value.startswith('www.'):
+        value = value[4:]
+    return value
+
+
+class DomainIndex:
+    """Reversed-label trie answering "is this host or a parent domain blocked" in O(labels)"""
+
+    def __init__(self, domains: Iterable[str] = ()):
+        # Children are either nested dicts or, for leaves, the blocked domain
+        # string itself, which keeps large lists from allocating a dict per entry
+        self._root: Dict[Optional[str], Union[dict, str]] = {}
+        self._size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, host: str) -> bool:
+        return self.match(host) is not None
+
+    def add(self, domain: str) -> bool:
+        """Add a domain; returns False if it was already indexed or is not a domain"""
+        domain = normalize_domain(domain)
+        if '.' not in domain:
+            return False
+
+        labels = domain.split('.')
+        node = self._root
+        for label in reversed(labels[1:]):
+            child = node.get(label)
+            if child is None:
+                child = node[label] = {}
+            elif isinstance(child, str):
+                child = node[label] = {_TERMINAL: child}
+            node = child
+
+        label = labels[0]
+        child = node.get(label)
+        if child is None:
+            node[label] = domain
+        elif isinstance(child, dict) and _TERMINAL not in child:
+            child[_TERMINAL] = domain
+        else:
+            return False
+        self._size += 1
+        return True
+
+    def remove(self, domain: str) -> bool:
+        """Remove a domain; returns False if it was not indexed"""
+        domain = normalize_domain(domain)
+        if '.' not in domain:
+            return False
+
+        path = []
+        node = self._root
+        labels = domain.split('.')
+        for label in reversed(labels[1:]):
+            child = node.get(label)
+            if not isinstance(child, dict):
+                return False
+            path.append((node, label))
+            node = child
+
+        label = labels[0]
+        child = node.get(label)
+        if isinstance(child, str):
+            del node[label]
+        elif isinstance(child, dict) and _TERMINAL in child:
+            del child[_TERMINAL]
+            if not child:
+                del node[label]
+        else:
+            return False
+
+        # Prune branches left empty by the removal
+        for parent, label in reversed(path):
+            if parent[label]:
+                break
+            del parent[label]
+        self._size -= 1
+        return True
+
+    def match(self, host: str) -> Optional[str]:
+        """Return the blocked domain covering host (itself or a parent), or None"""
+        host = normalize_domain(host)
+        if not host:
+            return None
+
+        node = self._root
+        for label in reversed(host.split('.')):
+            child = node.get(label)
+            if child is None:
+                return None
+            if isinstance(child, str):
+                return child
+            if _TERMINAL in child:
+                return child[_TERMINAL]
+            node = child
+        return None
+
+    def find_in_text(self, text: str) -> Optional[str]:
+        """Return the first blocked domain covering a host name mentioned in text"""
+        if not text:
+            return None
+        for match in _HOST_PATTERN.finditer(text.lower()):
+            blocked = self.match(match.group(0))
+            if blocked:
+                return blocked
+        return None
+
+
+_adult_domain_index: Optional[DomainIndex] = None
+
+
+def get_adult_domain_index() -> DomainIndex:
+    """Get the shared index built from the built-in adult domain list"""
+    global _adult_domain_index
+    if _adult_domain_index is None:
+        _adult_domain_index = DomainIndex(ADULT_DOMAINS)
+    return _adult_domain_index
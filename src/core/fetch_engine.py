@@ -0,0 +1,269 @@
+"""
+Background page fetching for the monitors.
+
+The engine runs an asyncio event loop on its own thread that schedules
+fetches under a global and a per-host concurrency limit. Page bodies are
+streamed by ``fetch_and_scan`` on a small worker pool through one shared
+``requests.Session`` whose adapter keeps keep-alive connections pooled per
+host. Callers get a ``concurrent.futures.Future`` back immediately, so a
+slow site never stalls the window checks of a monitor loop.
+
+Requests for a page that is already being downloaded join that download:
+the text read so far is replayed into the new scanner and later chunks are
+fed to every scanner, so monitors looking at the same page share one fetch
+even when they analyze it differently.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .html_scanner import HtmlScanner
+from .page_fetcher import DEFAULT_MAX_BYTES, fetch_and_scan
+from .verdict_cache import canonicalize_url
+
+
+class _Subscriber:
+    """One caller's scanner and the future its result is delivered to"""
+
+    __slots__ = ('scanner', 'then', 'raise_for_status', 'future', 'position', 'error')
+
+    def __init__(self, scanner: HtmlScanner, then: Optional[Callable[[Dict], Any]],
+                 raise_for_status: bool):
+        self.scanner = scanner
+        self.then = then
+        self.raise_for_status = raise_for_status
+        self.future = Future()
+        self.position = 0  # Number of chunks fed to the scanner so far
+        self.error: Optional[Exception] = None
+
+
+class _SharedFetch:
+    """One download fanned out to every scanner that asked for the same page
+
+    Behaves like a scanner towards ``fetch_and_scan``: it reports itself
+    stopped once every subscribed scanner has reached a verdict. From then
+    on nobody can join, since the rest of the page will not be read.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.closed = False
+        self.joinable = True
+        self._lock = threading.Lock()
+        self._chunks: List[str] = []
+        self._subscribers: List[_Subscriber] = []
+
+    def add(self, subscriber: _Subscriber) -> bool:
+        """Join the download; returns False if it is ending or has finished"""
+        with self._lock:
+            if not self.joinable:
+                return False
+            self._subscribers.append(subscriber)
+            return True
+
+    def feed(self, text: str) -> bool:
+        with self._lock:
+            self._chunks.append(text)
+            if self._catch_up():
+                # fetch_and_scan stops reading; a late caller needs a download of its own
+                self.joinable = False
+                return True
+            return False
+
+    def close(self) -> bool:
+        with self._lock:
+            if not self.closed:
+                self._catch_up()
+                self.closed = True
+                self.joinable = False
+                for subscriber in self._subscribers:
+                    if subscriber.error is None:
+                        try:
+                            subscriber.scanner.close()
+                        except Exception as e:
+                            subscriber.error = e
+            return self._all_stopped()
+
+    def _catch_up(self) -> bool:
+        """Feed each scanner the chunks it has not seen yet"""
+        for subscriber in self._subscribers:
+            scanner = subscriber.scanner
+            try:
+                while subscriber.position < len(self._chunks) and not scanner.stopped:
+                    scanner.feed(self._chunks[subscriber.position])
+                    subscriber.position += 1
+            except Exception as e:
+                subscriber.error = e
+        return self._all_stopped()
+
+    def _all_stopped(self) -> bool:
+        return all(subscriber.error is not None or subscriber.scanner.stopped
+                   for subscriber in self._subscribers)
+
+    def resolve(self, stats: Optional[Dict], error: Optional[Exception]):
+        """Deliver the outcome of the download to every subscriber"""
+        for subscriber in self._subscribers:
+            if error is not None or subscriber.error is not None:
+                subscriber.future.set_exception(error or subscriber.error)
+            elif subscriber.raise_for_status and (stats['status_code'] or 0) >= 400:
+                subscriber.future.set_exception(requests.HTTPError(
+                    f"{stats['status_code']} Error for url: {self.url}"
+                ))
+            else:
+                try:
+                    result = subscriber.then(stats) if subscriber.then is not None else stats
+                except Exception as e:
+                    subscriber.future.set_exception(e)
+                else:
+                    subscriber.future.set_result(result)
+
+
+class FetchEngine:
+    """Fetches pages on a background event loop with bounded concurrency"""
+
+    def __init__(self, max_concurrency: int = 8, per_host_limit: int = 2,
+                 max_hosts: int = 64, timeout: float = 5):
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=per_host_limit, max_retries=0)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='fetch')
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        # host -> [semaphore, number of fetches holding or waiting for it]
+        self._host_limits: Dict[str, list] = {}
+        # canonical URL -> download in progress
+        self._fetches: Dict[str, _SharedFetch] = {}
+
+        self._counters = {
+            'submitted': 0, 'joined': 0, 'completed': 0, 'failed': 0, 'active': 0, 'waiting': 0
+        }
+
+    def start(self):
+        """Start the event loop thread if it is not running yet"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name='fetch-engine', daemon=True)
+            self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._loop.run_forever()
+
+    def stop(self):
+        """Stop the event loop; fetches already running finish on the worker pool"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=1.0)
+            pending = asyncio.all_tasks(loop) if not thread.is_alive() else ()
+            if pending:
+                # Let the scheduling tasks left on the loop release their host slots
+                for task in pending:
+                    task.cancel()
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+        self._host_limits.clear()
+
+    def submit(self, url: str, scanner: HtmlScanner, max_bytes: int = DEFAULT_MAX_BYTES,
+               headers: Optional[Dict[str, str]] = None, raise_for_status: bool = False,
+               then: Optional[Callable[[Dict], Any]] = None) -> Future:
+        """Queue a fetch of url into scanner and return a future of its result
+
+        The result is the stats dict from ``fetch_and_scan``, or what ``then``
+        returns when given those stats. ``then`` runs on the worker thread.
+        If the page is already being downloaded, the scanner joins that
+        download and max_bytes and headers of the first request apply.
+        """
+        self.start()
+        key = canonicalize_url(url)
+        subscriber = _Subscriber(scanner, then, raise_for_status)
+        with self._lock:
+            self._counters['submitted'] += 1
+            shared = self._fetches.get(key)
+            if shared is not None and shared.add(subscriber):
+                self._counters['joined'] += 1
+                return subscriber.future
+            shared = self._fetches[key] = _SharedFetch(url)
+            shared.add(subscriber)
+
+        job = partial(self._fetch_job, key, shared, max_bytes, headers)
+        asyncio.run_coroutine_threadsafe(self._schedule(url, job), self._loop)
+        return subscriber.future
+
+    async def _schedule(self, url: str, job: Callable[[], Any]) -> Any:
+        host = (urlsplit(url).hostname or '').lower()
+        host_limit = self._host_limits.get(host)
+        if host_limit is None:
+            host_limit = self._host_limits[host] = [asyncio.Semaphore(self.per_host_limit), 0]
+        host_limit[1] += 1
+        self._counters['waiting'] += 1
+        try:
+            async with self._global_limit, host_limit[0]:
+                self._counters['waiting'] -= 1
+                self._counters['active'] += 1
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+                finally:
+                    self._counters['active'] -= 1
+        finally:
+            host_limit[1] -= 1
+            if not host_limit[1]:
+                del self._host_limits[host]
+
+    def _fetch_job(self, key: str, shared: _SharedFetch, max_bytes: int,
+                   headers: Optional[Dict[str, str]]):
+        stats, error = None, None
+        try:
+            stats = fetch_and_scan(shared.url, shared, max_bytes=max_bytes, timeout=self.timeout,
+                                   headers=headers, session=self._session)
+        except Exception as e:
+            error = e
+
+        # Close before forgetting the download, so late callers start a new one
+        shared.close()
+        with self._lock:
+            if self._fetches.get(key) is shared:
+                del self._fetches[key]
+            self._counters['failed' if error else 'completed'] += 1
+        shared.resolve(stats, error)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for submitted, shared, completed, failed, running and queued fetches"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._fetches)
+        stats['hosts'] = len(self._host_limits)
+        return stats
+
+
+_fetch_engine: Optional[FetchEngine] = None
+_fetch_engine_lock = threading.Lock()
+
+
+def get_fetch_engine() -> FetchEngine:
+    """Get the fetch engine shared by all monitors"""
+    global _fetch_engine
+    with _fetch_engine_lock:
+        if _fetch_engine is None:
+            _fetch_engine = FetchEngine()
+        return _fetch_engine
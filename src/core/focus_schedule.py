@@ -0,0 +1,131 @@
+"""
+Week timeline of a user's focus modes.
+
+A focus mode runs from its start to its end time on each of its days
+(every day if it is daily); an end at or before the start runs past
+midnight into the next day, and an end equal to the start covers the
+whole day. ``FocusSchedule`` parses the stored times and days once and
+lays every span out on one week, from Monday 00:00, wrapping spans that run
+past Sunday midnight back to Monday. The week is then cut at every span
+boundary into segments, each with the set of modes active throughout it,
+and neighbouring segments with the same set are merged, so every remaining
+boundary is a transition.
+
+``active_at`` finds the segment of a moment by bisection, and
+``next_transition`` gives the moment the active set next changes, so the
+caller can arm a single timer for it instead of polling.
+"""
+
+import bisect
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+DAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')  # Indexed by datetime.weekday()
+
+
+class FocusSpan(NamedTuple):
+    """One focus mode's daily window, as stored"""
+    mode_id: Hashable
+    start: int  # Seconds after midnight
+    end: int  # Seconds after midnight; at or before start means the next day
+    days: FrozenSet[int]  # datetime.weekday() numbers
+
+
+def parse_time(value: str) -> int:
+    """Seconds after midnight of an 'HH:mm[:ss]' time"""
+    parts = [int(part) for part in value.strip().split(':')]
+    hours, minutes, seconds = (parts + [0, 0])[:3]
+    return (hours * 3600 + minutes * 60 + seconds) % DAY
+
+
+def parse_days(selected_days: str, is_daily: bool) -> FrozenSet[int]:
+    """Weekday numbers of a comma-separated list of day names such as 'Sat,Sun'"""
+    if is_daily:
+        return frozenset(range(7))
+    names = {name.strip()[:3].title() for name in (selected_days or '').split(',')}
+    return frozenset(DAY_NAMES.index(name) for name in names if name in DAY_NAMES)
+
+
+def week_offset(moment: datetime) -> float:
+    """Seconds from the Monday 00:00 before moment"""
+    return (moment.weekday() * DAY + moment.hour * 3600 + moment.minute * 60 + moment.second
+            + moment.microsecond / 1e6)
+
+
+class FocusSchedule:
+    """Sorted week timeline of focus modes, answering which are active at a moment"""
+
+    def __init__(self, spans: Iterable[FocusSpan]):
+        changes: Counter = Counter()  # (offset, mode_id) -> +1 where a span starts, -1 where one ends
+        for span in spans:
+            duration = (span.end - span.start) % DAY or DAY
+            for day in span.days:
+                start = day * DAY + span.start
+                end = start + duration
+                if end > WEEK:
+                    # Runs past Sunday midnight: the rest is at the start of the week
+                    changes[(0, span.mode_id)] += 1
+                    changes[(end - WEEK, span.mode_id)] -= 1
+                    end = WEEK
+                changes[(start, span.mode_id)] += 1
+                changes[(end, span.mode_id)] -= 1
+
+        by_offset: Dict[int, List[Tuple[Hashable, int]]] = {}
+        for (offset, mode_id), delta in changes.items():
+            by_offset.setdefault(offset, []).append((mode_id, delta))
+
+        starts: List[int] = [0]
+        active: List[FrozenSet[Hashable]] = [frozenset()]
+        counts: Counter = Counter()
+        for offset in sorted(by_offset):
+            if offset >= WEEK:
+                break
+            for mode_id, delta in by_offset[offset]:
+                counts[mode_id] += delta
+            modes = frozenset(mode_id for mode_id, count in counts.items() if count > 0)
+            if offset == 0:
+                active[0] = modes
+            elif modes != active[-1]:
+                starts.append(offset)
+                active.append(modes)
+        self._starts = starts
+        self._active = active
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> 'FocusSchedule':
+        """Compile (id, start_time, end_time, is_daily, selected_days) rows of focus_modes"""
+        spans = []
+        for mode_id, start_time, end_time, is_daily, selected_days in rows:
+            try:
+                spans.append(FocusSpan(mode_id, parse_time(start_time), parse_time(end_time),
+                                       parse_days(selected_days, bool(is_daily))))
+            except (AttributeError, ValueError) as e:
+                print(f"Skipping focus mode {mode_id} with an invalid schedule: {e}")
+        return cls(spans)
+
+    def __len__(self) -> int:
+        """Number of segments in the week"""
+        return len(self._starts)
+
+    def _segment(self, offset: float) -> int:
+        return bisect.bisect_right(self._starts, offset % WEEK) - 1
+
+    def active_at(self, moment: datetime) -> FrozenSet[Hashable]:
+        """Ids of the focus modes active at moment"""
+        return self._active[self._segment(week_offset(moment))]
+
+    def next_transition(self, moment: datetime) -> Optional[datetime]:
+        """When the set of active modes next changes after moment, or None if it never does"""
+        if len(self._starts) == 1:
+            return None
+        offset = week_offset(moment)
+        index = self._segment(offset) + 1
+        boundary = self._starts[index] if index < len(self._starts) else WEEK
+        # A week-wrapping mode keeps the first and last segments equal; the change is further on
+        if boundary == WEEK and self._active[0] == self._active[-1]:
+            boundary = WEEK + self._starts[1]
+        return moment + timedelta(seconds=boundary - offset % WEEK)
+
@@ -0,0 +1,213 @@
+"""
+Single-pass streaming HTML scanner.
+
+Instead of building a document tree, the scanner tokenizes HTML with
+``html.parser`` and hands the text of each interesting part of the page
+(title, meta tags, headings, image alt text, links and visible text) to a
+callback as soon as that part is complete. The callback can end the scan
+early, and long runs of text are passed on in bounded pieces, so memory use
+does not grow with the size of the page and the input can be fed in chunks.
+"""
+
+from html.parser import HTMLParser
+from typing import Callable, Iterable, List, Optional, Tuple
+
+TITLE = 'title'
+META_DESCRIPTION = 'meta_description'
+META_KEYWORDS = 'meta_keywords'
+META_OG = 'meta_og'
+IMG_ALT = 'img_alt'
+IMG_TITLE = 'img_title'
+LINK_HREF = 'link_href'
+LINK_TEXT = 'link_text'
+TEXT = 'text'
+HEADINGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+ALL_SECTIONS = frozenset((
+    TITLE, META_DESCRIPTION, META_KEYWORDS, META_OG, IMG_ALT, IMG_TITLE,
+    LINK_HREF, LINK_TEXT, TEXT
+) + HEADINGS)
+
+# Elements whose content is never rendered as text
+_SKIPPED_TAGS = frozenset(('script', 'style', 'template'))
+
+
+class _StopScan(Exception):
+    """Raised from a handler to abandon the rest of the document"""
+
+
+class _TextBuffer:
+    """Text collected for one section, handed on in bounded pieces"""
+
+    __slots__ = ('section', 'tag', 'parts', 'length')
+
+    def __init__(self, section: str, tag: Optional[str] = None):
+        self.section = section
+        self.tag = tag
+        self.parts: List[str] = []
+        self.length = 0
+
+    def append(self, data: str):
+        self.parts.append(data)
+        self.length += len(data)
+
+    def take(self, size: Optional[int] = None, keep: int = 0) -> str:
+        """Return up to size characters, keeping the last keep of them buffered"""
+        text = ''.join(self.parts)
+        if size is None or size >= len(text):
+            size = len(text)
+        rest = text[size - keep:] if keep else text[size:]
+        self.parts = [rest] if rest else []
+        self.length = len(rest)
+        return text[:size]
+
+
+class HtmlScanner(HTMLParser):
+    """Streams HTML and reports (section, text) pairs to a callback
+
+    The callback returns a true value to end the scan; ``feed`` then
+    ignores the rest of the document.
+    """
+
+    def __init__(self, callback: Callable[[str, str], Optional[bool]],
+                 sections: Iterable[str] = ALL_SECTIONS,
+                 chunk_size: int = 8192, overlap: int = 64):
+        super().__init__(convert_charrefs=True)
+        self.callback = callback
+        self.sections = frozenset(sections)
+        self.chunk_size = chunk_size
+        # Text carried over between pieces so keywords split across them still match
+        self.overlap = overlap
+        self.stopped = False
+        self.closed = False
+        self.chars_fed = 0
+        self._skip_depth = 0
+        self._title_depth = 0
+        self._captures: List[_TextBuffer] = []
+        self._text = _TextBuffer(TEXT) if TEXT in self.sections else None
+
+    def feed(self, data: str) -> bool:
+        """Scan the next part of the document; returns True once the scan has ended"""
+        if self.stopped or not data:
+            return self.stopped
+        self.chars_fed += len(data)
+        try:
+            super().feed(data)
+        except _StopScan:
+            self._stop()
+        return self.stopped
+
+    def close(self) -> bool:
+        """Report the text still buffered at the end of the document"""
+        if self.stopped or self.closed:
+            return self.stopped
+        self.closed = True
+        try:
+            super().close()
+            while self._captures:
+                self._finish_capture(len(self._captures) - 1)
+            if self._text is not None and self._text.length:
+                self._emit(TEXT, self._text.take())
+        except _StopScan:
+            self._stop()
+        return self.stopped
+
+    def _stop(self):
+        self.stopped = True
+        self.rawdata = ''
+        self._captures = []
+        self._text = None
+
+    def _emit(self, section: str, text: str):
+        text = ' '.join(text.split())
+        if text and self.callback(section, text):
+            raise _StopScan()
+
+    def _capture(self, section: str, tag: str):
+        if section in self.sections:
+            self._captures.append(_TextBuffer(section, tag))
+
+    def _finish_capture(self, index: int):
+        capture = self._captures.pop(index)
+        if capture.length:
+            self._emit(capture.section, capture.take())
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+
+        # Tag boundaries separate words
+        self.handle_data(' ')
+        if tag == 'meta':
+            self._handle_meta(dict(attrs))
+        elif tag == 'img':
+            attributes = dict(attrs)
+            if IMG_ALT in self.sections and attributes.get('alt'):
+                self._emit(IMG_ALT, attributes['alt'])
+            if IMG_TITLE in self.sections and attributes.get('title'):
+                self._emit(IMG_TITLE, attributes['title'])
+        elif tag == 'a':
+            href = dict(attrs).get('href')
+            if LINK_HREF in self.sections and href:
+                self._emit(LINK_HREF, href)
+            self._capture(LINK_TEXT, tag)
+        elif tag == 'title':
+            self._title_depth += 1
+            self._capture(TITLE, tag)
+        elif tag in HEADINGS:
+            self._capture(tag, tag)
+
+    def _handle_meta(self, attributes: dict):
+        content = attributes.get('content')
+        if not content:
+            return
+        name = (attributes.get('name') or '').lower()
+        if name == 'description':
+            section = META_DESCRIPTION
+        elif name == 'keywords':
+            section = META_KEYWORDS
+        elif (attributes.get('property') or '').lower().startswith('og:'):
+            section = META_OG
+        else:
+            return
+        if section in self.sections:
+            self._emit(section, content)
+
+    def handle_endtag(self, tag: str):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth:
+            return
+
+        if tag == 'title':
+            self._title_depth = max(0, self._title_depth - 1)
+        for index in range(len(self._captures) - 1, -1, -1):
+            if self._captures[index].tag == tag:
+                self._finish_capture(index)
+                break
+        self.handle_data(' ')
+
+    def handle_data(self, data: str):
+        if self._skip_depth:
+            return
+        for capture in self._captures:
+            self._append(capture, data)
+        if self._text is not None and not self._title_depth:
+            self._append(self._text, data)
+
+    def _append(self, buffer: _TextBuffer, data: str):
+        buffer.append(data)
+        while buffer.length > self.chunk_size:
+            self._emit(buffer.section, buffer.take(self.chunk_size, self.overlap))
+
+
+def scan_html(html: str, callback: Callable[[str, str], Optional[bool]],
+              sections: Iterable[str] = ALL_SECTIONS) -> bool:
+    """Scan a complete document; returns True if the callback ended the scan early"""
+    scanner = HtmlScanner(callback, sections)
+    scanner.feed(html)
+    return scanner.close()
@@ -0,0 +1,142 @@
+"""
+Multi-pattern keyword matching built on an Aho-Corasick automaton.
+
+The automaton is compiled once from a keyword list and then reports every
+keyword occurrence in a single pass over the text, so the cost of a check
+depends on the length of the text rather than on the number of keywords.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .content_filters import ADULT_KEYWORDS
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed set of lowercase keywords"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        seen = set()
+        for keyword in keywords:
+            if not keyword:
+                continue
+            keyword = keyword.lower().strip()
+            if not keyword or keyword in seen:
+                continue
+            seen.add(keyword)
+            self._insert(keyword, len(self.keywords))
+            self.keywords.append(keyword)
+
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, index: int):
+        """Add a keyword path to the trie"""
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = next_node
+        self._output[node] = self._output[node] + (index,)
+
+    def _build_failure_links(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                if self._output[self._fail[child]]:
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def _scan(self, text: str, whole_words: bool, first_only: bool) -> List[Tuple[int, str]]:
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        keywords = self.keywords
+
+        hits = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not output[node]:
+                continue
+            end = position + 1
+            for index in output[node]:
+                keyword = keywords[index]
+                start = end - len(keyword)
+                if whole_words and not self.is_whole_word(text, start, end):
+                    continue
+                hits.append((start, keyword))
+                if first_only:
+                    return hits
+        return hits
+
+    @staticmethod
+    def is_whole_word(text: str, start: int, end: int) -> bool:
+        """Check that text[start:end] is not embedded inside a longer word"""
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if end < len(text) and _is_word_char(text[end]):
+            return False
+        return True
+
+    def find_all(self, text: str, whole_words: bool = False) -> List[Tuple[int, str]]:
+        """Return every (offset, keyword) occurrence in text, ordered by end offset"""
+        if not text or not self.keywords:
+            return []
+        return self._scan(text.lower(), whole_words, first_only=False)
+
+    def find_keywords(self, text: str, whole_words: bool = False) -> List[str]:
+        """Return the distinct keywords found in text, in order of appearance"""
+        found = []
+        seen = set()
+        for _, keyword in self.find_all(text, whole_words):
+            if keyword not in seen:
+                seen.add(keyword)
+                found.append(keyword)
+        return found
+
+    def search(self, text: str, whole_words: bool = False) -> Optional[str]:
+        """Return the first keyword found in text, or None"""
+        if not text or not self.keywords:
+            return None
+        hits = self._scan(text.lower(), whole_words, first_only=True)
+        return hits[0][1] if hits else None
+
+
+_adult_keyword_matcher: Optional[KeywordMatcher] = None
+
+
+def get_adult_keyword_matcher() -> KeywordMatcher:
+    """Get the shared matcher compiled from the built-in adult keyword list"""
+    global _adult_keyword_matcher
+    if _adult_keyword_matcher is None:
+        _adult_keyword_matcher = KeywordMatcher(ADULT_KEYWORDS)
+    return _adult_keyword_matcher
+
+
+def build_keyword_matcher(user_keywords: Optional[Iterable[str]] = None) -> KeywordMatcher:
+    """Compile the built-in adult keywords plus a user's blocked keywords"""
+    if not user_keywords:
+        return get_adult_keyword_matcher()
+    return KeywordMatcher(list(ADULT_KEYWORDS) + list(user_keywords))
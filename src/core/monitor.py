@@ -1,11 +1,13 @@
-import time
-import threading
-from typing import Optional
-import win32gui
-import win32process
-import psutil
+import os
+from typing import Optional, Tuple
 from PyQt5.QtCore import QObject, pyqtSignal
 from .adult_content_blocker import ContentAnalyzer
+from .block_log import get_block_log
+from .detection_pipeline import DetectionPipeline
+from .monitor_scheduler import WindowSnapshot, get_monitor_scheduler
+from .throttle import block_event_key, get_throttle
+from ..utils.database import add_change_listener, remove_change_listener
+from ..utils.keyword_manager import KeywordManager
 
 class BrowserMonitor(QObject):
     """Monitors browser windows for adult content"""
@@ -19,9 +21,18 @@ class BrowserMonitor(QObject):
         self.database_path = database_path
         self.user_email = user_email
         self.is_monitoring = False
+        self.keyword_manager = KeywordManager(database_path)
         self.content_analyzer = ContentAnalyzer()
         self.content_analyzer.content_detected.connect(self._on_content_detected)
-        self.monitor_thread = None
+        self.pipeline = DetectionPipeline(
+            'window',
+            title_rule=self._match_title,
+            domain_rule=self._match_domain,
+            url_rule=lambda url: self.content_analyzer.url_block_reason(url)
+        )
+        self.reload_keywords()
+        self.detector_name = f"window_monitor:{id(self)}"
+        self.throttle = get_throttle('window_monitor_blocks')
         print("BrowserMonitor initialized")
     
     def start(self):
@@ -37,15 +48,11 @@ class BrowserMonitor(QObject):
             print("Connected signal handlers")
             
             self.is_monitoring = True
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
-            print("Browser monitor thread started")
-            
-            # Verify thread is running
-            if self.monitor_thread.is_alive():
-                print("Monitor thread is confirmed running")
-            else:
-                print("WARNING: Monitor thread failed to start!")
+            # Keywords may have changed while stopped; later changes arrive through the listener
+            self.reload_keywords()
+            add_change_listener(self._on_database_change)
+            get_monitor_scheduler().register(self.detector_name, self._check_snapshot)
+            print("Browser monitor registered with the monitor scheduler")
         except Exception as e:
             print(f"Error starting monitor: {str(e)}")
     
@@ -53,49 +60,36 @@ class BrowserMonitor(QObject):
         """Stop monitoring"""
         print("Stopping browser monitor...")
         self.is_monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=1.0)
+        get_monitor_scheduler().unregister(self.detector_name)
+        remove_change_listener(self._on_database_change)
         print("Browser monitor stopped")
+
+    def reload_keywords(self):
+        """Recompile the keyword matcher from the user's blocked keywords"""
+        keywords = self.keyword_manager.get_keywords(self.user_email)
+        self.content_analyzer.set_user_keywords(keywords)
+        # Cached verdicts are keyed on the keywords they were reached with
+        self.pipeline.flight_tag = frozenset(keywords)
+
+    def _on_database_change(self, db_path: str, user_email: Optional[str], table: Optional[str]):
+        """Reload the keywords when they may have changed"""
+        if table not in (None, 'blocked_keywords') or user_email not in (None, self.user_email):
+            return
+        if os.path.abspath(db_path) == os.path.abspath(self.database_path):
+            self.reload_keywords()
     
-    def _monitor_loop(self):
-        """Main monitoring loop"""
-        print("Monitor loop started")
-        while self.is_monitoring:
-            try:
-                # Get all browser windows
-                browser_windows = self._get_browser_windows()
-                if browser_windows:
-                    print(f"Found {len(browser_windows)} browser windows")
-                    for window in browser_windows:
-                        self._check_window(window)
-                time.sleep(1)  # Check every second
-            except Exception as e:
-                print(f"Error in monitor loop: {e}")
-                time.sleep(2)
-    
-    def _get_browser_windows(self):
-        """Get all browser windows"""
-        windows = []
-        def enum_window_callback(hwnd, windows):
-            if win32gui.IsWindowVisible(hwnd):
-                title = win32gui.GetWindowText(hwnd)
-                if title:
-                    try:
-                        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                        process = psutil.Process(pid)
-                        if any(browser in process.name().lower() 
-                             for browser in ['chrome', 'firefox', 'msedge', 'opera']):
-                            windows.append({
-                                'hwnd': hwnd,
-                                'title': title,
-                                'pid': pid,
-                                'process': process.name()
-                            })
-                    except Exception:
-                        pass
-        
-        win32gui.EnumWindows(enum_window_callback, windows)
-        return windows
+    def _check_snapshot(self, snapshot: WindowSnapshot):
+        """Check the browser windows of one scheduler snapshot"""
+        browser_windows = snapshot.windows_of(['chrome', 'firefox', 'msedge', 'opera'])
+        if browser_windows:
+            print(f"Found {len(browser_windows)} browser windows")
+            for window in browser_windows:
+                self._check_window({
+                    'hwnd': window.hwnd,
+                    'title': window.title,
+                    'pid': window.pid,
+                    'process': window.process_name
+                })
     
     def _check_window(self, window):
         """Check a browser window for adult content"""
@@ -103,60 +97,65 @@ class BrowserMonitor(QObject):
             title = window['title']
             print(f"\nChecking window: {title}")
             
-            # First check the title itself for keywords
-            print("Checking title for keywords...")
-            try:
-                # Import both keywords and domains
-                from .content_filters import ADULT_KEYWORDS, ADULT_DOMAINS
-                
-                # Clean and prepare the title
-                title_lower = ' ' + title.lower() + ' '  # Add spaces to ensure word boundaries
-                print(f"Title being checked: {title_lower}")
-                
-                # Check keywords
-                for keyword in ADULT_KEYWORDS:
-                    keyword_lower = ' ' + keyword.lower() + ' '
-                    print(f"Checking keyword: {keyword}")
-                    if keyword_lower in title_lower:
-                        print(f"MATCH FOUND! Blocked keyword found in title: {keyword}")
-                        self._handle_blocked_content(title, f"Blocked keyword found: {keyword}")
-                        return
-                
-                # Check domains
-                for domain in ADULT_DOMAINS:
-                    if domain.lower() in title_lower:
-                        print(f"MATCH FOUND! Blocked domain found in title: {domain}")
-                        self._handle_blocked_content(title, f"Blocked domain found: {domain}")
-                        return
-                        
-                print("No keywords or domains matched in title")
-            except Exception as e:
-                print(f"Error checking keywords: {str(e)}")
-            
-            # Extract URL from title
             url = self._extract_url(title)
             if url:
                 print(f"Found URL: {url}")
-                # Analyze the URL
-                result = self.content_analyzer.analyze_url(url)
-                if result.get('is_blocked'):
-                    self._handle_blocked_content(url, result.get('reason', 'Blocked URL'))
+            # A window blocked moments ago costs one lookup, not another pipeline run
+            key = block_event_key(url, window=title)
+            if self.throttle.suppressed(key):
+                return
+            verdict = self.pipeline.run(title, url)
+            if verdict.blocked and self.throttle.allow(key):
+                get_block_log(self.database_path).record(self.user_email, url, verdict.reason, verdict.stage,
+                                                         'window_monitor')
+                self._handle_blocked_content(title if verdict.stage == 'title' else url, verdict.reason)
         except Exception as e:
             print(f"Error checking window: {e}")
+    
+    def _match_title(self, title: str) -> Optional[Tuple[str, str]]:
+        """Title rule of the detection pipeline"""
+        reason = self._check_title(title)
+        return (reason, title) if reason else None
+    
+    def _match_domain(self, url: str) -> Optional[Tuple[str, str]]:
+        """Domain rule of the detection pipeline"""
+        domain = self.content_analyzer.match_domain(url)
+        return (f'Blocked domain: {domain}', domain) if domain else None
+    
+    def _check_title(self, title: str) -> Optional[str]:
+        """Check a window title for keywords and domains, returning the block reason"""
+        print("Checking title for keywords...")
+        try:
+            from .content_filters import ADULT_DOMAINS
+            
+            # Clean and prepare the title
+            title_lower = title.lower()
+            print(f"Title being checked: {title_lower}")
+            
+            # Check keywords as whole words in a single pass
+            keyword = self.content_analyzer.keyword_matcher.search(title_lower, whole_words=True)
+            if keyword:
+                print(f"MATCH FOUND! Blocked keyword found in title: {keyword}")
+                return f"Blocked keyword found: {keyword}"
+            
+            # Check domains
+            for domain in ADULT_DOMAINS:
+                if domain.lower() in title_lower:
+                    print(f"MATCH FOUND! Blocked domain found in title: {domain}")
+                    return f"Blocked domain found: {domain}"
+                    
+            print("No keywords or domains matched in title")
+        except Exception as e:
+            print(f"Error checking keywords: {str(e)}")
+        return None
             
     def _handle_blocked_content(self, url: str, reason: str):
         """Handle blocked content detection"""
         print(f"BLOCKED: {url} - {reason}")
         self.content_detected.emit(url, reason)
-        # Trigger the block screen
-        from ..ui.blkScrn import BlockScreen
-        block_screen = BlockScreen(
-            message="Content blocked for your protection",
-            reason=reason,
-            countdown_seconds=10,
-            redirect_url="https://www.google.com"
-        )
-        block_screen.exec_()
+        # Runs on a scheduler thread: hand the block screen to the GUI thread and keep detecting
+        from ..ui.block_dispatcher import dispatch_block
+        dispatch_block(url, reason, self.user_email)
     
     def _extract_url(self, title: str) -> Optional[str]:
         """Extract URL from window title"""
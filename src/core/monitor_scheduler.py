@@ -0,0 +1,319 @@
+"""
+One polling loop shared by all window monitors.
+
+Each poll the scheduler takes a single snapshot of the visible top-level
+windows, naming their processes from the shared identity cache. The polling
+governor decides when polls happen and which of the windows are due for a
+check, and those are handed to every registered detector. The time each
+detector spends is recorded so the cost of every monitor can be compared.
+
+When a window event source is attached, title and focus changes are pushed
+to the scheduler instead: the changed windows are dispatched to every
+detector right away as a partial snapshot, and full snapshots drop to a
+slow safety-net interval.
+"""
+
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from .polling_governor import PollingGovernor, get_polling_governor
+from .process_cache import get_process_cache
+from .window_events import FOREGROUND_CHANGED, WindowEvent, WindowEventSource, create_window_event_source
+
+
+class WindowInfo(NamedTuple):
+    """A visible top-level window with a title"""
+    hwnd: int
+    title: str
+    pid: int
+    process_name: str
+    class_name: str
+
+
+class WindowSnapshot(NamedTuple):
+    """The windows visible at one moment and the processes that own them"""
+    timestamp: float
+    windows: Tuple[WindowInfo, ...]
+    foreground_hwnd: int
+    foreground_title: str
+    processes: Mapping[int, str]
+    # False for snapshots holding only the windows that changed
+    complete: bool = True
+
+    def windows_of(self, process_names: Iterable[str]) -> List[WindowInfo]:
+        """Windows whose owning process name contains any of process_names"""
+        process_names = tuple(process_names)
+        return [
+            window for window in self.windows
+            if any(name in window.process_name.lower() for name in process_names)
+        ]
+
+    @property
+    def foreground(self) -> Optional[WindowInfo]:
+        """The foreground window, if it is one of the snapshot's windows"""
+        for window in self.windows:
+            if window.hwnd == self.foreground_hwnd:
+                return window
+        return None
+
+
+# (hwnd, pid) -> window class; a window's class never changes, so it is read once
+_window_classes: Dict[Tuple[int, int], str] = {}
+
+
+def take_window_snapshot() -> WindowSnapshot:
+    """Enumerate the visible windows once, with process names from the identity cache"""
+    import win32gui
+    import win32process
+
+    process_cache = get_process_cache()
+    windows = []
+    process_names: Dict[int, str] = {}
+    window_classes: Dict[Tuple[int, int], str] = {}
+
+    def enum_window_callback(hwnd, _):
+        try:
+            if not win32gui.IsWindowVisible(hwnd):
+                return
+            title = win32gui.GetWindowText(hwnd)
+            if not title:
+                return
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            process_name = process_names.get(pid)
+            if process_name is None:
+                process_name = process_names[pid] = process_cache.name(pid)
+            class_name = _window_classes.get((hwnd, pid))
+            if class_name is None:
+                try:
+                    class_name = win32gui.GetClassName(hwnd)
+                except Exception:
+                    class_name = ''
+            window_classes[hwnd, pid] = class_name
+            windows.append(WindowInfo(hwnd, title, pid, process_name, class_name))
+        except Exception:
+            pass  # Skip any window that causes errors
+
+    win32gui.EnumWindows(enum_window_callback, None)
+    # Keeping only the windows seen now also forgets closed (and reused) handles
+    _window_classes.clear()
+    _window_classes.update(window_classes)
+    foreground_hwnd = win32gui.GetForegroundWindow()
+    return WindowSnapshot(
+        timestamp=time.time(),
+        windows=tuple(windows),
+        foreground_hwnd=foreground_hwnd,
+        foreground_title=win32gui.GetWindowText(foreground_hwnd) if foreground_hwnd else '',
+        processes=MappingProxyType(process_names)
+    )
+
+
+def lookup_process_name(pid: int) -> str:
+    """Name of the process with pid, or '' if it cannot be looked up"""
+    return get_process_cache().name(pid)
+
+
+class _Detector:
+    """A registered detector and its cost accounting"""
+
+    __slots__ = ('name', 'callback', 'calls', 'errors', 'total_time', 'max_time')
+
+    def __init__(self, name: str, callback: Callable[[WindowSnapshot], None]):
+        self.name = name
+        self.callback = callback
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+
+class MonitorScheduler:
+    """Polls windows when the governor says so and fans the due windows out to every detector"""
+
+    def __init__(self, snapshot_source: Callable[[], WindowSnapshot] = take_window_snapshot,
+                 event_source: Optional[WindowEventSource] = None,
+                 governor: Optional[PollingGovernor] = None,
+                 process_name_source: Callable[[int], str] = lookup_process_name):
+        self.snapshot_source = snapshot_source
+        self.event_source = event_source
+        self.governor = governor or get_polling_governor()
+        self.process_name_source = process_name_source
+        self._detectors: Dict[str, _Detector] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # hwnd -> latest event not dispatched yet; bursts for one window coalesce
+        self._pending_events: Dict[int, WindowEvent] = {}
+        self._processes: Dict[int, str] = {}
+        self._foreground: Tuple[int, str] = (0, '')
+        self.events = 0
+        self.event_dispatches = 0
+        self.snapshots = 0
+        self.snapshot_errors = 0
+        self.snapshot_time = 0.0
+
+    def register(self, name: str, callback: Callable[[WindowSnapshot], None]):
+        """Run callback with the windows due for a check at every poll and window event"""
+        with self._lock:
+            self._detectors[name] = _Detector(name, callback)
+        self.start()
+        self._wake.set()
+
+    def unregister(self, name: str):
+        """Stop running a detector"""
+        with self._lock:
+            self._detectors.pop(name, None)
+
+    def start(self):
+        """Start the polling thread if it is not running yet"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='monitor-scheduler', daemon=True)
+            self._thread.start()
+        if self.event_source is not None:
+            try:
+                self.event_source.start(self._on_window_event)
+            except Exception as e:
+                print(f"Error starting window event source, polling instead: {e}")
+                self.event_source = None
+
+    def stop(self):
+        """Stop the polling thread"""
+        with self._lock:
+            self._running = False
+            thread = self._thread
+        if self.event_source is not None:
+            self.event_source.stop()
+        self._wake.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def _on_window_event(self, event: WindowEvent):
+        """Queue an event from the source's thread and wake the scheduler"""
+        with self._lock:
+            self._pending_events[event.hwnd] = event
+            self.events += 1
+        self._wake.set()
+
+    def _events_active(self) -> bool:
+        return self.event_source is not None and self.event_source.is_running
+
+    def _run(self):
+        print("Monitor scheduler started")
+        next_poll = time.monotonic()
+        while self._running:
+            # Clear before draining so an event arriving meanwhile wakes the next wait
+            self._wake.clear()
+            with self._lock:
+                events = list(self._pending_events.values())
+                self._pending_events.clear()
+                detectors = list(self._detectors.values())
+            for event in events:
+                self.governor.note_event(event)
+            if events and detectors:
+                snapshot = self._event_snapshot(events)
+                self.event_dispatches += 1
+                for detector in detectors:
+                    self._run_detector(detector, snapshot)
+
+            now = time.monotonic()
+            if detectors and now >= next_poll:
+                snapshot = self._take_snapshot()
+                if snapshot is not None:
+                    self._processes = dict(snapshot.processes)
+                    self._foreground = (snapshot.foreground_hwnd, snapshot.foreground_title)
+                    snapshot = self.governor.select(snapshot, now)
+                    if snapshot.windows or snapshot.complete:
+                        for detector in detectors:
+                            self._run_detector(detector, snapshot)
+                next_poll = now + self.governor.next_delay(now, self._events_active())
+
+            # With nothing registered, sleep until a detector is added
+            self._wake.wait(None if not detectors else max(0.0, next_poll - time.monotonic()))
+        print("Monitor scheduler stopped")
+
+    def _event_snapshot(self, events: List[WindowEvent]) -> WindowSnapshot:
+        """A partial snapshot of the windows named by events"""
+        windows = []
+        for event in events:
+            process_name = self._processes.get(event.pid)
+            if process_name is None:
+                process_name = self._processes[event.pid] = self.process_name_source(event.pid)
+            if event.kind == FOREGROUND_CHANGED or event.hwnd == self._foreground[0]:
+                self._foreground = (event.hwnd, event.title)
+            windows.append(WindowInfo(event.hwnd, event.title, event.pid, process_name, event.class_name))
+        return WindowSnapshot(
+            timestamp=time.time(),
+            windows=tuple(windows),
+            foreground_hwnd=self._foreground[0],
+            foreground_title=self._foreground[1],
+            processes=MappingProxyType(dict(self._processes)),
+            complete=False
+        )
+
+    def _take_snapshot(self) -> Optional[WindowSnapshot]:
+        started = time.perf_counter()
+        try:
+            return self.snapshot_source()
+        except Exception as e:
+            self.snapshot_errors += 1
+            print(f"Error taking window snapshot: {e}")
+            return None
+        finally:
+            self.snapshots += 1
+            self.snapshot_time += time.perf_counter() - started
+
+    def _run_detector(self, detector: _Detector, snapshot: WindowSnapshot):
+        started = time.perf_counter()
+        try:
+            detector.callback(snapshot)
+        except Exception as e:
+            detector.errors += 1
+            print(f"Error in detector {detector.name}: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            detector.calls += 1
+            detector.total_time += elapsed
+            detector.max_time = max(detector.max_time, elapsed)
+
+    def stats(self) -> Dict:
+        """Snapshot cost and per-detector call counts and time spent"""
+        with self._lock:
+            detectors = list(self._detectors.values())
+        return {
+            'events': self.events,
+            'event_dispatches': self.event_dispatches,
+            'event_source': type(self.event_source).__name__ if self._events_active() else None,
+            'snapshots': self.snapshots,
+            'snapshot_errors': self.snapshot_errors,
+            'snapshot_time': self.snapshot_time,
+            'governor': self.governor.stats(),
+            'avg_snapshot_ms': self.snapshot_time / self.snapshots * 1000 if self.snapshots else 0.0,
+            'detectors': {
+                detector.name: {
+                    'calls': detector.calls,
+                    'errors': detector.errors,
+                    'total_time': detector.total_time,
+                    'avg_ms': detector.total_time / detector.calls * 1000 if detector.calls else 0.0,
+                    'max_ms': detector.max_time * 1000
+                }
+                for detector in detectors
+            }
+        }
+
+
+_monitor_scheduler: Optional[MonitorScheduler] = None
+_monitor_scheduler_lock = threading.Lock()
+
+
+def get_monitor_scheduler() -> MonitorScheduler:
+    """Get the scheduler shared by all window monitors"""
+    global _monitor_scheduler
+    with _monitor_scheduler_lock:
+        if _monitor_scheduler is None:
+            _monitor_scheduler = MonitorScheduler(event_source=create_window_event_source())
+        return _monitor_scheduler
@@ -0,0 +1,186 @@
+"""
+In-memory, versioned snapshots of a user's blocking policy.
+
+A snapshot bundles the user's blocked keywords (with their compiled
+matchers), the strict matching flag and the user's settings. Snapshots are
+immutable; when ``Database`` or ``KeywordManager`` writes, the store builds
+a new snapshot and swaps the reference, so analysis code reads the policy
+without touching SQLite.
+"""
+
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, NamedTuple, Optional, Tuple
+
+from .keyword_matcher import KeywordMatcher
+from ..utils.database import add_change_listener
+from ..utils.db_connection import get_connection
+
+DEFAULT_BLOCKED_KEYWORDS = frozenset({
+    'porn', 'xxx', 'adult content', 'nsfw', 'nude', 'naked',
+    'sex', 'explicit', 'adult', 'mature', '18+'
+})
+
+
+class PolicySnapshot(NamedTuple):
+    """Immutable view of one user's blocking policy"""
+    version: int
+    user_email: str
+    keywords: FrozenSet[str]
+    strict_matching: bool
+    settings: Mapping[str, Any]
+    keyword_matcher: KeywordMatcher
+    compact_matcher: KeywordMatcher
+    compact_keywords: Mapping[str, str]
+
+    def get_setting(self, setting_name: str, default: Any = None) -> Any:
+        """Get a typed setting value, or default if it is not set"""
+        value = self.settings.get(setting_name)
+        return default if value is None else value
+
+
+def _convert_setting(value: str, value_type: Optional[str]) -> Any:
+    """Convert a stored setting the same way Database.get_setting does"""
+    if value_type == 'boolean':
+        return value.lower() == 'true'
+    if value_type == 'number':
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            return None
+    return value
+
+
+class PolicyStore:
+    """Holds the current policy snapshot for one user and rebuilds it on writes"""
+
+    def __init__(self, database_path: str, user_email: str):
+        self.database_path = database_path
+        self.user_email = user_email
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Optional[PolicySnapshot] = None
+        self._custom_keywords: Optional[FrozenSet[str]] = None
+
+    @property
+    def snapshot(self) -> PolicySnapshot:
+        """The current snapshot, loaded on first use"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+
+    def refresh(self, reload_keywords: bool = True) -> PolicySnapshot:
+        """Reload the policy from the database and swap in a new snapshot"""
+        with self._lock:
+            settings, custom_keywords = self._load(reload_keywords)
+            keywords = custom_keywords.union(self._default_keywords(settings))
+            strict_value = settings.get('strict_keyword_matching')
+            strict_matching = str(strict_value).lower() == 'true' if strict_value is not None else True
+
+            previous = self._snapshot
+            if previous is not None and previous.keywords == keywords:
+                keyword_matcher = previous.keyword_matcher
+                compact_matcher = previous.compact_matcher
+                compact_keywords = previous.compact_keywords
+            else:
+                keyword_matcher, compact_matcher, compact_keywords = self._compile(keywords)
+
+            self._version += 1
+            self._snapshot = PolicySnapshot(
+                version=self._version,
+                user_email=self.user_email,
+                keywords=keywords,
+                strict_matching=strict_matching,
+                settings=MappingProxyType(settings),
+                keyword_matcher=keyword_matcher,
+                compact_matcher=compact_matcher,
+                compact_keywords=compact_keywords
+            )
+            return self._snapshot
+
+    def _load(self, reload_keywords: bool) -> Tuple[Dict[str, Any], FrozenSet[str]]:
+        """Read the user's settings and, if needed, custom keywords"""
+        settings = {}
+        custom_keywords = self._custom_keywords
+        try:
+            with get_connection(self.database_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT setting_name, setting_value, setting_type FROM user_settings
+                    WHERE user_email = ?
+                ''', (self.user_email,))
+                for name, value, value_type in cursor.fetchall():
+                    settings[name] = _convert_setting(value, value_type)
+
+                if reload_keywords or custom_keywords is None:
+                    cursor.execute(
+                        'SELECT keyword FROM blocked_keywords WHERE user_email = ?',
+                        (self.user_email,)
+                    )
+                    custom_keywords = frozenset(row[0].lower() for row in cursor.fetchall())
+        except Exception as e:
+            print(f"Error loading policy for {self.user_email}: {e}")
+
+        self._custom_keywords = custom_keywords if custom_keywords is not None else frozenset()
+        return settings, self._custom_keywords
+
+    @staticmethod
+    def _default_keywords(settings: Dict[str, Any]) -> FrozenSet[str]:
+        """Default keywords from the user's settings, falling back to the built-in set"""
+        value = settings.get('default_keywords')
+        if not value:
+            return DEFAULT_BLOCKED_KEYWORDS
+        try:
+            return frozenset(json.loads(value))
+        except (TypeError, json.JSONDecodeError):
+            return frozenset()
+
+    @staticmethod
+    def _compile(keywords: FrozenSet[str]) -> Tuple[KeywordMatcher, KeywordMatcher, Mapping[str, str]]:
+        """Build the phrase matcher and the space-insensitive matcher for a keyword set"""
+        compact_keywords = {keyword.lower().strip().replace(' ', ''): keyword for keyword in keywords}
+        return (
+            KeywordMatcher(keywords),
+            KeywordMatcher(compact_keywords),
+            MappingProxyType(compact_keywords)
+        )
+
+
+_stores: Dict[Tuple[str, str], PolicyStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_policy_store(database_path: str, user_email: str) -> PolicyStore:
+    """Get the shared policy store for a database and user"""
+    key = (os.path.abspath(database_path), user_email)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = PolicyStore(database_path, user_email)
+        return store
+
+
+def get_policy(database_path: str, user_email: str) -> PolicySnapshot:
+    """Get the current policy snapshot for a database and user"""
+    return get_policy_store(database_path, user_email).snapshot
+
+
+def _on_database_change(db_path: str, user_email: Optional[str], table: Optional[str]):
+    """Rebuild the snapshots affected by a database write"""
+    if table not in (None, 'user_settings', 'blocked_keywords'):
+        return
+    db_path = os.path.abspath(db_path)
+    with _stores_lock:
+        stores = [
+            store for (path, email), store in _stores.items()
+            if path == db_path and (user_email is None or email == user_email)
+        ]
+    for store in stores:
+        # Settings changes leave the keyword rows alone, so keep the matchers
+        store.refresh(reload_keywords=table != 'user_settings')
+
+
+add_change_listener(_on_database_change)
@@ -0,0 +1,237 @@
+"""
+Adaptive polling policy for the window monitors.
+
+Rather than every monitor sleeping for its own fixed interval, one governor
+decides when the scheduler polls and which windows of a snapshot are worth
+checking:
+
+* right after the focus changes the foreground window is polled quickly,
+  then settles to a steady rate;
+* background windows whose title has not changed are checked less and less
+  often, doubling their interval up to a ceiling, and are checked again at
+  once when their title changes;
+* while the user is idle, background checks pause and polling slows down.
+
+All the numbers live in ``PollingPolicy``, so CPU use can be traded against
+detection latency in one place, and ``stats()`` reports the rates actually
+achieved.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from .monitor_scheduler import WindowSnapshot
+    from .window_events import WindowEvent
+
+
+class PollingPolicy:
+    """The intervals, in seconds, that the governor works with"""
+
+    def __init__(self, focus_interval: float = 0.1, focus_boost: float = 2.0,
+                 foreground_interval: float = 0.5, background_min: float = 1.0,
+                 background_max: float = 30.0, backoff_factor: float = 2.0,
+                 idle_after: float = 120.0, idle_interval: float = 10.0,
+                 event_fallback_interval: float = 5.0):
+        self.focus_interval = focus_interval  # Foreground polling right after a focus change
+        self.focus_boost = focus_boost  # How long the fast foreground polling lasts
+        self.foreground_interval = foreground_interval  # Steady foreground polling
+        self.background_min = background_min  # Background window whose title just changed
+        self.background_max = background_max  # Ceiling of the background back-off
+        self.backoff_factor = backoff_factor
+        self.idle_after = idle_after  # Seconds without input before the user counts as idle
+        self.idle_interval = idle_interval  # Polling while idle
+        self.event_fallback_interval = event_fallback_interval  # Polling when window events arrive
+
+
+def idle_seconds() -> float:
+    """Seconds since the last keyboard or mouse input, or 0 if unknown"""
+    if sys.platform != 'win32':
+        return 0.0
+    import ctypes
+    from ctypes import wintypes
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [('cbSize', wintypes.UINT), ('dwTime', wintypes.DWORD)]
+
+    info = LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(info)
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+        return 0.0
+    # Both counters wrap around every 49.7 days
+    elapsed = (ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF
+    return elapsed / 1000.0
+
+
+class _WindowState:
+    """Back-off state of one window"""
+
+    __slots__ = ('title', 'interval', 'next_due')
+
+    def __init__(self, title: str, interval: float, next_due: float):
+        self.title = title
+        self.interval = interval
+        self.next_due = next_due
+
+
+class PollingGovernor:
+    """Decides when to poll and which windows of each snapshot to check"""
+
+    RATE_WINDOW = 60.0  # Seconds over which effective rates are measured
+
+    def __init__(self, policy: Optional[PollingPolicy] = None,
+                 idle_source: Callable[[], float] = idle_seconds):
+        self.policy = policy or PollingPolicy()
+        self.idle_source = idle_source
+        self._lock = threading.Lock()
+        self._windows: Dict[int, _WindowState] = {}
+        self._foreground = 0
+        self._boost_until = 0.0
+        self._idle = False
+        self._polls = deque(maxlen=4096)
+        self._checks = deque(maxlen=4096)
+        self.polls = 0
+        self.windows_checked = 0
+        self.windows_skipped = 0
+        self.focus_changes = 0
+
+    def _update_idle(self) -> bool:
+        try:
+            self._idle = self.idle_source() >= self.policy.idle_after
+        except Exception:
+            self._idle = False
+        return self._idle
+
+    def _focus_changed(self, hwnd: int, now: float):
+        self._foreground = hwnd
+        self._boost_until = now + self.policy.focus_boost
+        self.focus_changes += 1
+
+    def note_event(self, event: 'WindowEvent', now: Optional[float] = None):
+        """Take a pushed window event into account"""
+        from .window_events import FOREGROUND_CHANGED
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if event.kind == FOREGROUND_CHANGED and event.hwnd != self._foreground:
+                self._focus_changed(event.hwnd, now)
+            state = self._windows.get(event.hwnd)
+            if state is not None and state.title != event.title:
+                # A title change restarts the window's back-off
+                state.title = event.title
+                state.interval = self.policy.background_min
+                state.next_due = now + state.interval
+
+    def select(self, snapshot: 'WindowSnapshot', now: Optional[float] = None) -> 'WindowSnapshot':
+        """Keep the windows of a polled snapshot that are due for a check"""
+        now = time.monotonic() if now is None else now
+        policy = self.policy
+        idle = self._update_idle()
+        due = []
+        with self._lock:
+            if snapshot.foreground_hwnd != self._foreground:
+                self._focus_changed(snapshot.foreground_hwnd, now)
+            for window in snapshot.windows:
+                state = self._windows.get(window.hwnd)
+                if window.hwnd == self._foreground:
+                    # The foreground window is checked on every poll; the poll rate follows it
+                    if state is None:
+                        state = self._windows[window.hwnd] = _WindowState(window.title, policy.background_min, now)
+                    state.title = window.title
+                    state.interval = policy.background_min
+                    due.append(window)
+                elif state is None or state.title != window.title:
+                    self._windows[window.hwnd] = _WindowState(
+                        window.title, policy.background_min, now + policy.background_min
+                    )
+                    due.append(window)
+                elif not idle and now >= state.next_due:
+                    state.interval = min(policy.background_max, state.interval * policy.backoff_factor)
+                    state.next_due = now + state.interval
+                    due.append(window)
+
+            if snapshot.complete:
+                present = {window.hwnd for window in snapshot.windows}
+                for hwnd in [hwnd for hwnd in self._windows if hwnd not in present]:
+                    del self._windows[hwnd]
+
+            self.polls += 1
+            self.windows_checked += len(due)
+            self.windows_skipped += len(snapshot.windows) - len(due)
+            self._polls.append(now)
+            self._checks.append((now, len(due)))
+
+        if len(due) == len(snapshot.windows):
+            return snapshot
+        return snapshot._replace(windows=tuple(due), complete=False)
+
+    def next_delay(self, now: Optional[float] = None, events_active: bool = False) -> float:
+        """Seconds until the scheduler should poll again"""
+        now = time.monotonic() if now is None else now
+        policy = self.policy
+        if self._idle:
+            return policy.idle_interval
+        if events_active:
+            # Pushed events cover changes; polling only catches what they miss
+            return policy.event_fallback_interval
+        if now < self._boost_until:
+            return policy.focus_interval
+        with self._lock:
+            next_background = min((state.next_due for hwnd, state in self._windows.items()
+                                   if hwnd != self._foreground), default=None)
+        delay = policy.foreground_interval
+        if next_background is not None:
+            delay = min(delay, next_background - now)
+        return max(policy.focus_interval, delay)
+
+    def foreground_delay(self) -> float:
+        """Interval for loops that only watch the foreground page, such as a driven browser"""
+        if self._update_idle():
+            return self.policy.idle_interval
+        if time.monotonic() < self._boost_until:
+            return self.policy.focus_interval
+        return self.policy.foreground_interval
+
+    def mode(self, now: Optional[float] = None) -> str:
+        """'idle', 'focus' (just after a focus change) or 'steady'"""
+        now = time.monotonic() if now is None else now
+        if self._idle:
+            return 'idle'
+        return 'focus' if now < self._boost_until else 'steady'
+
+    def stats(self) -> Dict:
+        """Effective polling and check rates over the last minute, and totals"""
+        now = time.monotonic()
+        since = now - self.RATE_WINDOW
+        with self._lock:
+            recent_polls = [t for t in self._polls if t >= since]
+            recent_checks = sum(count for t, count in self._checks if t >= since)
+            intervals = [state.interval for hwnd, state in self._windows.items() if hwnd != self._foreground]
+        span = min(self.RATE_WINDOW, now - recent_polls[0]) if recent_polls else 0.0
+        return {
+            'mode': self.mode(now),
+            'polls': self.polls,
+            'windows_checked': self.windows_checked,
+            'windows_skipped': self.windows_skipped,
+            'focus_changes': self.focus_changes,
+            'poll_rate': len(recent_polls) / span if span else 0.0,
+            'check_rate': recent_checks / span if span else 0.0,
+            'background_windows': len(intervals),
+            'avg_background_interval': sum(intervals) / len(intervals) if intervals else 0.0
+        }
+
+
+_polling_governor: Optional[PollingGovernor] = None
+_polling_governor_lock = threading.Lock()
+
+
+def get_polling_governor() -> PollingGovernor:
+    """Get the polling governor shared by all monitors"""
+    global _polling_governor
+    with _polling_governor_lock:
+        if _polling_governor is None:
+            _polling_governor = PollingGovernor()
+        return _polling_governor
@@ -0,0 +1,161 @@
+"""
+Cache of process identities shared by the window monitors.
+
+Window snapshots need the name of the process behind every window, and
+looking it up costs a few system calls per process. Identities are cached
+by pid and tagged with the process creation time, so a pid that is reused
+by a new process is never mistaken for the old one. The cache is checked
+against the running processes periodically with one ``psutil.pids()``
+call; processes that exited are dropped, and entries that are still alive
+have their creation time re-checked. Between checks a lookup of a known
+pid costs no system call at all.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+BROWSER_PROCESS_NAMES = frozenset({
+    'chrome.exe', 'firefox.exe', 'msedge.exe', 'opera.exe', 'brave.exe', 'iexplore.exe',
+    'chrome', 'firefox', 'msedge', 'opera', 'brave', 'chromium', 'chromium-browser'
+})
+
+
+class ProcessIdentity(NamedTuple):
+    """Who a process is: the fields monitors need, tagged with its creation time"""
+    pid: int
+    create_time: float
+    name: str
+    exe: str
+    is_browser: bool
+
+
+def read_process_identity(pid: int) -> Optional[ProcessIdentity]:
+    """Look up a process, or None if it no longer exists"""
+    import psutil
+
+    try:
+        process = psutil.Process(pid)
+        with process.oneshot():
+            create_time = process.create_time()
+            name = process.name()
+            try:
+                exe = process.exe()
+            except psutil.AccessDenied:
+                exe = ''
+    except psutil.Error:
+        return None
+    return ProcessIdentity(pid, create_time, name, exe, name.lower() in BROWSER_PROCESS_NAMES)
+
+
+def _running_pids():
+    import psutil
+    return set(psutil.pids())
+
+
+def _create_time(pid: int) -> Optional[float]:
+    import psutil
+
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+
+class ProcessIdentityCache:
+    """Process identities by pid, revalidated against the process list periodically"""
+
+    def __init__(self, refresh_interval: float = 10.0,
+                 lookup: Callable[[int], Optional[ProcessIdentity]] = read_process_identity,
+                 running_pids: Callable[[], set] = _running_pids,
+                 create_time: Callable[[int], Optional[float]] = _create_time):
+        self.refresh_interval = refresh_interval
+        self._lookup = lookup
+        self._running_pids = running_pids
+        self._create_time = create_time
+        self._identities: Dict[int, ProcessIdentity] = {}
+        self._lock = threading.Lock()
+        self._last_refresh = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.refreshes = 0
+
+    def get(self, pid: int) -> Optional[ProcessIdentity]:
+        """Identity of pid, looked up only if it is not cached"""
+        self.refresh_if_due()
+        with self._lock:
+            identity = self._identities.get(pid)
+            if identity is not None:
+                self.hits += 1
+                return identity
+            self.misses += 1
+        identity = self._lookup(pid)
+        if identity is not None:
+            with self._lock:
+                self._identities[pid] = identity
+        return identity
+
+    def name(self, pid: int) -> str:
+        """Process name of pid, or '' if it cannot be looked up"""
+        identity = self.get(pid)
+        return identity.name if identity is not None else ''
+
+    def invalidate(self, pid: Optional[int] = None):
+        """Forget one pid, for example when its process exits, or everything"""
+        with self._lock:
+            if pid is None:
+                self.invalidations += len(self._identities)
+                self._identities.clear()
+            elif self._identities.pop(pid, None) is not None:
+                self.invalidations += 1
+
+    def refresh_if_due(self):
+        """Run refresh() if refresh_interval has passed since the last one"""
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.refresh()
+
+    def refresh(self):
+        """Drop processes that exited and pids that now belong to another process"""
+        self._last_refresh = time.monotonic()
+        try:
+            running = self._running_pids()
+        except Exception as e:
+            print(f"Error listing processes: {e}")
+            return
+        with self._lock:
+            cached = list(self._identities.values())
+        self.refreshes += 1
+        for identity in cached:
+            if identity.pid not in running or self._create_time(identity.pid) != identity.create_time:
+                with self._lock:
+                    if self._identities.get(identity.pid) is identity:
+                        del self._identities[identity.pid]
+                        self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Size, hit rate and invalidation counters"""
+        with self._lock:
+            size = len(self._identities)
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'refreshes': self.refreshes,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+_process_cache: Optional[ProcessIdentityCache] = None
+_process_cache_lock = threading.Lock()
+
+
+def get_process_cache() -> ProcessIdentityCache:
+    """Get the process identity cache shared by all monitors"""
+    global _process_cache
+    with _process_cache_lock:
+        if _process_cache is None:
+            _process_cache = ProcessIdentityCache()
+        return _process_cache
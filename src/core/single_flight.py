@@ -0,0 +1,62 @@
+"""
+Single-flight deduplication of concurrent work.
+
+While a piece of work for a key is in flight, every other caller asking for
+the same key gets the same future instead of starting the work again. Once
+the future completes the key is forgotten, so the next call starts fresh;
+longer-lived reuse of results is the job of the verdict cache.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Shares one in-flight future between concurrent callers with the same key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.started = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, start: Callable[[], Future]) -> Future:
+        """Return the in-flight future for key, calling start() only if there is none"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future
+            future = start()
+            self._in_flight[key] = future
+            self.started += 1
+        future.add_done_callback(lambda future: self._forget(key, future))
+        return future
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check whether work for key is currently running"""
+        with self._lock:
+            return key in self._in_flight
+
+    def _forget(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """How much work was started and how many callers joined work already running"""
+        with self._lock:
+            return {
+                'started': self.started,
+                'shared': self.shared,
+                'in_flight': len(self._in_flight)
+            }
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the single-flight group shared by all monitors"""
+    return _single_flight
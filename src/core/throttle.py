@@ -0,0 +1,171 @@
+"""
+Throttling and de-duplication of block events.
+
+The same offending tab is seen on every poll and by several monitors, and
+each sighting used to mean another pipeline run, another database write and
+another block screen request. Events are now keyed, usually by URL, reason
+and window (``block_event_key``), and each key gets:
+
+* a suppression window: once an event is let through, the same key is
+  dropped outright for ``suppress_for`` seconds;
+* optionally a token bucket: at most ``capacity`` events in a burst,
+  refilled at ``refill_rate`` events per second, so a key that keeps
+  coming back after every suppression window is still limited over the
+  longer term.
+
+The block monitors use the suppression window alone: a tab that stays open
+must be blocked again as soon as its window ends, and a bucket would leave
+it open until a token came back. A bucket is only for events whose loss
+costs nothing but a repeated side effect.
+
+Checking a key is a dictionary lookup, so monitors ask ``suppressed`` before
+running the pipeline for a window and skip the work entirely. Throttles are
+named and shared (``get_throttle``), and every one counts what it let
+through and what it dropped.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from .verdict_cache import title_key, url_key
+
+
+def block_event_key(url: Optional[str] = None, reason: str = '', window: Hashable = '') -> Tuple:
+    """Throttle key of a block event; a window title is hashed, a handle is used as is"""
+    if isinstance(window, str) and window:
+        window = title_key(window)
+    return (url_key(url) if url else '', reason or '', window)
+
+
+class _Bucket:
+    """Token bucket and suppression window of one key"""
+
+    __slots__ = ('tokens', 'updated', 'suppressed_until')
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.suppressed_until = 0.0
+
+
+class EventThrottle:
+    """Suppression windows, and optionally token buckets, per event key"""
+
+    def __init__(self, name: str, capacity: Optional[float] = None, refill_rate: float = 1.0 / 60,
+                 suppress_for: float = 10.0, max_keys: int = 4096,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.capacity = capacity  # Events let through in a burst; None for no token bucket
+        self.refill_rate = refill_rate  # Tokens regained per second
+        self.suppress_for = suppress_for  # Seconds a key is dropped after an event is let through
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: 'OrderedDict[Hashable, _Bucket]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.suppressed_count = 0  # Dropped inside a suppression window
+        self.limited = 0  # Dropped for lack of tokens
+
+    def _bucket(self, key: Hashable, now: float) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.capacity or 0.0, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            if self.capacity is not None:
+                bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.refill_rate)
+            bucket.updated = now
+        return bucket
+
+    def allow(self, key: Hashable) -> bool:
+        """Let an event through, taking a token and starting its suppression window, or drop it"""
+        now = self.clock()
+        with self._lock:
+            bucket = self._bucket(key, now)
+            if now < bucket.suppressed_until:
+                self.suppressed_count += 1
+                return False
+            if self.capacity is not None:
+                if bucket.tokens < 1.0:
+                    self.limited += 1
+                    return False
+                bucket.tokens -= 1.0
+            bucket.suppressed_until = now + self.suppress_for
+            self.allowed += 1
+            return True
+
+    def suppressed(self, key: Hashable) -> bool:
+        """Check whether an event for key would be dropped, counting it if so; takes no token"""
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return False
+            if now < bucket.suppressed_until:
+                self.suppressed_count += 1
+                return True
+            if (self.capacity is not None
+                    and bucket.tokens + (now - bucket.updated) * self.refill_rate < 1.0):
+                self.limited += 1
+                return True
+            return False
+
+    def remaining(self, key: Hashable) -> float:
+        """Seconds left in key's suppression window, or 0"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            return max(0.0, bucket.suppressed_until - self.clock()) if bucket is not None else 0.0
+
+    def suppress(self, key: Hashable, seconds: Optional[float] = None):
+        """Drop events for key for the next seconds (suppress_for by default), without taking a token"""
+        now = self.clock()
+        with self._lock:
+            bucket = self._bucket(key, now)
+            bucket.suppressed_until = max(bucket.suppressed_until,
+                                          now + (self.suppress_for if seconds is None else seconds))
+
+    def reset(self, key: Optional[Hashable] = None):
+        """Forget one key, or every key, e.g. when blocking is turned off and on again"""
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Events let through and dropped, and the number of keys tracked"""
+        with self._lock:
+            keys = len(self._buckets)
+        dropped = self.suppressed_count + self.limited
+        total = self.allowed + dropped
+        return {
+            'allowed': self.allowed,
+            'suppressed': self.suppressed_count,
+            'limited': self.limited,
+            'keys': keys,
+            'drop_rate': dropped / total if total else 0.0
+        }
+
+
+_throttles: Dict[str, EventThrottle] = {}
+_throttles_lock = threading.Lock()
+
+
+def get_throttle(name: str, **config) -> EventThrottle:
+    """Get the shared throttle called name, created with config on first use"""
+    with _throttles_lock:
+        throttle = _throttles.get(name)
+        if throttle is None:
+            throttle = _throttles[name] = EventThrottle(name, **config)
+        return throttle
+
+
+def throttle_stats() -> Dict[str, Dict[str, float]]:
+    """Counters of every shared throttle by name"""
+    with _throttles_lock:
+        throttles = list(_throttles.values())
+    return {throttle.name: throttle.stats() for throttle in throttles}
@@ -0,0 +1,193 @@
+"""
+Compiles the suspicious URL rules into a single regular expression.
+
+All rules are joined into one alternation that is scanned once per URL to
+find the positions where some rule matches. At each such position a second
+alternation with one named group per rule reports which rule fired, and the
+remaining rules are retried anchored at that position so that every rule
+that matches the URL is still reported.
+
+Case-insensitive rules without uppercase literals are matched against the
+lowercased URL without the ``(?i)`` flag. ``re`` can only use its fast
+first-character scan for case-sensitive alternations without groups, so
+this keeps the no-match case, which is by far the most common, to one cheap
+pass instead of one search per rule.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .content_filters import SUSPICIOUS_URL_PATTERNS
+from .keyword_matcher import KeywordMatcher
+
+# URLs longer than this are truncated before matching to bound worst-case time
+MAX_URL_LENGTH = 4096
+
+# URL scoring: points per keyword and per suspicious pattern, and the score that blocks
+URL_KEYWORD_SCORE = 10
+URL_PATTERN_SCORE = 15
+URL_BLOCK_SCORE = 30
+
+# A quantified group whose body also contains a quantifier, e.g. (a+)+ or (\w*)*
+_NESTED_QUANTIFIER = re.compile(
+    r'\((?:[^()\\]|\\.)*(?:[*+]|\{\d*,\d*\})(?:[^()\\]|\\.)*\)(?:[*+]|\{\d*,\d*\})'
+)
+
+_GLOBAL_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+_ESCAPE = re.compile(r'\\.')
+
+
+def is_backtracking_prone(pattern: str) -> bool:
+    """Check a rule for nested quantifiers that can backtrack catastrophically"""
+    return bool(_NESTED_QUANTIFIER.search(pattern))
+
+
+class _RuleGroup:
+    """Rules scanned together by one combined alternation"""
+
+    def __init__(self, lowercase: bool):
+        self.lowercase = lowercase
+        self.rules: Dict[str, Tuple[str, re.Pattern]] = {}
+        self.branches: List[str] = []
+        self.scanner: Optional[re.Pattern] = None
+        self.identifier: Optional[re.Pattern] = None
+
+    def add(self, name: str, pattern: str, body: str):
+        self.rules[name] = (pattern, re.compile(body))
+        self.branches.append(body)
+
+    def compile(self):
+        if not self.branches:
+            return
+        self.scanner = re.compile('|'.join(f'(?:{body})' for body in self.branches))
+        self.identifier = re.compile('|'.join(
+            f'(?P<{name}>{body})' for name, body in zip(self.rules, self.branches)
+        ))
+
+    def scan(self, url: str, fired: Dict[str, str]):
+        if self.scanner is None:
+            return
+        text = url.lower() if self.lowercase else url
+        pending = [name for name in self.rules if name not in fired]
+        position = 0
+        while pending:
+            match = self.scanner.search(text, position)
+            if not match:
+                break
+            position = match.start()
+
+            # Name the rule that won at this position, then retry the rest
+            # anchored here, since several rules can match at one position
+            winner = self.identifier.match(text, position)
+            if winner and winner.lastgroup in pending:
+                fired[winner.lastgroup] = winner.group(winner.lastgroup)
+                pending.remove(winner.lastgroup)
+            for name in list(pending):
+                rule_match = self.rules[name][1].match(text, position)
+                if rule_match:
+                    fired[name] = rule_match.group(0)
+                    pending.remove(name)
+            position += 1
+
+
+class UrlPatternSet:
+    """Suspicious URL rules compiled into a combined alternation"""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns: List[str] = []
+        self.rejected: List[str] = []
+        self._names: List[str] = []
+        self._folded = _RuleGroup(lowercase=True)
+        self._verbatim = _RuleGroup(lowercase=False)
+
+        for pattern in patterns:
+            if is_backtracking_prone(pattern):
+                print(f"Skipping backtracking-prone URL pattern: {pattern}")
+                self.rejected.append(pattern)
+                continue
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                print(f"Skipping invalid URL pattern {pattern}: {e}")
+                self.rejected.append(pattern)
+                continue
+
+            name = f'rule{len(self.patterns)}'
+            self.patterns.append(pattern)
+            self._names.append(name)
+            group, body = self._classify(pattern)
+            group.add(name, pattern, body)
+
+        self._folded.compile()
+        self._verbatim.compile()
+
+    def _classify(self, pattern: str) -> Tuple[_RuleGroup, str]:
+        """Pick the group for a rule and the body to use inside the alternation"""
+        flags = _GLOBAL_FLAGS.match(pattern)
+        if flags:
+            body = pattern[flags.end():]
+            if flags.group(1) == 'i' and not any(c.isupper() for c in _ESCAPE.sub('', body)):
+                return self._folded, body
+            # Turn leading global flags into a scoped group so rules can be joined
+            return self._verbatim, f'(?{flags.group(1)}:{body})'
+        return self._verbatim, pattern
+
+    def scan(self, url: str) -> List[Tuple[str, str]]:
+        """Return (pattern, matched text) for every rule that matches the URL"""
+        if not url:
+            return []
+        url = url[:MAX_URL_LENGTH]
+
+        fired: Dict[str, str] = {}
+        self._folded.scan(url, fired)
+        self._verbatim.scan(url, fired)
+        return [
+            (pattern, fired[name])
+            for name, pattern in zip(self._names, self.patterns) if name in fired
+        ]
+
+    def search(self, url: str) -> Optional[Tuple[str, str]]:
+        """Return (pattern, matched text) for the first rule that matches, or None"""
+        fired = self.scan(url)
+        return fired[0] if fired else None
+
+
+_suspicious_url_patterns: Optional[UrlPatternSet] = None
+
+
+def get_suspicious_url_patterns() -> UrlPatternSet:
+    """Get the shared compiled set of SUSPICIOUS_URL_PATTERNS"""
+    global _suspicious_url_patterns
+    if _suspicious_url_patterns is None:
+        _suspicious_url_patterns = UrlPatternSet(SUSPICIOUS_URL_PATTERNS)
+    return _suspicious_url_patterns
+
+
+def reload_suspicious_url_patterns(patterns: Optional[List[str]] = None) -> UrlPatternSet:
+    """Recompile the shared rule set, e.g. after the rule list changed"""
+    global _suspicious_url_patterns
+    _suspicious_url_patterns = UrlPatternSet(
+        patterns if patterns is not None else SUSPICIOUS_URL_PATTERNS
+    )
+    return _suspicious_url_patterns
+
+
+def score_url(url: str, keyword_matcher: KeywordMatcher,
+              patterns: Optional[UrlPatternSet] = None) -> Tuple[int, List[str]]:
+    """Score a URL by the keywords and suspicious patterns it contains"""
+    full_url = url.lower()
+    detected = list(keyword_matcher.find_keywords(full_url))
+    score = URL_KEYWORD_SCORE * len(detected)
+    for pattern, match in (patterns or get_suspicious_url_patterns()).scan(full_url):
+        detected.append(match)
+        score += URL_PATTERN_SCORE
+    return score, detected
+
+
+def url_block_reason(url: str, keyword_matcher: KeywordMatcher,
+                     patterns: Optional[UrlPatternSet] = None) -> Optional[Tuple[str, str]]:
+    """Reason and detected keywords if a URL scores high enough to be blocked"""
+    score, detected = score_url(url, keyword_matcher, patterns)
+    if score >= URL_BLOCK_SCORE:
+        return f'Adult keywords detected: {", ".join(detected[:3])}', ', '.join(detected)
+    return None
@@ -0,0 +1,143 @@
+"""
+Shared cache of content verdicts keyed by canonical URL or window title.
+
+The monitors see the same tabs over and over, so block, allow and score
+results are cached with a bounded size (least recently used entries are
+evicted first) and a per-entry time to live.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from ..utils.database import add_change_listener
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so equivalent spellings share one cache entry"""
+    if not url:
+        return ''
+    url = url.strip()
+    if '://' not in url:
+        url = 'http://' + url
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').rstrip('.')
+        if host.startswith('www.'):
+            host = host[4:]
+        port = parts.port
+        if port and port != _DEFAULT_PORTS.get(scheme):
+            host = f'{host}:{port}'
+        path = parts.path or '/'
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        return urlunsplit((scheme, host, path, query, ''))
+    except ValueError:
+        return url.lower()
+
+
+def url_key(url: str) -> str:
+    """Cache key for a URL verdict"""
+    return 'url:' + canonicalize_url(url)
+
+
+def title_key(title: str) -> str:
+    """Cache key for a window title verdict"""
+    digest = hashlib.blake2b((title or '').encode('utf-8', 'replace'), digest_size=12).hexdigest()
+    return 'title:' + digest
+
+
+class VerdictCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, max_size: int = 4096, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached verdict, or None if it is missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, verdict = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return verdict
+
+    def put(self, key: Hashable, verdict: Any, ttl: Optional[float] = None):
+        """Cache a verdict, evicting the least recently used entries if full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, verdict)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single cached verdict"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every cached verdict"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for monitoring cache effectiveness"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+_verdict_cache: Optional[VerdictCache] = None
+_verdict_cache_lock = threading.Lock()
+
+
+def get_verdict_cache() -> VerdictCache:
+    """Get the verdict cache shared by all monitors"""
+    global _verdict_cache
+    with _verdict_cache_lock:
+        if _verdict_cache is None:
+            _verdict_cache = VerdictCache()
+        return _verdict_cache
+
+
+def _on_database_change(db_path: str, user_email: Optional[str], table: Optional[str]):
+    """Cached verdicts depend on the block lists and settings, so drop them when those change"""
+    if table in (None, 'blocked_keywords', 'blocked_items', 'user_settings') and _verdict_cache is not None:
+        _verdict_cache.clear()
+
+
+add_change_listener(_on_database_change)
@@ -0,0 +1,268 @@
+"""
+Push-based sources of window title and focus changes.
+
+Instead of re-enumerating every window on a timer, an event source reports
+a window only when its title changes or it becomes the foreground window.
+Sources run their own background thread and call a callback with a
+``WindowEvent``; ``create_window_event_source`` picks the backend for the
+current platform:
+
+* ``WinEventSource`` hooks ``EVENT_OBJECT_NAMECHANGE`` and
+  ``EVENT_SYSTEM_FOREGROUND`` with ``SetWinEventHook`` on Windows.
+* ``X11EventSource`` listens for ``_NET_WM_NAME`` and ``_NET_ACTIVE_WINDOW``
+  property changes through the optional ``python-xlib`` package.
+* ``FakeWindowEventSource`` is driven by hand for testing.
+"""
+
+import os
+import select
+import sys
+import threading
+from typing import Callable, NamedTuple, Optional
+
+TITLE_CHANGED = 'title'
+FOREGROUND_CHANGED = 'foreground'
+
+
+class WindowEvent(NamedTuple):
+    """A top-level window whose title changed or that became the foreground window"""
+    kind: str
+    hwnd: int
+    pid: int
+    title: str
+    class_name: str
+
+
+class WindowEventSource:
+    """Base class for sources that push window events to a callback"""
+
+    def __init__(self):
+        self._callback: Optional[Callable[[WindowEvent], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self.events = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, callback: Callable[[WindowEvent], None]):
+        """Start delivering events to callback from a background thread"""
+        if self.is_running:
+            return
+        self._callback = callback
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop delivering events"""
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            self._interrupt()
+            thread.join(timeout=2.0)
+
+    def _run(self):
+        raise NotImplementedError
+
+    def _interrupt(self):
+        """Wake the event thread so it notices it has been stopped"""
+
+    def _emit(self, kind: str, hwnd: int, pid: int, title: str, class_name: str = ''):
+        callback = self._callback
+        if callback is None or not title:
+            return
+        self.events += 1
+        try:
+            callback(WindowEvent(kind, hwnd, pid, title, class_name))
+        except Exception as e:
+            print(f"Error handling window event: {e}")
+
+
+class WinEventSource(WindowEventSource):
+    """Windows backend built on SetWinEventHook"""
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    CHILDID_SELF = 0
+    GA_ROOT = 2
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        super().__init__()
+        self._thread_id = None
+        self._hook_proc = None
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        self._thread_id = kernel32.GetCurrentThreadId()
+
+        win_event_proc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+        )
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, win_event_proc,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+        ]
+
+        def on_win_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            if not hwnd or id_object != self.OBJID_WINDOW or id_child != self.CHILDID_SELF:
+                return
+            # Only top-level windows; name changes of controls inside them are noise
+            if user32.GetAncestor(hwnd, self.GA_ROOT) != hwnd or not user32.IsWindowVisible(hwnd):
+                return
+            length = user32.GetWindowTextLengthW(hwnd)
+            title = ctypes.create_unicode_buffer(length + 1)
+            user32.GetWindowTextW(hwnd, title, length + 1)
+            class_name = ctypes.create_unicode_buffer(256)
+            user32.GetClassNameW(hwnd, class_name, 256)
+            pid = wintypes.DWORD()
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            kind = FOREGROUND_CHANGED if event == self.EVENT_SYSTEM_FOREGROUND else TITLE_CHANGED
+            self._emit(kind, hwnd, pid.value, title.value, class_name.value)
+
+        # Keep a reference so the callback is not garbage collected while hooked
+        self._hook_proc = win_event_proc(on_win_event)
+        flags = self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        hooks = [
+            user32.SetWinEventHook(event, event, None, self._hook_proc, 0, 0, flags)
+            for event in (self.EVENT_SYSTEM_FOREGROUND, self.EVENT_OBJECT_NAMECHANGE)
+        ]
+        if not all(hooks):
+            print("Error: could not install window event hooks")
+
+        # Out-of-context hooks are delivered through this thread's message loop
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+        self._hook_proc = None
+
+    def _interrupt(self):
+        if self._thread_id:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+
+
+class X11EventSource(WindowEventSource):
+    """X11 backend that watches window name and active window properties"""
+
+    POLL_TIMEOUT = 0.5  # seconds between checks for stop()
+
+    def __init__(self):
+        super().__init__()
+        self._stopping = threading.Event()
+
+    def _run(self):
+        from Xlib import X, Xatom, display as xdisplay
+
+        self._stopping.clear()
+        display = xdisplay.Display()
+        root = display.screen().root
+        atoms = {
+            name: display.intern_atom(name)
+            for name in ('_NET_ACTIVE_WINDOW', '_NET_CLIENT_LIST', '_NET_WM_NAME', '_NET_WM_PID', 'UTF8_STRING')
+        }
+        name_atoms = (atoms['_NET_WM_NAME'], Xatom.WM_NAME)
+        watched = set()
+
+        def window_info(window):
+            try:
+                prop = window.get_full_property(atoms['_NET_WM_NAME'], atoms['UTF8_STRING'])
+                title = prop.value.decode('utf-8', 'replace') if prop else (window.get_wm_name() or '')
+                pid_prop = window.get_full_property(atoms['_NET_WM_PID'], X.AnyPropertyType)
+                pid = int(pid_prop.value[0]) if pid_prop else 0
+                wm_class = window.get_wm_class()
+                return title, pid, wm_class[-1] if wm_class else ''
+            except Exception:
+                return None
+
+        def watch_clients():
+            prop = root.get_full_property(atoms['_NET_CLIENT_LIST'], X.AnyPropertyType)
+            for window_id in (prop.value if prop else ()):
+                if window_id not in watched:
+                    watched.add(window_id)
+                    display.create_resource_object('window', window_id).change_attributes(
+                        event_mask=X.PropertyChangeMask
+                    )
+
+        def active_window():
+            prop = root.get_full_property(atoms['_NET_ACTIVE_WINDOW'], X.AnyPropertyType)
+            if prop and prop.value and prop.value[0]:
+                return display.create_resource_object('window', prop.value[0])
+            return None
+
+        root.change_attributes(event_mask=X.PropertyChangeMask)
+        watch_clients()
+        display.flush()
+
+        while not self._stopping.is_set():
+            readable, _, _ = select.select([display], [], [], self.POLL_TIMEOUT)
+            if not readable and not display.pending_events():
+                continue
+            for _ in range(display.pending_events()):
+                event = display.next_event()
+                if event.type != X.PropertyNotify:
+                    continue
+                if event.window == root:
+                    if event.atom == atoms['_NET_CLIENT_LIST']:
+                        watch_clients()
+                    elif event.atom == atoms['_NET_ACTIVE_WINDOW']:
+                        window = active_window()
+                        info = window_info(window) if window is not None else None
+                        if info:
+                            self._emit(FOREGROUND_CHANGED, window.id, info[1], info[0], info[2])
+                elif event.atom in name_atoms:
+                    info = window_info(event.window)
+                    if info:
+                        self._emit(TITLE_CHANGED, event.window.id, info[1], info[0], info[2])
+            display.flush()
+
+        display.close()
+
+    def _interrupt(self):
+        self._stopping.set()
+
+
+class FakeWindowEventSource(WindowEventSource):
+    """In-memory source whose events are pushed by hand, for tests"""
+
+    def start(self, callback: Callable[[WindowEvent], None]):
+        self._callback = callback
+
+    @property
+    def is_running(self) -> bool:
+        return self._callback is not None
+
+    def stop(self):
+        self._callback = None
+
+    def push(self, hwnd: int, title: str, pid: int = 0, class_name: str = '',
+             foreground: bool = False):
+        """Deliver an event to the callback synchronously"""
+        self._emit(FOREGROUND_CHANGED if foreground else TITLE_CHANGED, hwnd, pid, title, class_name)
+
+
+def create_window_event_source() -> Optional[WindowEventSource]:
+    """Create the event source for this platform, or None if none is available"""
+    if sys.platform == 'win32':
+        return WinEventSource()
+    if os.environ.get('DISPLAY'):
+        try:
+            import Xlib.display  # noqa: F401
+        except ImportError:
+            print("python-xlib is not installed, falling back to window polling")
+            return None
+        return X11EventSource()
+    return None
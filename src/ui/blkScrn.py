@@ -6,30 +6,41 @@ import time
 
 # Handle imports whether run as module or script
 try:
+    from ..core.policy import get_policy
+    from ..core.throttle import get_throttle
     from ..utils.database import Database
 except ImportError:
     # If running directly, modify path to import from parent directory
     sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+    from src.core.policy import get_policy
+    from src.core.throttle import get_throttle
     from src.utils.database import Database
 
 import webbrowser
 
+DEFAULT_COUNTDOWN = 30
+DEFAULT_REDIRECT_URL = "https://www.google.com"  # Default safe URL
+
 class BlockScreen(QtWidgets.QDialog):
-    # Class-level variables to track cooldown
-    _cooldown_end_time = 0
+    # One cooldown shared by all block screens; refused screens are counted by the throttle
     COOLDOWN_SECONDS = 5
+    _COOLDOWN_KEY = 'block_screen'
+    _cooldown = get_throttle('block_screen', suppress_for=COOLDOWN_SECONDS)
     
     @classmethod
     def is_in_cooldown(cls):
         """Check if we're in the cooldown period"""
-        return time.time() < cls._cooldown_end_time
+        return cls._cooldown.suppressed(cls._COOLDOWN_KEY)
     
     @classmethod
     def start_cooldown(cls):
         """Start the cooldown period after screen closes"""
-        cls._cooldown_end_time = time.time() + cls.COOLDOWN_SECONDS
+        cls._cooldown.suppress(cls._COOLDOWN_KEY)
+    
+    # Emitted with time.monotonic() when a presented screen is first painted
+    covered = QtCore.pyqtSignal(float)
     
-    def __init__(self, user_email=None):
+    def __init__(self, user_email=None, prewarm=False):
         super().__init__(None)  # Pass None as parent to ensure top-level window
         # Initialize essential attributes first
         self.user_email = user_email
@@ -37,16 +48,23 @@ class BlockScreen(QtWidgets.QDialog):
         self.remaining_time = 0
         self.prevent_close = True
         self.initialized = False  # Track initialization state
+        # A pre-warmed screen is built hidden, then shown and hidden again with present()/dismiss()
+        self.reusable = prewarm
+        self.countdown_seconds = DEFAULT_COUNTDOWN
+        self.redirect_url = DEFAULT_REDIRECT_URL
+        self._customization_version = None  # Policy version the message and timer come from
+        self._cover_pending = False
         
         # Check if we're in cooldown period
-        if BlockScreen.is_in_cooldown():
-            remaining = round(BlockScreen._cooldown_end_time - time.time(), 1)
+        if not prewarm and BlockScreen.is_in_cooldown():
+            remaining = round(BlockScreen._cooldown.remaining(BlockScreen._COOLDOWN_KEY), 1)
             print(f"In cooldown period. Please wait {remaining} seconds.")
             self.close()
             return
             
         # Ensure proper window setup
-        self.setAttribute(QtCore.Qt.WA_DeleteOnClose)  # Clean up on close
+        if not prewarm:
+            self.setAttribute(QtCore.Qt.WA_DeleteOnClose)  # Clean up on close
         self.setAttribute(QtCore.Qt.WA_ShowWithoutActivating)  # Prevent automatic activation
         
         # Set window flags for proper fullscreen
@@ -56,7 +74,6 @@ class BlockScreen(QtWidgets.QDialog):
             QtCore.Qt.WindowStaysOnTopHint |  # Always on top
             QtCore.Qt.X11BypassWindowManagerHint  # Bypass window manager
         )
-        BlockScreen.start_cooldown()  # Start the cooldown period
 
         # Get the directory containing the current script
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -77,7 +94,6 @@ class BlockScreen(QtWidgets.QDialog):
         # Initialize timers
         self.countdown_timer = QTimer(self)
         self.countdown_timer.timeout.connect(self.update_countdown)
-        
         self.focus_timer = QTimer(self)
         self.focus_timer.timeout.connect(self.check_focus)
         
@@ -91,15 +107,7 @@ class BlockScreen(QtWidgets.QDialog):
         desktop = QtWidgets.QApplication.desktop()
         screen_geometry = desktop.screenGeometry()
         self.setGeometry(screen_geometry)
-        
         print("Block screen window flags set")
-        # Use QTimer to ensure proper window setup before showing
-        QtCore.QTimer.singleShot(0, self._show_fullscreen)
-        print("Block screen fullscreen show scheduled")
-
-        # Ensure the window is activated and raised
-        self.activateWindow()
-        self.raise_()
         
         # Disconnect any existing connections on toggle_btn to prevent duplicate signals
         self.toggle_btn.clicked.disconnect() if self.toggle_btn.receivers(self.toggle_btn.clicked) > 0 else None
@@ -115,79 +123,101 @@ class BlockScreen(QtWidgets.QDialog):
         if hasattr(self, 'redirect_btn'):
             self.redirect_btn.clicked.connect(self.handle_redirect)
 
-        # Set default values
-        self.remaining_time = 30  # Default countdown
-        self.update_countdown_display()  # Initialize display
+        if prewarm:
+            # Load the customization now so present() has nothing left to query
+            self.load_customization()
+            return
         
-        # Load customization values
+        self._prepare()
+        # Use QTimer to ensure proper window setup before showing
+        QtCore.QTimer.singleShot(0, self._show_fullscreen)
+        print("Block screen fullscreen show scheduled")
+
+        # Ensure the window is activated and raised
+        self.activateWindow()
+        self.raise_()
+    
+    def _prepare(self):
+        """Reset the countdown and label for a new block"""
+        BlockScreen.start_cooldown()  # Start the cooldown period
+        self.blkRsn_lbl.hide()
+        self.label_visible = False
         self.load_customization()
-        
+        self._cover_pending = True
         # Mark as fully initialized
         self.initialized = True
+    
+    def present(self, reason_text: str = None) -> bool:
+        """Cover the screen with a pre-built screen; returns False during the cooldown"""
+        if BlockScreen.is_in_cooldown():
+            remaining = round(BlockScreen._cooldown.remaining(BlockScreen._COOLDOWN_KEY), 1)
+            print(f"In cooldown period. Please wait {remaining} seconds.")
+            return False
+        self._prepare()
+        if reason_text is not None:
+            self.blkRsn_lbl.setText(reason_text)
+        self._show_fullscreen()
+        return True
+    
+    def dismiss(self):
+        """Hide the screen without redirecting, e.g. when blocking is turned off"""
+        self.countdown_timer.stop()
+        self.focus_timer.stop()
+        self.remaining_time = 0
+        self.initialized = False
+        self.hide()
+        if not self.reusable:
+            self.close()
+            self.deleteLater()
         
     def load_customization(self):
-        """Load customization values from database"""
+        """Load the message, countdown and redirect URL from the settings snapshot
+        
+        The snapshot lives in memory and is rebuilt when settings are written,
+        so this queries nothing, and the widgets are only updated when the
+        snapshot changed since they were last set.
+        """
         if self.user_email:
             try:
-                # Set custom message from database
-                custom_message = self.db.get_setting(self.user_email, 'block_screen_message')
-                if custom_message and hasattr(self, 'msg_txtBrwsr'):
-                    print("Setting custom message:", custom_message)
-                    try:
-                        # Convert newlines to <br> tags and preserve formatting
-                        formatted_message = custom_message.replace('\n', '<br>')
-
-                        self.msg_txtBrwsr.setHtml(formatted_message)
-                        # self.msg_txtBrwsr.setAlignment(QtCore.Qt.AlignCenter)
-
-                        # font = self.msg_txtBrwsr.font()
-                        # font.setFamily("Century Gothic")  # Ensure the font is available
-                        # font.setPointSize(16)
-                        # font.setWeight(QtWidgets.QFont.Bold)
-                        # self.msg_txtBrwsr.setFont(font)
-                        
-                        print("Message set successfully")
-                    except Exception as e:
-                        print(f"Error setting message: {e}")
-                        # Try plain text as fallback
-                        self.msg_txtBrwsr.setPlainText(custom_message)
-
-                # Set countdown duration from database
-                duration = self.db.get_setting(self.user_email, 'block_screen_timer')
-                try:
-                    if duration:
-                        self.remaining_time = int(duration)
-                    else:
-                        self.remaining_time = 30  # Default value
-                    print(f"Setting countdown duration: {self.remaining_time} seconds")
-                    
-                    # Start the countdown timer
-                    self.update_countdown_display()
-                    self.countdown_timer.start(1000)
-                    
-                    # Update UI elements
-                    if hasattr(self, 'countdown_label'):
-                        self.countdown_label.setText(f"{self.remaining_time // 60:02d}:{self.remaining_time % 60:02d}")
-                    if hasattr(self, 'close_btn'):
-                        self.close_btn.setText(f"Close ({self.remaining_time})")
-                except (ValueError, TypeError) as e:
-                    print(f"Invalid duration value: {e}, using default")
-                    self.remaining_time = 30
-
-                # Set redirect URL from database
-                redirect_url = self.db.get_setting(self.user_email, 'redirect_url')
-                if redirect_url:
-                    print("Setting redirect URL:", redirect_url)
-                    self.redirect_url = redirect_url
-                else:
-                    self.redirect_url = "https://www.google.com"  # Default safe URL
-                    # Save default URL to database
-                    self.db.update_setting(self.user_email, 'redirect_url', self.redirect_url)
-                    
+                policy = get_policy(self.db.db_path, self.user_email)
+                if policy.version != self._customization_version:
+                    self._apply_customization(policy)
+                    self._customization_version = policy.version
             except Exception as e:
                 print(f"Error loading customization: {e}")
-                self.remaining_time = 30  # Fallback to default
-                self.redirect_url = "https://www.google.com"
+                self.countdown_seconds = DEFAULT_COUNTDOWN  # Fallback to default
+                self.redirect_url = DEFAULT_REDIRECT_URL
+        
+        self.remaining_time = self.countdown_seconds
+        self.update_countdown_display()
+        if hasattr(self, 'close_btn'):
+            self.close_btn.setText(f"Close ({self.remaining_time})")
+    
+    def _apply_customization(self, policy):
+        """Set the widgets from a settings snapshot"""
+        # Set custom message
+        custom_message = policy.get_setting('block_screen_message')
+        if custom_message and hasattr(self, 'msg_txtBrwsr'):
+            custom_message = str(custom_message)
+            try:
+                # Convert newlines to <br> tags and preserve formatting
+                self.msg_txtBrwsr.setHtml(custom_message.replace('\n', '<br>'))
+            except Exception as e:
+                print(f"Error setting message: {e}")
+                # Try plain text as fallback
+                self.msg_txtBrwsr.setPlainText(custom_message)
+
+        # Set countdown duration
+        duration = policy.get_setting('block_screen_timer')
+        try:
+            self.countdown_seconds = int(duration) if duration else DEFAULT_COUNTDOWN
+        except (ValueError, TypeError) as e:
+            print(f"Invalid duration value: {e}, using default")
+            self.countdown_seconds = DEFAULT_COUNTDOWN
+        print(f"Setting countdown duration: {self.countdown_seconds} seconds")
+
+        # Set redirect URL
+        self.redirect_url = str(policy.get_setting('redirect_url') or DEFAULT_REDIRECT_URL)
 
     def update_countdown(self):
         """Update the countdown timer"""
@@ -221,25 +251,23 @@ class BlockScreen(QtWidgets.QDialog):
             # Hide window before redirect to prevent visual artifacts
             self.hide()
             
-            if self.user_email:
-                redirect_url = self.db.get_setting(self.user_email, 'redirect_url')
-                if not redirect_url:
-                    redirect_url = "https://www.google.com"  # Default safe URL
-                # Ensure URL starts with http:// or https://
-                if not redirect_url.startswith(('http://', 'https://')):
-                    redirect_url = 'https://' + redirect_url
-                webbrowser.open(redirect_url)
-            else:
-                webbrowser.open("https://www.google.com")  # Fallback for no email
+            redirect_url = self.redirect_url or DEFAULT_REDIRECT_URL
+            # Ensure URL starts with http:// or https://
+            if not redirect_url.startswith(('http://', 'https://')):
+                redirect_url = 'https://' + redirect_url
+            webbrowser.open(redirect_url)
         except Exception as e:
             print(f"Error in redirect: {e}")
-            webbrowser.open("https://www.google.com")  # Fallback on error
+            webbrowser.open(DEFAULT_REDIRECT_URL)  # Fallback on error
         finally:
-            # Ensure window is hidden and destroyed
+            # Ensure window is hidden, and destroyed unless it is kept for the next block
             self.hide()
             BlockScreen.start_cooldown()  # Start the cooldown period
-            self.close()
-            self.deleteLater()  # Ensure proper cleanup
+            if self.reusable:
+                self.initialized = False
+            else:
+                self.close()
+                self.deleteLater()  # Ensure proper cleanup
 
     def closeEvent(self, event):
         """Handle window close event"""
@@ -268,7 +296,10 @@ class BlockScreen(QtWidgets.QDialog):
             
         self.hide()
         event.accept()
-        self.deleteLater()
+        if self.reusable:
+            self.initialized = False
+        else:
+            self.deleteLater()
 
     def keyPressEvent(self, event):
         """Handle key press events"""
@@ -281,6 +312,13 @@ class BlockScreen(QtWidgets.QDialog):
             return
         super().keyPressEvent(event)
             
+    def paintEvent(self, event):
+        """Report the first paint after the screen was presented, when the content is covered"""
+        super().paintEvent(event)
+        if self._cover_pending:
+            self._cover_pending = False
+            self.covered.emit(time.monotonic())
+            
     def _show_fullscreen(self):
         """Show the window in proper fullscreen mode"""
         if not self.initialized:
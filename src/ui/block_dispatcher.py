@@ -0,0 +1,208 @@
+"""
+Shows block screens on the GUI thread, whichever thread detected the block.
+
+Detectors call ``dispatch_block`` from their own threads and it returns at
+once: the request is stored and a queued signal wakes the GUI thread, which
+creates and shows the block screen there. Qt widgets are only ever touched
+from the GUI thread, and no detector waits for a countdown to finish.
+
+Requests coalesce. While a wake-up is pending, later requests are counted
+and dropped, and a request that arrives while a block screen is already
+covering the screen, or shortly after one was shown, does not open another.
+A burst of detections of the same page therefore shows a single screen.
+
+The block screen is built ahead of time (``prewarm``) and kept hidden, with
+its customization already loaded, so showing it costs no UI loading and no
+database query; after the countdown it is hidden again for the next block.
+Time-to-cover, from the detector's request to the first paint of the
+screen, is recorded for every block and reported by ``stats()``.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, NamedTuple, Optional
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+
+class BlockRequest(NamedTuple):
+    """A detector's request to cover the screen"""
+    url: str
+    reason: str
+    user_email: Optional[str]
+    detected: str
+    requested_at: float  # time.monotonic() when the block was detected
+
+
+class BlockDispatcher(QObject):
+    """Queues block requests from any thread and shows them on the GUI thread"""
+
+    # Emitted from any thread; delivered to _drain on the thread that owns the dispatcher
+    _wake = pyqtSignal()
+    block_shown = pyqtSignal(str, str)  # url, reason
+
+    COALESCE_WINDOW = 1.0  # seconds after a screen was shown during which new requests are folded into it
+    LATENCY_SAMPLES = 256  # recent blocks the time-to-cover figures are computed over
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._pending: Optional[BlockRequest] = None
+        self._last_shown = float('-inf')
+        self._spare = None  # Pre-built hidden screen, reused for every block
+        self._showing: Optional[BlockRequest] = None  # Request whose screen has not been painted yet
+        self._queue_delays: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+        self._cover_times: Deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+        self.current_screen = None
+        self.requested = 0
+        self.coalesced = 0
+        self.shown = 0
+        self.skipped = 0
+        self._wake.connect(self._drain, Qt.QueuedConnection)
+
+    def dispatch(self, url: str, reason: str, user_email: Optional[str] = None, detected: str = ''):
+        """Ask for the block screen; safe to call from any thread and never waits"""
+        request = BlockRequest(url, reason, user_email, detected, time.monotonic())
+        with self._lock:
+            self.requested += 1
+            if self._pending is not None:
+                # A wake-up is already on its way; the first request of a burst is the one shown
+                self.coalesced += 1
+                return
+            self._pending = request
+        self._wake.emit()
+
+    def _drain(self):
+        """Show the pending request, on the GUI thread"""
+        with self._lock:
+            request, self._pending = self._pending, None
+        if request is None:
+            return
+        if self.is_screen_showing() or time.monotonic() - self._last_shown < self.COALESCE_WINDOW:
+            with self._lock:
+                self.coalesced += 1
+            return
+        self._show(request)
+
+    def prewarm(self, user_email: Optional[str]):
+        """Build the hidden block screen for user_email now, on the GUI thread, so a block only shows it"""
+        self._screen_for(user_email)
+
+    def _screen_for(self, user_email: Optional[str]):
+        from .blkScrn import BlockScreen
+
+        screen = self._spare
+        if screen is not None:
+            try:
+                if screen.user_email == user_email:
+                    return screen
+                screen.deleteLater()
+            except RuntimeError:
+                pass  # The widget was deleted, e.g. on application shutdown
+        started = time.perf_counter()
+        screen = self._spare = BlockScreen(user_email=user_email, prewarm=True)
+        screen.covered.connect(self._on_covered)
+        print(f"Block screen built in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return screen
+
+    def _show(self, request: BlockRequest):
+        try:
+            screen = self._screen_for(request.user_email)
+            # Not exec_(): the GUI event loop keeps running while the countdown does
+            if not screen.present(f"Blocked: {request.url}\nReason: {request.reason}"):
+                # BlockScreen refuses to show during its cooldown after the last screen closed
+                self.skipped += 1
+                return
+            self.current_screen = screen
+            self._showing = request
+            self._last_shown = time.monotonic()
+            with self._lock:
+                self._queue_delays.append(self._last_shown - request.requested_at)
+            self.shown += 1
+            print(f"Block screen shown for {request.url}: {request.reason}")
+            self.block_shown.emit(request.url, request.reason)
+        except Exception as e:
+            print(f"Error showing block screen: {e}")
+            import traceback
+            print(traceback.format_exc())
+
+    def _on_covered(self, painted_at: float):
+        """Record the time from a block request to the first paint of its screen"""
+        request, self._showing = self._showing, None
+        if request is not None:
+            with self._lock:
+                self._cover_times.append(painted_at - request.requested_at)
+
+    def is_screen_showing(self) -> bool:
+        """Check if a block screen is currently covering the screen"""
+        if self.current_screen is None:
+            return False
+        try:
+            return self.current_screen.isVisible()
+        except RuntimeError:
+            # The underlying widget was already deleted
+            self.current_screen = None
+            return False
+
+    def close_screen(self):
+        """Close the current block screen, e.g. when blocking is turned off"""
+        screen, self.current_screen = self.current_screen, None
+        if screen is not None:
+            try:
+                screen.dismiss()
+            except RuntimeError:
+                pass
+
+    def stats(self) -> Dict:
+        """Requests received, folded into another, shown and refused by the cooldown, and time-to-cover"""
+        with self._lock:
+            return {
+                'requested': self.requested,
+                'coalesced': self.coalesced,
+                'shown': self.shown,
+                'skipped': self.skipped,
+                'queue_delay': _latency_stats(self._queue_delays),
+                'time_to_cover': _latency_stats(self._cover_times)
+            }
+
+
+def _latency_stats(samples) -> Dict[str, float]:
+    """Count, mean, median, 95th percentile and maximum of durations, in milliseconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {'count': 0, 'avg_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+    return {
+        'count': len(ordered),
+        'avg_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+
+_block_dispatcher: Optional[BlockDispatcher] = None
+_block_dispatcher_lock = threading.Lock()
+
+
+def get_block_dispatcher() -> BlockDispatcher:
+    """Get the dispatcher shared by all detectors"""
+    global _block_dispatcher
+    with _block_dispatcher_lock:
+        if _block_dispatcher is None:
+            _block_dispatcher = BlockDispatcher()
+            app = QApplication.instance()
+            if app is not None and _block_dispatcher.thread() != app.thread():
+                # Created from a detector thread; its queued slot must run on the GUI thread
+                _block_dispatcher.moveToThread(app.thread())
+        return _block_dispatcher
+
+
+def dispatch_block(url: str, reason: str, user_email: Optional[str] = None, detected: str = '') -> bool:
+    """Show the block screen from any thread; returns False if there is no GUI to show it"""
+    if QApplication.instance() is None:
+        print(f"No GUI to show the block screen for {url}: {reason}")
+        return False
+    get_block_dispatcher().dispatch(url, reason, user_email, detected)
+    return True
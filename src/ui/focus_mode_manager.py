@@ -5,9 +5,12 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QPushButton, QListWidget, QMessageBox, QDialog,
                              QTimeEdit, QLineEdit, QRadioButton, QDialogButtonBox,
                              QScrollArea, QFrame, QListWidgetItem, QFileDialog)
-from PyQt5.QtCore import QTime, Qt, pyqtSignal
+from PyQt5.QtCore import QTime, QTimer, Qt, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon, QColor
 from .ui_components import ToggleSwitch
+from ..utils.db_connection import get_connection
+from ..utils.migrations import migrate
+from ..core.focus_schedule import FocusSchedule
 from PyQt5.uic import loadUi
 from datetime import datetime
 import sqlite3
@@ -648,7 +651,7 @@ class FocusModeDatabase:
     def create_tables(self):
         """Create focus mode table"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS focus_modes (
@@ -668,11 +671,13 @@ class FocusModeDatabase:
                 conn.commit()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
+        # Adds the indexes get_focus_modes relies on
+        migrate(self.db_path)
     
     def add_focus_mode(self, focus_data: FocusModeData) -> Tuple[bool, Optional[str]]:
         """Add a focus mode to the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO focus_modes (user_email, title, start_time, end_time, is_daily, 
@@ -698,7 +703,7 @@ class FocusModeDatabase:
     def get_focus_modes(self, user_email: str) -> List[FocusModeData]:
         """Get all focus modes for a user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT id, title, start_time, end_time, is_daily, 
@@ -729,7 +734,7 @@ class FocusModeDatabase:
     def remove_focus_mode(self, focus_mode_id: int) -> bool:
         """Remove a focus mode from the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM focus_modes WHERE id = ?', (focus_mode_id,))
                 conn.commit()
@@ -746,6 +751,14 @@ class FocusModeManager:
         self.focus_modes = []
         self.selected_modes = set()
         
+        # One timer, armed for the next time a focus mode starts or ends
+        self.schedule = FocusSchedule([])
+        self.active_mode_ids = frozenset()
+        self.schedule_timer = QTimer()
+        self.schedule_timer.setSingleShot(True)
+        self.schedule_timer.setTimerType(Qt.PreciseTimer)
+        self.schedule_timer.timeout.connect(self._on_schedule_transition)
+        
         # Initialize database
         self.db = FocusModeDatabase(main_window.db.db_path)
         
@@ -795,6 +808,42 @@ class FocusModeManager:
         """Load focus modes from database"""
         if hasattr(self.main_window, 'user_email') and self.main_window.user_email:
             self.focus_modes = self.db.get_focus_modes(self.main_window.user_email)
+            self.reschedule()
+    
+    def reschedule(self):
+        """Compile the focus modes into a week timeline and arm the timer for its next transition"""
+        self.schedule = FocusSchedule.from_rows(
+            (mode.id, mode.start_time.toString('HH:mm:ss'), mode.end_time.toString('HH:mm:ss'),
+             mode.is_daily, ','.join(mode.selected_days))
+            for mode in self.focus_modes
+        )
+        self._on_schedule_transition()
+    
+    def _on_schedule_transition(self):
+        """Update the active focus modes and re-arm the timer"""
+        now = datetime.now()
+        active = self.schedule.active_at(now)
+        if active != self.active_mode_ids:
+            started = active - self.active_mode_ids
+            ended = self.active_mode_ids - active
+            self.active_mode_ids = active
+            for mode in self.focus_modes:
+                if mode.id in started:
+                    self.main_window.show_status_message(f"Focus Mode '{mode.title}' started")
+                elif mode.id in ended:
+                    self.main_window.show_status_message(f"Focus Mode '{mode.title}' ended")
+        
+        next_transition = self.schedule.next_transition(now)
+        if next_transition is None:
+            self.schedule_timer.stop()
+        else:
+            # A timer that fires early finds nothing changed and re-arms for the rest
+            delay = (next_transition - datetime.now()).total_seconds()
+            self.schedule_timer.start(max(1, int(delay * 1000) + 1))
+    
+    def active_focus_modes(self) -> List[FocusModeData]:
+        """The focus modes whose time window contains the current moment"""
+        return [mode for mode in self.focus_modes if mode.id in self.active_mode_ids]
     
     def add_focus_mode(self):
         """Add a new focus mode"""
@@ -820,6 +869,7 @@ class FocusModeManager:
             if success:
                 # Insert at the beginning of the list
                 self.focus_modes.insert(0, focus_data)
+                self.reschedule()
                 self.refresh_ui()
                 
                 # Show success message using main window's method
@@ -854,6 +904,7 @@ class FocusModeManager:
         if reply == QMessageBox.Yes:
             if self.db.remove_focus_mode(focus_data.id):
                 self.focus_modes.remove(focus_data)
+                self.reschedule()
                 self.refresh_ui()
                 
                 self.main_window.show_status_message(
@@ -895,6 +946,7 @@ class FocusModeManager:
                     success_count += 1
             
             if success_count > 0:
+                self.reschedule()
                 self.refresh_ui()
                 self.main_window.show_status_message(
                     f"Successfully deleted {success_count} focus mode{'s' if success_count > 1 else ''}!"
@@ -0,0 +1,125 @@
+"""
+Cross-process change detection for the in-memory caches.
+
+``notify_change`` only reaches listeners in the process that made the
+write, so a keyword added in the GUI never reached the blocker service's
+policy, and some monitors re-read their lists on every check to be safe.
+A ``DataVersionWatcher`` closes the gap without queries while nothing
+changes:
+
+* every tick it reads ``PRAGMA data_version``, which SQLite changes when
+  another connection, in this process or another one, commits to the
+  file; reading it touches no table;
+* only when that value moved does it read ``table_versions``, counters
+  that triggers bump on every row written (schema version 4), and calls
+  ``notify_change`` for each table whose counter moved, so the policy
+  store, the website filters and the matchers rebuild from the new rows.
+
+Changes therefore take effect within ``POLL_INTERVAL``. A write made in
+this process is announced twice, by the writer and again by the watcher;
+listeners reload from the database, so the second one is harmless.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from .database import notify_change
+from .db_connection import get_connection
+
+POLL_INTERVAL = 0.5  # seconds; as often as the monitors poll the foreground window
+
+
+class DataVersionWatcher:
+    """Turns commits to one database by any connection into change notifications"""
+
+    def __init__(self, database_path: str, poll_interval: float = POLL_INTERVAL):
+        self.database_path = database_path
+        self.poll_interval = poll_interval
+        self._data_version: Optional[int] = None
+        self._table_versions: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self.polls = 0
+        self.changes = 0  # Polls that found a commit
+        self.notifications = 0
+
+    def start(self):
+        """Start watching; safe to call more than once"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='data-version-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stopped.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def _run(self):
+        # The baseline: what the caches were built from when they were created
+        self.check()
+        while not self._stopped.wait(self.poll_interval):
+            self.check()
+
+    def check(self) -> List[str]:
+        """Poll once and notify the tables that changed; returns them"""
+        try:
+            conn = get_connection(self.database_path)
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            self.polls += 1
+            if data_version == self._data_version:
+                return []
+            first = self._data_version is None
+            self._data_version = data_version
+            versions = self._read_table_versions(conn)
+        except sqlite3.Error as e:
+            print(f"Error checking {self.database_path} for changes: {e}")
+            return []
+
+        if first:
+            self._table_versions = versions or {}
+            return []
+        self.changes += 1
+        if versions is None:
+            # No counters in this database yet: everything may have changed
+            changed = [None]
+        else:
+            changed = [table for table, version in versions.items()
+                       if self._table_versions.get(table) != version]
+            self._table_versions = versions
+        for table in changed:
+            self.notifications += 1
+            notify_change(self.database_path, None, table)
+        return [table for table in changed if table is not None]
+
+    @staticmethod
+    def _read_table_versions(conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+        try:
+            return dict(conn.execute('SELECT table_name, version FROM table_versions').fetchall())
+        except sqlite3.OperationalError:
+            return None  # Database older than schema version 4
+
+    def stats(self) -> Dict[str, int]:
+        """Polls made, polls that found a commit and notifications sent"""
+        return {'polls': self.polls, 'changes': self.changes, 'notifications': self.notifications}
+
+
+_watchers: Dict[str, DataVersionWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_data_version_watcher(database_path: str) -> DataVersionWatcher:
+    """Get the watcher of a database file, shared by the whole process"""
+    path = os.path.abspath(database_path)
+    with _watchers_lock:
+        watcher = _watchers.get(path)
+        if watcher is None:
+            watcher = _watchers[path] = DataVersionWatcher(path)
+        return watcher
@@ -1,126 +1,60 @@
 import sqlite3
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
+
+from .db_connection import get_connection
+from .migrations import migrate
+
+# Callbacks run after a write as callback(db_path, user_email, table);
+# user_email and table are None when the change is not scoped to one of them
+_change_listeners: List[Callable[[str, Optional[str], Optional[str]], None]] = []
+
+def add_change_listener(callback: Callable[[str, Optional[str], Optional[str]], None]):
+    """Register a callback to be notified after the database is written"""
+    if callback not in _change_listeners:
+        _change_listeners.append(callback)
+
+def remove_change_listener(callback: Callable[[str, Optional[str], Optional[str]], None]):
+    """Unregister a change callback"""
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+def notify_change(db_path: str, user_email: Optional[str] = None, table: Optional[str] = None):
+    """Tell registered listeners that a table was written"""
+    for callback in list(_change_listeners):
+        try:
+            callback(db_path, user_email, table)
+        except Exception as e:
+            print(f"Error notifying database change listener: {e}")
 
 class Database:
     def __init__(self, db_path: str = 'app_blocker.db'):
         self.db_path = db_path
 
     def drop_tables(self):
-        """Drop all tables to reset the database schema"""
+        """Drop all tables and reset the schema version, so create_tables() builds them again"""
+        conn = get_connection(self.db_path)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                # Get all tables
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = cursor.fetchall()
-                
-                # Drop each table
-                for table in tables:
-                    if table[0] not in ['sqlite_sequence']:  # Skip SQLite internal tables
-                        cursor.execute(f"DROP TABLE IF EXISTS {table[0]}")
-                conn.commit()
-                print("Successfully dropped all tables")
+            conn.execute('BEGIN IMMEDIATE')
+            tables = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+            for (table,) in tables:
+                if table != 'sqlite_sequence':  # Skip SQLite internal tables
+                    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            # With the drops, so the version never claims tables that are gone
+            conn.execute('PRAGMA user_version = 0')
+            conn.commit()
+            print("Successfully dropped all tables")
         except sqlite3.Error as e:
+            conn.rollback()
             print(f"Error dropping tables: {e}")
 
     def create_tables(self):
-        """Create all necessary database tables"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-
-                # Create settings table with support for all value types
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_settings (
-                        user_email TEXT NOT NULL,
-                        setting_name TEXT NOT NULL,
-                        setting_value TEXT NOT NULL,
-                        setting_type TEXT CHECK(setting_type IN ('boolean', 'text', 'number')),
-                        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_email) REFERENCES users (email),
-                        PRIMARY KEY (user_email, setting_name)
-                    )
-                ''')
-                
-                # Create blocked keywords table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS blocked_keywords (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_email TEXT NOT NULL,
-                        keyword TEXT NOT NULL,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_email) REFERENCES users (email),
-                        UNIQUE(user_email, keyword)
-                    )
-                ''')
-                
-                # Create verification codes table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS verification_codes (
-                        email TEXT PRIMARY KEY,
-                        code TEXT,
-                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create users table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS users (
-                        email TEXT PRIMARY KEY,
-                        username TEXT,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create partners table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS partners (
-                        user_email TEXT PRIMARY KEY,
-                        partner_name TEXT NOT NULL,
-                        partner_email TEXT NOT NULL,
-                        added_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_email) REFERENCES users (email)
-                    )
-                ''')
-                
-                # Create blocked items table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS blocked_items (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        email TEXT,
-                        item TEXT,
-                        type TEXT CHECK(type IN ('block', 'white')),
-                        item_type TEXT CHECK(item_type IN ('website', 'app')),
-                        FOREIGN KEY (email) REFERENCES users (email),
-                        UNIQUE(email, item)
-                    )
-                ''')
-
-                # Add focus mode table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS focus_modes (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_email TEXT NOT NULL,
-                        title TEXT NOT NULL,
-                        description TEXT,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        start_time DATETIME,
-                        end_time DATETIME,
-                        duration INTEGER,  -- in minutes
-                        is_daily BOOLEAN DEFAULT 0,
-                        selected_days TEXT,
-                        allowed_apps TEXT,
-                        allowed_websites TEXT,
-                        FOREIGN KEY (user_email) REFERENCES users (email)
-                    )
-                ''')
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
+        """Create the tables, or upgrade an existing database to the current schema"""
+        migrate(self.db_path)
 
     def add_verification_code(self, email: str, code: str) -> Tuple[bool, Optional[str]]:
         """Add a verification code to the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('INSERT OR REPLACE INTO verification_codes (email, code) VALUES (?, ?)',
                              (email, code))
@@ -132,7 +66,7 @@ class Database:
     def verify_code(self, email: str, code: str) -> Tuple[bool, Optional[str]]:
         """Verify a code from the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT code, timestamp,
@@ -168,7 +102,7 @@ class Database:
     def get_verified_user(self) -> Optional[str]:
         """Get the most recently logged in verified user's email"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT email 
@@ -185,7 +119,7 @@ class Database:
     def add_user(self, email: str, username: str) -> Tuple[bool, Optional[str]]:
         """Add a verified user to the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 # Check if user already exists
                 cursor.execute('SELECT email FROM users WHERE email = ?', (email,))
@@ -213,14 +147,15 @@ class Database:
                         VALUES (?, 'strict_keyword_matching', 'true', 'boolean')
                     ''', (email,))
                 conn.commit()
-                return True, None
+            notify_change(self.db_path, email)
+            return True, None
         except sqlite3.Error as e:
             return False, str(e)
 
     def get_user_info(self, email: str) -> Tuple[Optional[str], Optional[str]]:
         """Get user info (email, username) from database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT email, username FROM users WHERE email = ?', (email,))
                 return cursor.fetchone()
@@ -231,7 +166,7 @@ class Database:
     def add_partner(self, user_email: str, partner_name: str, partner_email: str) -> bool:
         """Add or update accountability partner for a user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 # Add or update partner
@@ -248,7 +183,7 @@ class Database:
     def get_partner_info(self, user_email: str) -> Optional[Tuple[str, str]]:
         """Get partner info (name, email) for a user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT partner_name, partner_email 
@@ -257,7 +192,7 @@ class Database:
                 ''', (user_email,))
                 result = cursor.fetchone()
                 return result if result else None
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT partner_name, partner_email 
@@ -272,7 +207,7 @@ class Database:
     def remove_partner(self, user_email: str) -> bool:
         """Remove accountability partner for a user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM partners WHERE user_email = ?', (user_email,))
                 conn.commit()
@@ -284,12 +219,13 @@ class Database:
     def add_item(self, email: str, item: str, type_: str, item_type: str) -> Tuple[bool, Optional[str]]:
         """Add a blocked/whitelisted item to the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('INSERT INTO blocked_items (email, item, type, item_type) VALUES (?, ?, ?, ?)',
                              (email, item, type_, item_type))
                 conn.commit()
-                return True, None
+            notify_change(self.db_path, email, 'blocked_items')
+            return True, None
         except sqlite3.Error as e:
             if "UNIQUE constraint failed" in str(e):
                 return False, "Item already exists in list"
@@ -298,11 +234,12 @@ class Database:
     def remove_item(self, email: str, item: str) -> bool:
         """Remove a blocked/whitelisted item from the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM blocked_items WHERE email = ? AND item = ?', (email, item))
                 conn.commit()
-                return True
+            notify_change(self.db_path, email, 'blocked_items')
+            return True
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return False
@@ -310,7 +247,7 @@ class Database:
     def get_items(self, email: str, type_: str, item_type: str) -> list:
         """Get all blocked/whitelisted items for a user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT item FROM blocked_items WHERE email = ? AND type = ? AND item_type = ?',
                              (email, type_, item_type))
@@ -322,7 +259,7 @@ class Database:
     def update_setting(self, user_email: str, setting_name: str, value: str, value_type: str = 'text') -> bool:
         """Update a user setting in the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO user_settings 
@@ -330,7 +267,8 @@ class Database:
                     VALUES (?, ?, ?, ?)
                 ''', (user_email, setting_name, str(value), value_type))
                 conn.commit()
-                return True
+            notify_change(self.db_path, user_email, 'user_settings')
+            return True
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return False
@@ -338,7 +276,7 @@ class Database:
     def add_blocked_website(self, user_email: str, website: str) -> bool:
         """Add a website to the blocked list"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO blocked_items 
@@ -346,7 +284,8 @@ class Database:
                     VALUES (?, ?, 'block', 'website')
                 ''', (user_email, website.lower().strip()))
                 conn.commit()
-                return True
+            notify_change(self.db_path, user_email, 'blocked_items')
+            return True
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return False
@@ -354,7 +293,7 @@ class Database:
     def get_blocked_websites(self, user_email: str) -> list:
         """Get list of blocked websites for a user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT item FROM blocked_items 
@@ -368,7 +307,7 @@ class Database:
     def get_setting(self, user_email: str, setting_name: str) -> Optional[str]:
         """Get a user setting from the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT setting_value, setting_type FROM user_settings
@@ -394,7 +333,7 @@ class Database:
     def get_all_settings(self, user_email: str) -> dict:
         """Get all settings for a user"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT setting_name, setting_value, setting_type FROM user_settings
@@ -419,7 +358,7 @@ class Database:
     def is_app_in_any_list(self, email: str, app_path: str) -> bool:
         """Check if an app is in any list (blocked or whitelisted)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT COUNT(*) FROM blocked_items WHERE email = ? AND item = ?',
                              (email, app_path))
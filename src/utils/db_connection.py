@@ -0,0 +1,157 @@
+"""
+Long-lived SQLite connections, one per thread and database file.
+
+Opening a connection for every query used to dominate the monitors' CPU
+time: each tick paid for the open, the schema parse and the close, and
+prepared statements never outlived a single query. ``get_connection``
+returns the calling thread's connection to a database instead, opening and
+tuning it the first time:
+
+* WAL journal, so readers never wait for the writer and the GUI, the
+  monitors and the blocker service can share the file;
+* ``synchronous=NORMAL``, which is safe with WAL and avoids an fsync per
+  commit;
+* a larger page cache, and a larger prepared-statement cache, which stays
+  warm because the connection does.
+
+A connection is still used as a context manager, exactly like the one
+``sqlite3.connect`` returns: the block commits on success and rolls back on
+an exception, and the connection stays open for the next one. Writes take
+the write lock when their transaction starts (``BEGIN IMMEDIATE``), so
+concurrent writers wait in SQLite's busy handler instead of failing half
+way through; a statement that still finds the database locked is retried
+with a backoff until ``BUSY_TIMEOUT`` has passed.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict
+
+BUSY_TIMEOUT = 5.0  # seconds a statement waits for a locked database before failing
+CACHED_STATEMENTS = 256  # prepared statements kept per connection
+CACHE_SIZE_KIB = 8192  # page cache per connection
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA cache_size=-{CACHE_SIZE_KIB}',
+    'PRAGMA temp_store=MEMORY'
+)
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {'opened': 0, 'reused': 0, 'busy_retries': 0, 'busy_errors': 0}
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    code = getattr(error, 'sqlite_errorcode', None)  # Python 3.11+
+    if code is not None:
+        return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    # Match SQLite's own messages only: 'no such table: blocked_items' also says 'locked'
+    message = str(error).lower()
+    return message.startswith('database ') and message.endswith(' is locked')
+
+
+def _retry_busy(operation, *args):
+    """Run operation, retrying while the database is locked, for up to BUSY_TIMEOUT"""
+    deadline = time.monotonic() + BUSY_TIMEOUT
+    delay = 0.01
+    while True:
+        try:
+            return operation(*args)
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e) or time.monotonic() + delay > deadline:
+                if _is_busy(e):
+                    _count('busy_errors')
+                raise
+        _count('busy_retries')
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+
+
+class RetryingCursor(sqlite3.Cursor):
+    """Cursor whose statements are retried while the database is locked"""
+
+    def execute(self, sql, parameters=()):
+        return _retry_busy(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        # Materialized so a retry sees the same rows
+        return _retry_busy(super().executemany, sql, list(seq_of_parameters))
+
+    def executescript(self, sql_script):
+        return _retry_busy(super().executescript, sql_script)
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connection handing out retrying cursors; kept open for its thread's lifetime"""
+
+    def cursor(self, factory=RetryingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        _retry_busy(super().commit)
+
+
+def _open(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT,
+        factory=PooledConnection,
+        cached_statements=CACHED_STATEMENTS,
+        isolation_level='IMMEDIATE'
+    )
+    for pragma in PRAGMAS:
+        try:
+            conn.execute(pragma)
+        except sqlite3.Error as e:
+            # A read-only or in-memory database keeps its defaults
+            print(f"Could not apply {pragma} to {path}: {e}")
+    _count('opened')
+    return conn
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """The calling thread's open connection to db_path; use it as `with get_connection(path) as conn:`"""
+    path = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+    connections: Dict[str, sqlite3.Connection] = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _open(path)
+    else:
+        _count('reused')
+    return conn
+
+
+def close_thread_connections():
+    """Close the calling thread's connections, e.g. before a database file is replaced"""
+    connections = getattr(_local, 'connections', None) or {}
+    for conn in connections.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    connections.clear()
+
+
+def connection_stats() -> Dict[str, int]:
+    """Connections opened and reused, and statements retried or failed on a locked database"""
+    with _stats_lock:
+        return dict(_stats)
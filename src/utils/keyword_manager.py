@@ -1,5 +1,28 @@
 import sqlite3
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .database import notify_change
+from .db_connection import get_connection
+
+IMPORT_BATCH_SIZE = 5000  # rows handed to executemany at a time
+
+def normalize_keyword(keyword: str) -> str:
+    """Lower-case a keyword and collapse its whitespace, as it is stored and matched"""
+    return ' '.join(keyword.lower().split())
+
+def read_keyword_file(path: str, encoding: str = 'utf-8') -> Iterator[str]:
+    """Stream the keywords of a list file: one per line, blank lines and # comments skipped"""
+    with open(path, encoding=encoding, errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+class ImportResult(NamedTuple):
+    """Outcome of a bulk keyword import"""
+    inserted: int
+    duplicates: int  # Repeated in the input or already blocked
+    invalid: int  # Empty after normalization
 
 class KeywordManager:
     def __init__(self, database_path: str):
@@ -8,35 +31,37 @@ class KeywordManager:
     def add_keyword(self, user_email: str, keyword: str) -> Tuple[bool, Optional[str]]:
         """Add a blocked keyword for a user"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
+            with get_connection(self.database_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     'INSERT INTO blocked_keywords (user_email, keyword) VALUES (?, ?)',
-                    (user_email, keyword.lower().strip())
+                    (user_email, normalize_keyword(keyword))
                 )
                 conn.commit()
-                return True, None
+            notify_change(self.database_path, user_email, 'blocked_keywords')
+            return True, None
         except sqlite3.Error as e:
             return False, str(e)
 
     def remove_keyword(self, user_email: str, keyword: str) -> Tuple[bool, Optional[str]]:
         """Remove a blocked keyword for a user"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
+            with get_connection(self.database_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     'DELETE FROM blocked_keywords WHERE user_email = ? AND keyword = ?',
-                    (user_email, keyword.lower().strip())
+                    (user_email, normalize_keyword(keyword))
                 )
                 conn.commit()
-                return True, None
+            notify_change(self.database_path, user_email, 'blocked_keywords')
+            return True, None
         except sqlite3.Error as e:
             return False, str(e)
 
     def get_keywords(self, user_email: str) -> List[str]:
         """Get all blocked keywords for a user"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
+            with get_connection(self.database_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     'SELECT keyword FROM blocked_keywords WHERE user_email = ? ORDER BY keyword',
@@ -50,25 +75,66 @@ class KeywordManager:
     def clear_keywords(self, user_email: str) -> Tuple[bool, Optional[str]]:
         """Remove all blocked keywords for a user"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
+            with get_connection(self.database_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     'DELETE FROM blocked_keywords WHERE user_email = ?',
                     (user_email,)
                 )
                 conn.commit()
-                return True, None
+            notify_change(self.database_path, user_email, 'blocked_keywords')
+            return True, None
         except sqlite3.Error as e:
             return False, str(e)
 
+    def bulk_import(self, user_email: str, keywords: Iterable[str]) -> Optional[ImportResult]:
+        """Insert keywords from any iterable in one transaction; returns None if it was rolled back
+
+        The input is consumed as it is read and only the distinct keywords
+        are kept in memory. Listeners are notified once, after the commit,
+        so the keyword matcher is rebuilt once for the whole import.
+        """
+        seen = set()
+        batch: List[Tuple[str, str]] = []
+        duplicates = invalid = inserted = 0
+        try:
+            with get_connection(self.database_path) as conn:
+                cursor = conn.cursor()
+                for keyword in keywords:
+                    keyword = normalize_keyword(keyword)
+                    if not keyword:
+                        invalid += 1
+                        continue
+                    if keyword in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(keyword)
+                    batch.append((user_email, keyword))
+                    if len(batch) >= IMPORT_BATCH_SIZE:
+                        inserted += self._insert_batch(cursor, batch)
+                        batch = []
+                if batch:
+                    inserted += self._insert_batch(cursor, batch)
+        except (sqlite3.Error, OSError, UnicodeError) as e:
+            print(f"Error importing keywords: {e}")
+            return None
+        if inserted:
+            notify_change(self.database_path, user_email, 'blocked_keywords')
+        # Distinct keywords that were not inserted were already blocked
+        return ImportResult(inserted, duplicates + len(seen) - inserted, invalid)
+
+    @staticmethod
+    def _insert_batch(cursor: sqlite3.Cursor, batch: List[Tuple[str, str]]) -> int:
+        cursor.executemany('INSERT OR IGNORE INTO blocked_keywords (user_email, keyword) VALUES (?, ?)', batch)
+        return cursor.rowcount
+
+    def import_file(self, user_email: str, path: str, encoding: str = 'utf-8') -> Optional[ImportResult]:
+        """Import a keyword list file, streaming it line by line"""
+        return self.bulk_import(user_email, read_keyword_file(path, encoding))
+
     def import_keywords(self, user_email: str, keywords: List[str]) -> Tuple[int, int]:
         """Import a list of keywords. Returns (success_count, fail_count)"""
-        success = 0
-        failed = 0
-        for keyword in keywords:
-            result, _ = self.add_keyword(user_email, keyword)
-            if result:
-                success += 1
-            else:
-                failed += 1
-        return success, failed
+        result = self.bulk_import(user_email, keywords)
+        if result is None:
+            return 0, len(keywords)
+        return result.inserted, result.duplicates + result.invalid
@@ -0,0 +1,218 @@
+"""
+Versioned, non-destructive schema migrations.
+
+The schema version of a database file is its ``PRAGMA user_version``.
+``MIGRATIONS`` lists the steps that lead from one version to the next; a
+step only ever creates or alters, never drops, so upgrading keeps every
+user's lists and settings. ``migrate`` applies the steps a database is
+missing, each in its own transaction together with the version bump, so an
+interrupted upgrade resumes at the step that failed. Several processes
+may start at once (the GUI and the blocker service): the version is read
+again once the write lock is held, and a step is applied only once.
+
+Version 1 is the original schema, created with ``IF NOT EXISTS`` so that
+databases made before versioning adopt it unchanged. Version 2 adds
+indexes for the hot lookups: blocked items by user, list and kind (the
+covering index answers them without touching the table), focus modes by
+user in creation order and the most recently added user. Version 3 adds
+the block event log and its rollup tables (see ``src.core.block_log``).
+Version 4 adds ``table_versions``, counters that triggers bump on every
+write to the tables in-memory caches are built from.
+"""
+
+import sqlite3
+from typing import NamedTuple, Tuple
+
+from .db_connection import get_connection
+
+
+class Migration(NamedTuple):
+    """One schema step, from version - 1 to version"""
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+
+# Tables whose writes bump their counter in table_versions (see src.utils.data_version)
+VERSIONED_TABLES = ('user_settings', 'blocked_keywords', 'blocked_items', 'focus_modes')
+
+
+def _version_triggers(tables: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Statements that seed the counters of tables and bump them on every row written"""
+    statements = []
+    for table in tables:
+        statements.append(f"INSERT OR IGNORE INTO table_versions (table_name) VALUES ('{table}')")
+        for action in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{action.lower()}
+                AFTER {action} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+    return tuple(statements)
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "Base schema", (
+        '''
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_email TEXT NOT NULL,
+            setting_name TEXT NOT NULL,
+            setting_value TEXT NOT NULL,
+            setting_type TEXT CHECK(setting_type IN ('boolean', 'text', 'number')),
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_email) REFERENCES users (email),
+            PRIMARY KEY (user_email, setting_name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS blocked_keywords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_email) REFERENCES users (email),
+            UNIQUE(user_email, keyword)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS verification_codes (
+            email TEXT PRIMARY KEY,
+            code TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            email TEXT PRIMARY KEY,
+            username TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS partners (
+            user_email TEXT PRIMARY KEY,
+            partner_name TEXT NOT NULL,
+            partner_email TEXT NOT NULL,
+            added_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_email) REFERENCES users (email)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS blocked_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT,
+            item TEXT,
+            type TEXT CHECK(type IN ('block', 'white')),
+            item_type TEXT CHECK(item_type IN ('website', 'app')),
+            FOREIGN KEY (email) REFERENCES users (email),
+            UNIQUE(email, item)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS focus_modes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_email TEXT NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            start_time DATETIME,
+            end_time DATETIME,
+            duration INTEGER,  -- in minutes
+            is_daily BOOLEAN DEFAULT 0,
+            selected_days TEXT,
+            allowed_apps TEXT,
+            allowed_websites TEXT,
+            FOREIGN KEY (user_email) REFERENCES users (email)
+        )
+        ''',
+    )),
+    Migration(2, "Indexes for list, focus mode and user lookups", (
+        # get_items / get_blocked_websites: WHERE email = ? AND type = ? AND item_type = ?, reading item
+        'CREATE INDEX IF NOT EXISTS idx_blocked_items_list ON blocked_items (email, type, item_type, item)',
+        # get_focus_modes: WHERE user_email = ? ORDER BY created_at DESC
+        'CREATE INDEX IF NOT EXISTS idx_focus_modes_user ON focus_modes (user_email, created_at)',
+        # get_verified_user: ORDER BY created_at DESC LIMIT 1
+        'CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at)',
+        # Let the query planner know how selective the new indexes are
+        'ANALYZE',
+    )),
+    Migration(3, "Block event log with hourly and daily rollups", (
+        '''
+        CREATE TABLE IF NOT EXISTS block_events (
+            id INTEGER PRIMARY KEY,
+            user_email TEXT NOT NULL,
+            occurred_at REAL NOT NULL,  -- Unix time
+            url TEXT,
+            domain TEXT,
+            reason TEXT,
+            stage TEXT,  -- Detection pipeline stage that decided
+            source TEXT  -- Monitor that blocked
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_block_events_user_time ON block_events (user_email, occurred_at)',
+        '''
+        CREATE TABLE IF NOT EXISTS block_stats_hourly (
+            user_email TEXT NOT NULL,
+            hour TEXT NOT NULL,  -- 'YYYY-MM-DD HH:00', local time
+            stage TEXT NOT NULL,
+            blocks INTEGER NOT NULL,
+            PRIMARY KEY (user_email, hour, stage)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS block_stats_daily (
+            user_email TEXT NOT NULL,
+            day TEXT NOT NULL,  -- 'YYYY-MM-DD', local time
+            stage TEXT NOT NULL,
+            blocks INTEGER NOT NULL,
+            PRIMARY KEY (user_email, day, stage)
+        ) WITHOUT ROWID
+        ''',
+    )),
+    Migration(4, "Per-table change counters", (
+        '''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        ''',
+    ) + _version_triggers(VERSIONED_TABLES)),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Schema version recorded in a database"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(db_path: str) -> int:
+    """Bring a database up to SCHEMA_VERSION; returns the version it is at afterwards"""
+    conn = get_connection(db_path)
+    try:
+        version = schema_version(conn)
+    except sqlite3.Error as e:
+        print(f"Error reading schema version of {db_path}: {e}")
+        return 0
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # Another process may have applied it while we waited for the lock
+            version = schema_version(conn)
+            if migration.version > version:
+                for statement in migration.statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {migration.version:d}')
+                version = migration.version
+                print(f"Database migrated to version {version}: {migration.description}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Error migrating {db_path} to version {migration.version}: {e}")
+            break
+    return version
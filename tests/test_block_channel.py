@@ -0,0 +1,142 @@
+"""Block channel tests over a Unix domain socket"""
+
+import os
+import queue
+import socket
+import stat
+import sys
+import time
+
+import pytest
+
+from src.core import block_channel
+from src.core.block_channel import (
+    BlockChannelClient, BlockChannelServer, BlockListener, channel_authkey, send_request
+)
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="uses a Unix domain socket")
+
+AUTHKEY = b'test-secret'
+
+
+@pytest.fixture
+def events():
+    return queue.Queue()
+
+
+@pytest.fixture
+def server(tmp_path, events):
+    def on_event(event):
+        events.put(event)
+        if event['type'] == 'ping':
+            return {'ok': True, 'pong': event.get('value')}
+        return None
+
+    server = BlockChannelServer(on_event, str(tmp_path / 'blocks.sock'), authkey=AUTHKEY)
+    server.start()
+    yield server
+    server.stop()
+
+
+def test_published_event_is_received(server, events):
+    client = BlockChannelClient(server.address, authkey=AUTHKEY)
+    try:
+        event = client.publish('block', url='https://bad.example/', reason='test')
+        received = events.get(timeout=2)
+        assert received['url'] == 'https://bad.example/'
+        assert received['seq'] == event['seq']
+        assert client.flush(timeout=2)
+        assert client.stats() == {'sent': 1, 'waiting': 0, 'dropped': 0}
+    finally:
+        client.close()
+
+
+def test_request_gets_reply(server):
+    assert send_request(server.address, 'ping', authkey=AUTHKEY, value=7) == {'ok': True, 'pong': 7}
+
+
+def test_client_without_the_key_is_not_heard(server, events):
+    assert send_request(server.address, 'ping', authkey=b'wrong-secret') is None
+    assert events.empty()
+    assert server.unauthenticated == 1
+    # The server keeps serving clients that hold the key
+    assert send_request(server.address, 'ping', authkey=AUTHKEY, value=1) == {'ok': True, 'pong': 1}
+
+
+def test_publisher_without_the_key_keeps_its_events(server, events):
+    client = BlockChannelClient(server.address, authkey=b'wrong-secret')
+    try:
+        client.publish('block', url='https://bad.example/', reason='test')
+        assert not client.flush(timeout=0.3)
+        assert client.stats()['waiting'] == 1
+        assert events.empty()
+    finally:
+        client.close()
+
+
+def test_listener_is_shared_by_its_subscribers(tmp_path):
+    listener = BlockListener(str(tmp_path / 'blocks.sock'), authkey=AUTHKEY)
+    first, second = queue.Queue(), queue.Queue()
+    assert listener.subscribe(first.put)
+    assert listener.subscribe(second.put)
+    client = BlockChannelClient(listener.address, authkey=AUTHKEY)
+    try:
+        event = client.publish('block', url='https://bad.example/', reason='test')
+        assert first.get(timeout=2)['seq'] == second.get(timeout=2)['seq'] == event['seq']
+        assert client.flush(timeout=2)
+        # A resent event reaches no one
+        assert send_request(listener.address, 'block', authkey=AUTHKEY,
+                            sender=event['sender'], seq=event['seq']) == {'seq': event['seq']}
+        assert first.empty() and second.empty()
+        assert listener.stats()['subscribers'] == 2
+
+        # The server stops with the last subscriber
+        listener.unsubscribe(first.put)
+        assert listener.stats()['listening']
+        listener.unsubscribe(second.put)
+        assert not listener.stats()['listening']
+        assert send_request(listener.address, 'ping', authkey=AUTHKEY) is None
+    finally:
+        client.close()
+        listener.unsubscribe(first.put)
+
+
+@pytest.fixture
+def stalled_listener(tmp_path):
+    """A socket that is bound and listening but never accepts, like a hung GUI"""
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(str(tmp_path / 'stalled.sock'))
+    listener.listen(8)
+    yield str(tmp_path / 'stalled.sock')
+    listener.close()
+
+
+def test_stalled_listener_holds_up_no_one(stalled_listener):
+    client = BlockChannelClient(stalled_listener, authkey=AUTHKEY)
+    try:
+        started = time.monotonic()
+        for _ in range(3):
+            client.publish('block', url='https://bad.example/', reason='test')
+        assert time.monotonic() - started < 0.1
+        assert client.stats() == {'sent': 0, 'waiting': 3, 'dropped': 0}
+    finally:
+        client.close()
+
+    started = time.monotonic()
+    assert send_request(stalled_listener, 'ping', timeout=0.2, authkey=AUTHKEY) is None
+    assert time.monotonic() - started < 1
+
+
+def test_channel_authkey_is_private_and_stable(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(tmp_path))
+    monkeypatch.setattr(block_channel, '_authkey', None)
+
+    key = channel_authkey()
+    path = block_channel.authkey_path()
+    assert path.startswith(str(tmp_path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert len(key) == 64
+
+    # Another process reads the same secret from the file
+    monkeypatch.setattr(block_channel, '_authkey', None)
+    assert channel_authkey() == key
@@ -0,0 +1,94 @@
+"""Block event log tests, checking the rollups against the raw events"""
+
+import sqlite3
+from collections import Counter
+
+import pytest
+
+from src.core import block_log
+from src.core.block_log import BlockEventLog
+
+USER = 'user@example.com'
+OTHER = 'other@example.com'
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(block_log.time.time() - 3 * 3600)
+    monkeypatch.setattr(block_log.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def log(tmp_path):
+    # Batches are written only when flushed
+    return BlockEventLog(str(tmp_path / 'app.db'), flush_interval=10)
+
+
+def record(log, clock, at, stage, user=USER, url='https://bad.example/page'):
+    clock.now = at
+    log.record(user, url, 'test', stage=stage, source='test')
+
+
+def raw_events(log):
+    conn = sqlite3.connect(log.database_path)
+    try:
+        return conn.execute('SELECT user_email, occurred_at, stage FROM block_events').fetchall()
+    finally:
+        conn.close()
+
+
+def test_rollups_match_raw_events(log, clock):
+    start = clock.now
+    # Two hours apart, so the events fall in two different hours
+    for offset, stage in [(0, 'title'), (60, 'title'), (120, 'domain'), (7200, 'domain')]:
+        record(log, clock, start + offset, stage)
+    record(log, clock, start + 30, 'title', user=OTHER)
+    assert log.flush()
+    # A second batch adds to the rows the first one created
+    for offset, stage in [(180, 'title'), (7260, 'title'), (7320, 'domain')]:
+        record(log, clock, start + offset, stage)
+    assert log.flush()
+
+    rows = raw_events(log)
+    assert len(rows) == 8
+    mine = [(at, stage) for user, at, stage in rows if user == USER]
+    hourly = Counter((block_log._hour(at), stage) for at, stage in mine)
+    daily = Counter((block_log._day(at), stage) for at, stage in mine)
+    assert len(hourly) == 4
+
+    assert {(hour, stage): blocks for hour, stage, blocks in log.hourly_counts(USER, since=start)} == hourly
+    assert {(day, stage): blocks for day, stage, blocks in log.daily_counts(USER, days=2)} == daily
+    assert sum(blocks for _, _, blocks in log.hourly_counts(OTHER, since=start)) == 1
+    # Hours before since are left out
+    later = log.hourly_counts(USER, since=start + 7200)
+    assert {(hour, stage): blocks for hour, stage, blocks in later} == \
+        {key: count for key, count in hourly.items() if key[0] >= block_log._hour(start + 7200)}
+
+    assert log.stats() == {'recorded': 8, 'written': 8, 'waiting': 0, 'batches': 2, 'errors': 0}
+
+
+def test_recent_and_last_blocked_url(log, clock):
+    start = clock.now
+    record(log, clock, start, 'domain', url='https://first.example/')
+    record(log, clock, start + 1, 'title', url='https://second.example/')
+    record(log, clock, start + 2, 'title', url=None)
+    assert log.flush()
+
+    assert [event.url for event in log.recent(USER)] == ['', 'https://second.example/', 'https://first.example/']
+    assert log.recent(USER, limit=1)[0].stage == 'title'
+    assert log.last_blocked_url(USER) == 'https://second.example/'
+    assert log.last_blocked_url(OTHER) is None
+
+
+def test_flush_without_events(log):
+    assert log.flush()
+    assert log.stats()['batches'] == 0
@@ -0,0 +1,32 @@
+"""Blocker service control channel tests"""
+
+import sys
+
+import pytest
+
+from src.core.block_channel import send_request
+from src.core.blocker_service import BlockerService
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="uses a Unix domain socket")
+
+AUTHKEY = b'test-secret'
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = BlockerService(str(tmp_path / 'app_blocker.db'), 'user@example.com',
+                             control_address=str(tmp_path / 'service.sock'), control_authkey=AUTHKEY)
+    service.control.start()
+    yield service
+    service.control.stop()
+
+
+def test_stop_without_the_key_is_refused(service):
+    assert send_request(service.control.address, 'stop', authkey=b'wrong-secret') is None
+    assert not service._stopped.is_set()
+    assert service.control.unauthenticated == 1
+
+
+def test_stop_with_the_key(service):
+    assert send_request(service.control.address, 'stop', authkey=AUTHKEY) == {'ok': True}
+    assert service._stopped.is_set()
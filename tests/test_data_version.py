@@ -0,0 +1,95 @@
+"""Data version watcher tests, with commits from a separate connection"""
+
+import sqlite3
+
+import pytest
+
+from src.utils.data_version import DataVersionWatcher
+from src.utils.database import add_change_listener, remove_change_listener
+from src.utils.migrations import migrate
+
+USER = 'user@example.com'
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'app.db')
+    migrate(path)
+    return path
+
+
+@pytest.fixture
+def notified(path):
+    notified = []
+
+    def listener(db_path, user_email, table):
+        if db_path == path:
+            notified.append(table)
+
+    add_change_listener(listener)
+    yield notified
+    remove_change_listener(listener)
+
+
+def commit(path, *statements):
+    """Commit statements from a connection of its own, like another process would"""
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            for sql, params in statements:
+                conn.execute(sql, params)
+    finally:
+        conn.close()
+
+
+ADD_KEYWORD = ('INSERT INTO blocked_keywords (user_email, keyword) VALUES (?, ?)', (USER, 'casino'))
+ADD_SETTING = ("INSERT INTO user_settings (user_email, setting_name, setting_value, setting_type) "
+               "VALUES (?, 'block_message', 'stop', 'text')", (USER,))
+
+
+def test_first_check_is_the_baseline(path, notified):
+    commit(path, ADD_KEYWORD)
+    watcher = DataVersionWatcher(path)
+    assert watcher.check() == []
+    assert notified == []
+
+
+def test_commit_notifies_each_changed_table_once(path, notified):
+    watcher = DataVersionWatcher(path)
+    watcher.check()
+
+    commit(path, ADD_KEYWORD, ADD_SETTING)
+    assert sorted(watcher.check()) == ['blocked_keywords', 'user_settings']
+    assert sorted(notified) == ['blocked_keywords', 'user_settings']
+
+    # Idle ticks send nothing
+    assert watcher.check() == []
+    assert watcher.check() == []
+    assert len(notified) == 2
+
+    commit(path, ('DELETE FROM blocked_keywords WHERE user_email = ?', (USER,)))
+    assert watcher.check() == ['blocked_keywords']
+    assert notified[2:] == ['blocked_keywords']
+    assert watcher.stats() == {'polls': 5, 'changes': 2, 'notifications': 3}
+
+
+def test_commit_to_an_uncached_table_notifies_no_one(path, notified):
+    watcher = DataVersionWatcher(path)
+    watcher.check()
+
+    commit(path, ('INSERT INTO verification_codes (email, code) VALUES (?, ?)', (USER, '1234')))
+    assert watcher.check() == []
+    assert notified == []
+    assert watcher.stats()['changes'] == 1
+
+
+def test_database_without_counters_notifies_every_table(tmp_path):
+    path = str(tmp_path / 'old.db')
+    commit(path, ('CREATE TABLE blocked_keywords (user_email TEXT, keyword TEXT)', ()))
+    watcher = DataVersionWatcher(path)
+    watcher.check()
+
+    commit(path, ADD_KEYWORD)
+    # No table can be named, so listeners are told everything may have changed
+    assert watcher.check() == []
+    assert watcher.stats()['notifications'] == 1
@@ -0,0 +1,42 @@
+"""Pooled SQLite connection tests"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src.utils.db_connection import _is_busy, connection_stats, get_connection
+
+
+def test_connection_is_reused_per_thread(tmp_path):
+    path = str(tmp_path / 'app.db')
+    conn = get_connection(path)
+    assert get_connection(path) is conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_connection(path)))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+
+def test_missing_table_fails_at_once(tmp_path):
+    conn = get_connection(str(tmp_path / 'app.db'))
+    retries = connection_stats()['busy_retries']
+    started = time.monotonic()
+    with pytest.raises(sqlite3.OperationalError, match='no such table'):
+        # The table name contains 'locked'; that must not read as a busy database
+        conn.execute('SELECT item FROM blocked_items')
+    assert time.monotonic() - started < 0.5
+    assert connection_stats()['busy_retries'] == retries
+
+
+@pytest.mark.parametrize('message, busy', [
+    ('database is locked', True),
+    ('database table is locked', True),
+    ('no such table: blocked_items', False),
+    ('near "locked": syntax error', False),
+])
+def test_busy_errors_by_message(message, busy):
+    assert _is_busy(sqlite3.OperationalError(message)) == busy
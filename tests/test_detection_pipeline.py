@@ -0,0 +1,69 @@
+"""Detection pipeline tests for the inline stages"""
+
+from collections import Counter
+
+import pytest
+
+from src.core.detection_pipeline import ALLOW, BLOCK, DetectionPipeline
+from src.core.verdict_cache import VerdictCache
+
+
+@pytest.fixture
+def calls():
+    return Counter()
+
+
+@pytest.fixture
+def pipeline(calls):
+    def title_rule(title):
+        calls['title'] += 1
+        return ('Blocked title', 'casino') if 'casino' in title.lower() else None
+
+    def domain_rule(url):
+        calls['domain'] += 1
+        return ('Blocked site', 'bad.example') if 'bad.example' in url else None
+
+    return DetectionPipeline('test', title_rule=title_rule, domain_rule=domain_rule,
+                             verdict_cache=VerdictCache())
+
+
+def test_window_verdict_is_cached(pipeline, calls):
+    first = pipeline.run('Online Casino - Browser', 'https://www.example.com/')
+    second = pipeline.run('Online Casino - Browser', 'https://www.example.com/')
+
+    assert first.decision == second.decision == BLOCK
+    # The cached block keeps the stage that decided it
+    assert first.stage == second.stage == 'title'
+    assert (second.reason, second.detected) == ('Blocked title', 'casino')
+    assert calls == {'title': 1}
+    assert pipeline.stats()['stages']['window_cache']['block'] == 1
+
+
+def test_allowed_window_skips_the_rules(pipeline, calls):
+    for _ in range(3):
+        assert pipeline.run('News - Browser', 'https://news.example.com/').decision == ALLOW
+    assert calls == {'title': 1, 'domain': 1}
+
+
+def test_windows_are_cached_by_title_and_url(pipeline, calls):
+    assert pipeline.run('Home - Browser', 'https://bad.example/').stage == 'domain'
+    assert pipeline.run('Home - Browser', 'https://good.example/').decision == ALLOW
+    assert pipeline.run('Casino - Browser', 'https://good.example/').stage == 'title'
+    assert calls == {'title': 3, 'domain': 2}
+
+
+def test_cleared_cache_runs_the_rules_again(pipeline, calls):
+    pipeline.run('News - Browser', 'https://news.example.com/')
+    pipeline.verdict_cache.clear()
+    pipeline.run('News - Browser', 'https://news.example.com/')
+    assert calls == {'title': 2, 'domain': 2}
+
+
+def test_new_flight_tag_runs_the_rules_again(pipeline, calls):
+    pipeline.flight_tag = frozenset({'casino'})
+    pipeline.run('News - Browser', 'https://news.example.com/')
+    pipeline.run('News - Browser', 'https://news.example.com/')
+    # New keywords: the verdict reached with the old ones is not used
+    pipeline.flight_tag = frozenset({'casino', 'news'})
+    pipeline.run('News - Browser', 'https://news.example.com/')
+    assert calls == {'title': 2, 'domain': 2}
@@ -0,0 +1,176 @@
+"""Fetch engine tests against a local HTTP server"""
+
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.core.fetch_engine import FetchEngine
+from src.core.html_scanner import HtmlScanner
+from src.core.page_fetcher import CHUNK_SIZE
+
+TAIL = 'tail of the page'
+
+
+def _head() -> bytes:
+    """Exactly one read of the fetcher, ending in the middle of the body"""
+    head = b'<html><head><title>STOP</title></head><body><p>'
+    return head + b'a' * (CHUNK_SIZE - len(head))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.lock = threading.Lock()
+        self.hits: Counter = Counter()
+        # Name of a slow page -> set once its head is sent / set to let its tail through
+        self.head_sent = {}
+        self.gates = {}
+        self.active = 0
+        self.max_active = 0
+
+    def url(self, path: str) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+    def slow_page(self, name: str) -> str:
+        self.head_sent[name] = threading.Event()
+        self.gates[name] = threading.Event()
+        return self.url(f'/slow/{name}')
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] += 1
+        kind, _, arg = self.path.strip('/').partition('/')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if kind == 'size':
+            body = b'<p>' + b'a' * (int(arg) - 7) + b'</p>'
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            if kind == 'slow':
+                self.wfile.write(_head())
+                server.head_sent[arg].set()
+                server.gates[arg].wait(5)
+                self.wfile.write(f'</p><p>{TAIL}</p></body></html>'.encode())
+            elif kind == 'sleep':
+                with server.lock:
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                time.sleep(0.2)
+                with server.lock:
+                    server.active -= 1
+                self.wfile.write(b'<p>done</p>')
+            else:
+                self.wfile.write(body)
+        except OSError:
+            pass  # The fetcher hung up after reaching a verdict
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = _Server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine():
+    engine = FetchEngine(max_concurrency=8, per_host_limit=2, timeout=5)
+    yield engine
+    engine.stop()
+
+
+def collecting_scanner(stop_on=None, on_stop=None):
+    """A scanner that records the text it is given, optionally stopping at stop_on"""
+    seen = []
+
+    def callback(section, text):
+        seen.append(text)
+        if stop_on is not None and stop_on in text:
+            if on_stop is not None:
+                on_stop()
+            return True
+        return False
+
+    return HtmlScanner(callback), seen
+
+
+def test_same_page_is_downloaded_once(server, engine):
+    url = server.slow_page('join')
+    first, first_seen = collecting_scanner()
+    second, second_seen = collecting_scanner()
+
+    first_future = engine.submit(url, first)
+    assert server.head_sent['join'].wait(5)
+    second_future = engine.submit(url, second)
+    server.gates['join'].set()
+
+    assert first_future.result(5)['status_code'] == 200
+    assert second_future.result(5)['status_code'] == 200
+    assert engine.stats()['joined'] == 1
+    assert server.hits['/slow/join'] == 1
+    # The late scanner got the text read before it joined as well as the rest
+    assert 'STOP' in first_seen and 'STOP' in second_seen
+    assert any(TAIL in text for text in first_seen)
+    assert any(TAIL in text for text in second_seen)
+
+
+def test_no_join_once_every_scanner_has_stopped(server, engine):
+    url = server.slow_page('late')
+    stopped = threading.Event()
+
+    def on_stop():
+        stopped.set()
+        # Keep the download open while the next caller arrives
+        time.sleep(0.2)
+
+    first, _ = collecting_scanner(stop_on='STOP', on_stop=on_stop)
+    first_future = engine.submit(url, first)
+    assert stopped.wait(5)
+    server.gates['late'].set()
+    late, late_seen = collecting_scanner()
+    late_future = engine.submit(url, late)
+
+    assert first_future.result(5)['stopped_early']
+    stats = late_future.result(5)
+    assert not stats['stopped_early'] and not stats['truncated']
+    # The first download stopped at the title, so the late caller needed a new one
+    assert any(TAIL in text for text in late_seen)
+    assert engine.stats()['joined'] == 0
+    assert server.hits['/slow/late'] == 2
+
+
+def test_per_host_limit(server, engine):
+    futures = [engine.submit(server.url(f'/sleep/{i}'), collecting_scanner()[0]) for i in range(6)]
+    for future in futures:
+        assert future.result(5)['status_code'] == 200
+    assert server.max_active == engine.per_host_limit
+
+
+def test_byte_cap(server, engine):
+    scanner, _ = collecting_scanner()
+    stats = engine.submit(server.url('/size/100000'), scanner, max_bytes=10000).result(5)
+    assert stats['bytes_read'] == 10000
+    assert stats['truncated']
+
+
+def test_page_of_exactly_the_byte_cap_is_not_truncated(server, engine):
+    scanner, _ = collecting_scanner()
+    stats = engine.submit(server.url('/size/10000'), scanner, max_bytes=10000).result(5)
+    assert stats['bytes_read'] == 10000
+    assert not stats['truncated']
@@ -0,0 +1,103 @@
+"""Focus schedule tests against a naive evaluator"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.focus_schedule import DAY, FocusSchedule, parse_days, parse_time
+
+MONDAY = datetime(2026, 10, 12)  # 00:00 on a Monday
+
+ROWS = [
+    ('evening', '18:00:00', '21:30:00', 1, ''),
+    ('overnight', '22:00:00', '06:00:00', 0, 'Fri,Sat'),
+    ('all_day', '09:00:00', '09:00:00', 0, 'Wed'),
+    ('week_wrap', '23:00:00', '02:00:00', 0, 'Sun'),
+    ('overlap', '05:00:00', '10:00:00', 0, 'Sat,Sun'),
+]
+
+
+def naive_active(rows, moment: datetime) -> frozenset:
+    """Modes active at moment, from each occurrence this week and last week"""
+    monday = datetime(moment.year, moment.month, moment.day) - timedelta(days=moment.weekday())
+    active = set()
+    for mode_id, start_time, end_time, is_daily, selected_days in rows:
+        start, end = parse_time(start_time), parse_time(end_time)
+        duration = timedelta(seconds=(end - start) % DAY or DAY)
+        for day in parse_days(selected_days, bool(is_daily)):
+            for week in (-1, 0):
+                begins = monday + timedelta(days=day + 7 * week, seconds=start)
+                if begins <= moment < begins + duration:
+                    active.add(mode_id)
+    return frozenset(active)
+
+
+def moments(step_minutes: int = 7, weeks: int = 2):
+    """Moments every step_minutes from MONDAY, a few seconds off the minute"""
+    moment = MONDAY + timedelta(seconds=13)
+    end = MONDAY + timedelta(weeks=weeks)
+    while moment < end:
+        yield moment
+        moment += timedelta(minutes=step_minutes)
+
+
+@pytest.fixture
+def schedule():
+    return FocusSchedule.from_rows(ROWS)
+
+
+def test_active_at_matches_naive_evaluator(schedule):
+    for moment in moments():
+        assert schedule.active_at(moment) == naive_active(ROWS, moment), moment
+
+
+def test_boundaries(schedule):
+    saturday = MONDAY + timedelta(days=5)
+    # Friday's overnight span runs into Saturday morning, where 'overlap' begins
+    assert schedule.active_at(saturday + timedelta(hours=5, minutes=30)) == {'overnight', 'overlap'}
+    assert schedule.active_at(saturday + timedelta(hours=6)) == {'overlap'}
+    # An end equal to the start covers 24 hours from the start
+    wednesday = MONDAY + timedelta(days=2)
+    assert 'all_day' in schedule.active_at(wednesday + timedelta(hours=9))
+    assert 'all_day' in schedule.active_at(wednesday + timedelta(days=1, hours=8, minutes=59))
+    assert 'all_day' not in schedule.active_at(wednesday + timedelta(days=1, hours=9))
+    # Sunday's late span wraps round to Monday morning
+    assert 'week_wrap' in schedule.active_at(MONDAY + timedelta(hours=1, minutes=59))
+    assert 'week_wrap' not in schedule.active_at(MONDAY + timedelta(hours=2))
+    assert 'week_wrap' in schedule.active_at(MONDAY + timedelta(days=6, hours=23))
+
+
+def test_next_transition_is_the_next_change(schedule):
+    for moment in moments(step_minutes=97):
+        transition = schedule.next_transition(moment)
+        assert transition is not None and transition > moment
+        active = naive_active(ROWS, moment)
+        assert naive_active(ROWS, transition) != active, moment
+        # Nothing changes before it
+        assert naive_active(ROWS, transition - timedelta(seconds=1)) == active, moment
+        probe = moment
+        while probe < transition:
+            assert naive_active(ROWS, probe) == active, (moment, probe)
+            probe += timedelta(minutes=11)
+
+
+def test_next_transition_across_the_week_boundary():
+    schedule = FocusSchedule.from_rows([('week_wrap', '22:00', '02:00', 0, 'Sun')])
+    sunday_night = MONDAY + timedelta(days=6, hours=23)
+    # The span continues past midnight; it ends on Monday morning, not at the week boundary
+    assert schedule.next_transition(sunday_night) == MONDAY + timedelta(days=7, hours=2)
+    assert schedule.next_transition(MONDAY + timedelta(hours=3)) == MONDAY + timedelta(days=6, hours=22)
+
+
+def test_schedule_without_transitions():
+    assert FocusSchedule.from_rows([]).next_transition(MONDAY) is None
+    assert FocusSchedule.from_rows([]).active_at(MONDAY) == frozenset()
+
+    always = FocusSchedule.from_rows([('always', '00:00', '00:00', 1, '')])
+    assert always.next_transition(MONDAY) is None
+    assert always.active_at(MONDAY + timedelta(days=3, hours=12)) == {'always'}
+
+
+def test_invalid_rows_are_skipped():
+    schedule = FocusSchedule.from_rows([('broken', None, '10:00', 1, ''), ('ok', '09:00', '10:00', 1, '')])
+    assert schedule.active_at(MONDAY + timedelta(hours=9, minutes=30)) == {'ok'}
@@ -0,0 +1,79 @@
+"""Bulk keyword import tests"""
+
+import pytest
+
+from src.utils import keyword_manager
+from src.utils.database import add_change_listener, remove_change_listener
+from src.utils.keyword_manager import ImportResult, KeywordManager
+from src.utils.migrations import migrate
+
+USER = 'user@example.com'
+
+
+@pytest.fixture
+def manager(tmp_path):
+    path = str(tmp_path / 'app.db')
+    migrate(path)
+    return KeywordManager(path)
+
+
+@pytest.fixture
+def changes():
+    changes = []
+
+    def listener(db_path, user_email, table):
+        changes.append((user_email, table))
+
+    add_change_listener(listener)
+    yield changes
+    remove_change_listener(listener)
+
+
+def test_import_counts_duplicates_and_blanks(manager, changes):
+    manager.add_keyword(USER, 'casino')
+    changes.clear()
+
+    result = manager.bulk_import(USER, ['Poker', 'poker ', '  ', 'CASINO', 'slot  machine', '', 'Slot Machine'])
+
+    # 'poker' and 'slot machine' are new; a repeat of each and the stored 'casino' are duplicates
+    assert result == ImportResult(inserted=2, duplicates=3, invalid=2)
+    assert manager.get_keywords(USER) == ['casino', 'poker', 'slot machine']
+    assert changes == [(USER, 'blocked_keywords')]
+
+
+def test_import_of_stored_keywords_only(manager, changes):
+    manager.bulk_import(USER, ['casino', 'poker'])
+    changes.clear()
+
+    assert manager.bulk_import(USER, ['poker', 'Casino', 'poker']) == ImportResult(0, 3, 0)
+    assert manager.get_keywords(USER) == ['casino', 'poker']
+    # Nothing was inserted, so no one is told to reload
+    assert changes == []
+
+
+def test_keywords_are_per_user(manager):
+    manager.bulk_import(USER, ['casino'])
+    assert manager.bulk_import('other@example.com', ['casino']) == ImportResult(1, 0, 0)
+
+
+def test_failed_import_leaves_no_rows(manager, changes, monkeypatch):
+    # Small batches, so rows are written before the input fails
+    monkeypatch.setattr(keyword_manager, 'IMPORT_BATCH_SIZE', 2)
+
+    def keywords():
+        yield from ['casino', 'poker', 'slots', 'dice']
+        raise OSError("disk went away")
+
+    assert manager.bulk_import(USER, keywords()) is None
+    assert manager.get_keywords(USER) == []
+    assert changes == []
+
+    # The connection is usable again after the rollback
+    assert manager.bulk_import(USER, ['casino']) == ImportResult(1, 0, 0)
+
+
+def test_import_file(manager, tmp_path):
+    path = tmp_path / 'keywords.txt'
+    path.write_text('# comment\ncasino\n\nPoker\ncasino\n', encoding='utf-8')
+    assert manager.import_file(USER, str(path)) == ImportResult(2, 1, 0)
+    assert manager.get_keywords(USER) == ['casino', 'poker']
@@ -0,0 +1,66 @@
+"""Schema migration tests"""
+
+import sqlite3
+
+import pytest
+
+from src.utils.database import Database
+from src.utils.db_connection import get_connection
+from src.utils.migrations import SCHEMA_VERSION, migrate, schema_version
+
+USER = 'user@example.com'
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'app.db'))
+
+
+def tables(db: Database) -> set:
+    rows = get_connection(db.db_path).execute("SELECT name FROM sqlite_master WHERE type='table'")
+    return {name for (name,) in rows}
+
+
+def test_unversioned_database_keeps_its_data(db):
+    # A database made before versioning: the original tables, user_version 0
+    conn = sqlite3.connect(db.db_path)
+    conn.executescript(f'''
+        CREATE TABLE users (email TEXT PRIMARY KEY, username TEXT, created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE blocked_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT, item TEXT,
+            type TEXT CHECK(type IN ('block', 'white')), item_type TEXT CHECK(item_type IN ('website', 'app')),
+            FOREIGN KEY (email) REFERENCES users (email), UNIQUE(email, item)
+        );
+        INSERT INTO users (email, username) VALUES ('{USER}', 'user');
+        INSERT INTO blocked_items (email, item, type, item_type) VALUES ('{USER}', 'bad.example', 'block', 'website');
+    ''')
+    conn.close()
+
+    db.create_tables()
+
+    assert schema_version(get_connection(db.db_path)) == SCHEMA_VERSION
+    assert db.get_items(USER, 'block', 'website') == ['bad.example']
+    assert {'user_settings', 'block_events', 'table_versions'} <= tables(db)
+    # The upgraded tables take new rows
+    assert db.add_item(USER, 'worse.example', 'block', 'website') == (True, None)
+
+
+def test_migrate_twice_changes_nothing(db):
+    assert migrate(db.db_path) == SCHEMA_VERSION
+    db.add_item(USER, 'bad.example', 'block', 'website')
+    assert migrate(db.db_path) == SCHEMA_VERSION
+    assert db.get_items(USER, 'block', 'website') == ['bad.example']
+
+
+def test_dropped_tables_are_created_again(db):
+    db.create_tables()
+    db.add_item(USER, 'bad.example', 'block', 'website')
+
+    db.drop_tables()
+    assert schema_version(get_connection(db.db_path)) == 0
+    assert tables(db) <= {'sqlite_sequence'}
+
+    db.create_tables()
+    assert schema_version(get_connection(db.db_path)) == SCHEMA_VERSION
+    assert db.add_item(USER, 'bad.example', 'block', 'website') == (True, None)
+    assert db.get_items(USER, 'block', 'website') == ['bad.example']
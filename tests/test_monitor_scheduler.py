@@ -0,0 +1,155 @@
+"""Monitor scheduler tests driven by pushed window events"""
+
+import queue
+import threading
+import time
+from types import MappingProxyType
+
+import pytest
+
+from src.core.monitor_scheduler import MonitorScheduler, WindowInfo, WindowSnapshot
+from src.core.polling_governor import PollingGovernor
+from src.core.window_events import FakeWindowEventSource
+
+BROWSER = WindowInfo(1, 'Home - Browser', 10, 'chrome.exe', 'Chrome_WidgetWin_1')
+EDITOR = WindowInfo(2, 'notes.txt - Editor', 20, 'notepad.exe', 'Notepad')
+
+
+def initial_snapshot() -> WindowSnapshot:
+    return WindowSnapshot(
+        timestamp=time.time(),
+        windows=(BROWSER, EDITOR),
+        foreground_hwnd=BROWSER.hwnd,
+        foreground_title=BROWSER.title,
+        processes=MappingProxyType({10: 'chrome.exe', 20: 'notepad.exe'})
+    )
+
+
+class Recorder:
+    """A detector that hands every snapshot it gets to the test thread"""
+
+    def __init__(self):
+        self.snapshots: 'queue.Queue[WindowSnapshot]' = queue.Queue()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, snapshot: WindowSnapshot):
+        self.snapshots.put(snapshot)
+        self.gate.wait(5)
+
+    def next(self) -> WindowSnapshot:
+        return self.snapshots.get(timeout=5)
+
+
+@pytest.fixture
+def source():
+    return FakeWindowEventSource()
+
+
+@pytest.fixture
+def lookups():
+    return []
+
+
+@pytest.fixture
+def scheduler(source, lookups):
+    def process_name(pid):
+        lookups.append(pid)
+        return {30: 'firefox.exe'}.get(pid, '')
+
+    scheduler = MonitorScheduler(snapshot_source=initial_snapshot, event_source=source,
+                                 governor=PollingGovernor(idle_source=lambda: 0.0),
+                                 process_name_source=process_name)
+    yield scheduler
+    scheduler.stop()
+
+
+def register(scheduler, *names):
+    """Register recorders once the first poll has named the windows' processes"""
+    recorders = {name: Recorder() for name in names}
+    for name, recorder in recorders.items():
+        scheduler.register(name, recorder)
+    assert recorders[names[0]].next().complete
+    # With events flowing the next full poll is seconds away; start from empty queues
+    time.sleep(0.05)
+    for recorder in recorders.values():
+        while not recorder.snapshots.empty():
+            recorder.snapshots.get()
+    return recorders
+
+
+def test_title_change_reaches_every_detector(scheduler, source, lookups):
+    recorders = register(scheduler, 'adult', 'browser')
+    assert source.is_running
+
+    source.push(BROWSER.hwnd, 'Search results - Browser', pid=BROWSER.pid, class_name=BROWSER.class_name)
+
+    for recorder in recorders.values():
+        snapshot = recorder.next()
+        assert not snapshot.complete
+        assert snapshot.windows == (BROWSER._replace(title='Search results - Browser'),)
+        # The foreground window's new title is the snapshot's foreground title
+        assert snapshot.foreground_hwnd == BROWSER.hwnd
+        assert snapshot.foreground_title == 'Search results - Browser'
+        assert snapshot.foreground == snapshot.windows[0]
+    # The process name came from the last full snapshot
+    assert lookups == []
+
+
+def test_background_title_change_keeps_foreground(scheduler, source):
+    recorders = register(scheduler, 'adult')
+
+    source.push(EDITOR.hwnd, 'todo.txt - Editor', pid=EDITOR.pid, class_name=EDITOR.class_name)
+
+    snapshot = recorders['adult'].next()
+    assert snapshot.windows == (EDITOR._replace(title='todo.txt - Editor'),)
+    assert snapshot.foreground_hwnd == BROWSER.hwnd
+    assert snapshot.foreground_title == BROWSER.title
+    assert snapshot.foreground is None
+    assert snapshot.windows_of(['notepad']) == list(snapshot.windows)
+    assert snapshot.windows_of(['chrome']) == []
+
+
+def test_foreground_change_of_new_window(scheduler, source, lookups):
+    recorders = register(scheduler, 'adult')
+
+    source.push(3, 'Start Page - Firefox', pid=30, class_name='MozillaWindowClass', foreground=True)
+
+    snapshot = recorders['adult'].next()
+    assert snapshot.windows == (WindowInfo(3, 'Start Page - Firefox', 30, 'firefox.exe', 'MozillaWindowClass'),)
+    assert snapshot.foreground_hwnd == 3
+    assert snapshot.foreground_title == 'Start Page - Firefox'
+    assert snapshot.processes[30] == 'firefox.exe'
+    assert lookups == [30]
+    assert scheduler.governor.stats()['focus_changes'] >= 2
+
+
+def test_events_for_one_window_coalesce(scheduler, source):
+    recorders = register(scheduler, 'adult')
+    recorder = recorders['adult']
+
+    # Hold the scheduler in the detector while more events arrive
+    recorder.gate.clear()
+    source.push(BROWSER.hwnd, 'Loading...', pid=BROWSER.pid)
+    assert recorder.next().windows[0].title == 'Loading...'
+    source.push(BROWSER.hwnd, 'Page 1 - Browser', pid=BROWSER.pid)
+    source.push(BROWSER.hwnd, 'Page 2 - Browser', pid=BROWSER.pid)
+    source.push(EDITOR.hwnd, 'todo.txt - Editor', pid=EDITOR.pid)
+    recorder.gate.set()
+
+    snapshot = recorder.next()
+    assert sorted(window.title for window in snapshot.windows) == ['Page 2 - Browser', 'todo.txt - Editor']
+    assert snapshot.foreground_title == 'Page 2 - Browser'
+    assert scheduler.stats()['events'] == 4
+
+
+def test_unregistered_detector_gets_no_events(scheduler, source):
+    recorders = register(scheduler, 'adult', 'browser')
+    scheduler.unregister('browser')
+
+    source.push(BROWSER.hwnd, 'Search results - Browser', pid=BROWSER.pid)
+
+    assert recorders['adult'].next().windows[0].title == 'Search results - Browser'
+    with pytest.raises(queue.Empty):
+        recorders['browser'].snapshots.get(timeout=0.2)
+    assert scheduler.stats()['detectors'].keys() == {'adult'}
@@ -0,0 +1,73 @@
+"""Block event throttle tests with a fake clock"""
+
+import pytest
+
+from src.core.throttle import EventThrottle, block_event_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_persistent_tab_is_blocked_after_every_suppression_window(clock):
+    throttle = EventThrottle('blocks', suppress_for=10.0, clock=clock)
+    key = block_event_key('https://bad.example/', window='Bad page - Browser')
+
+    for _ in range(30):
+        # Seen on every poll while the tab stays open
+        assert throttle.allow(key)
+        for _ in range(9):
+            clock.now += 1.0
+            assert throttle.suppressed(key)
+            assert not throttle.allow(key)
+        clock.now += 1.0
+        assert not throttle.suppressed(key)
+
+    stats = throttle.stats()
+    assert stats['allowed'] == 30
+    assert stats['limited'] == 0
+
+
+def test_keys_are_suppressed_independently(clock):
+    throttle = EventThrottle('blocks', suppress_for=10.0, clock=clock)
+    first = block_event_key('https://bad.example/', window='Tab one')
+    second = block_event_key('https://bad.example/', window='Tab two')
+
+    assert throttle.allow(first)
+    assert throttle.allow(second)
+    assert throttle.suppressed(first) and throttle.suppressed(second)
+    assert throttle.remaining(first) == 10.0
+
+
+def test_reset_ends_suppression(clock):
+    throttle = EventThrottle('blocks', suppress_for=10.0, clock=clock)
+    key = block_event_key('https://bad.example/')
+
+    assert throttle.allow(key)
+    throttle.reset(key)
+    assert throttle.allow(key)
+
+
+def test_token_bucket_limits_when_configured(clock):
+    throttle = EventThrottle('signals', capacity=2.0, refill_rate=0.01, suppress_for=1.0, clock=clock)
+    key = block_event_key('https://bad.example/')
+
+    assert throttle.allow(key)
+    clock.now += 1.0
+    assert throttle.allow(key)
+    clock.now += 1.0
+    # Past the suppression window but out of tokens until one refills
+    assert throttle.suppressed(key)
+    assert not throttle.allow(key)
+    clock.now += 100.0
+    assert throttle.allow(key)
+    assert throttle.stats()['limited'] == 2